@@ -4,38 +4,55 @@ ArtisanMarket Demo Script
 Demonstrates all implemented features of the polyglot persistence marketplace.
 """
 
+import argparse
+import itertools
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from src.services.search_service import SearchService
-from src.services.cart_service import cart_service
-from src.services.recommendation_service import recommendation_service
-
 console = Console()
 
 
+def _trunc(s: str, n: int) -> str:
+    """Shorten a string to n characters, adding an ellipsis when cut."""
+    return s if len(s) <= n else f"{s[:n]}..."
+
+
+def _format_column(rows, key: str, fmt: str) -> list:
+    """Format one numeric field of every row in a single vectorised call."""
+    values = np.fromiter((row.get(key, 0) for row in rows), dtype=float, count=len(rows))
+    return np.char.mod(fmt, values).tolist()
+
+
 def demo_search_features():
     """Demonstrate search functionality."""
+    from src.services.search_service import get_search_service
+
     console.print(Panel.fit("🔍 Search Features Demo", style="blue"))
     
-    search_service = SearchService()
+    search_service = get_search_service()
+    
+    # Embed both semantic-bearing queries in one forward pass
+    search_service.prefetch_embeddings(["eco-friendly kitchenware", "handmade jewelry"])
     
     # Full-text search
     console.print("\n[bold cyan]1. Full-text Search:[/bold cyan]")
     results = search_service.full_text_search("wooden bowl", limit=3)
     if results:
         table = Table(title="Full-text Search Results")
-        table.add_column("ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
+        table.add_column("ID", style="cyan", width=8, no_wrap=True)
+        table.add_column("Name", style="magenta", width=43, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
         
         for result in results:
             table.add_row(
                 result['id'],
-                result['name'][:40] + "..." if len(result['name']) > 40 else result['name'],
+                _trunc(result['name'], 40),
                 f"${result['price']:.2f}"
             )
         console.print(table)
@@ -45,17 +62,19 @@ def demo_search_features():
     results = search_service.semantic_search("eco-friendly kitchenware", limit=3)
     if results:
         table = Table(title="Semantic Search Results")
-        table.add_column("ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
-        table.add_column("Similarity", style="yellow")
+        table.add_column("ID", style="cyan", width=8, no_wrap=True)
+        table.add_column("Name", style="magenta", width=43, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        table.add_column("Similarity", style="yellow", width=10, no_wrap=True)
         
-        for result in results:
+        prices = _format_column(results, 'price', "$%.2f")
+        similarities = _format_column(results, 'similarity', "%.3f")
+        for result, price, similarity in zip(results, prices, similarities):
             table.add_row(
                 result['id'],
-                result['name'][:40] + "..." if len(result['name']) > 40 else result['name'],
-                f"${result['price']:.2f}",
-                f"{result.get('similarity', 0):.3f}"
+                _trunc(result['name'], 40),
+                price,
+                similarity
             )
         console.print(table)
     
@@ -64,14 +83,14 @@ def demo_search_features():
     results = search_service.combined_search("handmade jewelry", limit=3)
     if results:
         table = Table(title="Combined Search Results")
-        table.add_column("ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
+        table.add_column("ID", style="cyan", width=8, no_wrap=True)
+        table.add_column("Name", style="magenta", width=43, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
         
         for result in results:
             table.add_row(
                 result['id'],
-                result['name'][:40] + "..." if len(result['name']) > 40 else result['name'],
+                _trunc(result['name'], 40),
                 f"${result['price']:.2f}"
             )
         console.print(table)
@@ -79,6 +98,8 @@ def demo_search_features():
 
 def demo_cart_features():
     """Demonstrate shopping cart functionality."""
+    from src.services.cart_service import cart_service
+
     console.print(Panel.fit("🛒 Shopping Cart Demo", style="blue"))
     
     user_id = "U001"
@@ -92,8 +113,8 @@ def demo_cart_features():
         ("P005", 3)
     ]
     
-    for product_id, quantity in products_to_add:
-        success = cart_service.add_to_cart(user_id, product_id, quantity)
+    added = cart_service.add_many_to_cart(user_id, products_to_add)
+    for (product_id, quantity), success in zip(products_to_add, added):
         if success:
             console.print(f"✅ Added {quantity}x {product_id} to cart")
         else:
@@ -105,14 +126,14 @@ def demo_cart_features():
     
     if cart_total['items']:
         table = Table(title=f"Shopping Cart - User {user_id}")
-        table.add_column("Product", style="magenta")
-        table.add_column("Price", style="green")
-        table.add_column("Quantity", style="cyan")
-        table.add_column("Total", style="yellow")
+        table.add_column("Product", style="magenta", width=33, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        table.add_column("Quantity", style="cyan", width=8, no_wrap=True)
+        table.add_column("Total", style="yellow", width=10, no_wrap=True)
         
         for item in cart_total['items']:
             table.add_row(
-                item['name'][:30] + "..." if len(item['name']) > 30 else item['name'],
+                _trunc(item['name'], 30),
                 f"${item['price']:.2f}",
                 str(item['quantity']),
                 f"${item['total']:.2f}"
@@ -121,16 +142,17 @@ def demo_cart_features():
         table.add_row("", "", "Total:", f"${cart_total['total']:.2f}", style="bold")
         console.print(table)
         
-        # Show cart expiry
-        expiry = cart_service.get_cart_expiry(user_id)
-        if expiry:
-            console.print(f"⏰ Cart expires in {expiry} seconds")
+        # Show cart expiry, read alongside the cart contents
+        if cart_total['expiry']:
+            console.print(f"⏰ Cart expires in {cart_total['expiry']} seconds")
     else:
         console.print("Cart is empty")
 
 
 def demo_recommendation_features():
     """Demonstrate recommendation functionality."""
+    from src.services.recommendation_service import recommendation_service
+
     console.print(Panel.fit("🎯 Recommendation Features Demo", style="blue"))
     
     user_id = "U001"
@@ -142,15 +164,15 @@ def demo_recommendation_features():
     
     if recommendations:
         table = Table(title=f"Personalized Recommendations - User {user_id}")
-        table.add_column("Product ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
-        table.add_column("Frequency", style="yellow")
+        table.add_column("Product ID", style="cyan", width=10, no_wrap=True)
+        table.add_column("Name", style="magenta", width=33, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        table.add_column("Frequency", style="yellow", width=9, no_wrap=True)
         
         for rec in recommendations:
             table.add_row(
                 rec['product_id'],
-                rec['name'][:30] + "..." if len(rec['name']) > 30 else rec['name'],
+                _trunc(rec['name'], 30),
                 f"${rec['price']:.2f}",
                 str(rec['frequency'])
             )
@@ -164,17 +186,19 @@ def demo_recommendation_features():
     
     if similar:
         table = Table(title=f"Similar Products - {product_id}")
-        table.add_column("Product ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
-        table.add_column("Similarity", style="yellow")
+        table.add_column("Product ID", style="cyan", width=10, no_wrap=True)
+        table.add_column("Name", style="magenta", width=33, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        table.add_column("Similarity", style="yellow", width=10, no_wrap=True)
         
-        for sim in similar:
+        prices = _format_column(similar, 'price', "$%.2f")
+        similarities = _format_column(similar, 'similarity', "%.3f")
+        for sim, price, similarity in zip(similar, prices, similarities):
             table.add_row(
                 sim['product_id'],
-                sim['name'][:30] + "..." if len(sim['name']) > 30 else sim['name'],
-                f"${sim['price']:.2f}",
-                f"{sim['similarity']:.3f}"
+                _trunc(sim['name'], 30),
+                price,
+                similarity
             )
         console.print(table)
     else:
@@ -182,19 +206,21 @@ def demo_recommendation_features():
     
     # Frequently bought together
     console.print(f"\n[bold cyan]Frequently bought together with {product_id}:[/bold cyan]")
-    together = recommendation_service.get_frequently_bought_together(product_id, limit=3)
+    together = recommendation_service.iter_frequently_bought_together(product_id, limit=3)
+    first = next(together, None)
     
-    if together:
+    if first:
         table = Table(title=f"Frequently Bought Together - {product_id}")
-        table.add_column("Product ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
-        table.add_column("Frequency", style="yellow")
+        table.add_column("Product ID", style="cyan", width=10, no_wrap=True)
+        table.add_column("Name", style="magenta", width=33, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        table.add_column("Frequency", style="yellow", width=9, no_wrap=True)
         
-        for item in together:
+        # Rows are added as Neo4j streams them in
+        for item in itertools.chain([first], together):
             table.add_row(
                 item['product_id'],
-                item['name'][:30] + "..." if len(item['name']) > 30 else item['name'],
+                _trunc(item['name'], 30),
                 f"${item['price']:.2f}",
                 str(item['frequency'])
             )
@@ -205,6 +231,8 @@ def demo_recommendation_features():
 
 def demo_comprehensive_features():
     """Demonstrate comprehensive features."""
+    from src.services.recommendation_service import recommendation_service
+
     console.print(Panel.fit("🚀 Comprehensive Features Demo", style="blue"))
     
     user_id = "U001"
@@ -214,20 +242,22 @@ def demo_comprehensive_features():
     comprehensive = recommendation_service.get_comprehensive_recommendations(user_id, limit=6)
     
     for rec_type, recommendations in comprehensive.items():
-        if recommendations:
-            console.print(f"\n[bold]{rec_type.title()} Recommendations:[/bold]")
-            table = Table()
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            
-            for rec in recommendations:
-                table.add_row(
-                    rec['product_id'],
-                    rec['name'][:25] + "..." if len(rec['name']) > 25 else rec['name'],
-                    f"${rec['price']:.2f}"
-                )
-            console.print(table)
+        if not recommendations:
+            continue
+
+        console.print(f"\n[bold]{rec_type.title()} Recommendations:[/bold]")
+        table = Table()
+        table.add_column("Product ID", style="cyan", width=10, no_wrap=True)
+        table.add_column("Name", style="magenta", width=28, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        
+        for rec in recommendations:
+            table.add_row(
+                rec['product_id'],
+                _trunc(rec['name'], 25),
+                f"${rec['price']:.2f}"
+            )
+        console.print(table)
     
     # Trending products
     console.print(f"\n[bold cyan]Trending products (last 30 days):[/bold cyan]")
@@ -235,73 +265,104 @@ def demo_comprehensive_features():
     
     if trending:
         table = Table(title="Trending Products")
-        table.add_column("Product ID", style="cyan")
-        table.add_column("Name", style="magenta")
-        table.add_column("Price", style="green")
-        table.add_column("Recent Purchases", style="yellow")
+        table.add_column("Product ID", style="cyan", width=10, no_wrap=True)
+        table.add_column("Name", style="magenta", width=33, no_wrap=True)
+        table.add_column("Price", style="green", width=10, no_wrap=True)
+        table.add_column("Recent Purchases", style="yellow", width=16, no_wrap=True)
         
         for product in trending:
             table.add_row(
                 product['product_id'],
-                product['name'][:30] + "..." if len(product['name']) > 30 else product['name'],
+                _trunc(product['name'], 30),
                 f"${product['price']:.2f}",
                 str(product['recent_purchases'])
             )
         console.print(table)
 
 
+def _pg_count():
+    from src.db.postgres_client import db
+    with db.get_cursor() as cursor:
+        # Planner estimate from the catalog; avoids a full scan of products
+        cursor.execute(
+            "SELECT GREATEST(reltuples, 0)::bigint as count FROM pg_class "
+            "WHERE oid = 'products'::regclass"
+        )
+        product_count = cursor.fetchone()['count']
+    return f"✅ PostgreSQL: ~{product_count} products"
+
+
+def _mongo_count():
+    from src.db.mongodb_client import mongo_client
+    review_count = mongo_client.get_collection("reviews").estimated_document_count()
+    return f"✅ MongoDB: ~{review_count} reviews"
+
+
+def _neo4j_count():
+    from src.db.neo4j_client import neo4j_client
+    records, _, _ = neo4j_client.driver.execute_query(
+        "MATCH (p:Product) RETURN count(p) as count"
+    )
+    product_count = records[0]['count']
+    return f"✅ Neo4j: {product_count} product nodes"
+
+
+def _redis_ping():
+    from src.db.redis_client import redis_client
+    redis_client.client.ping()
+    return "✅ Redis: Connected"
+
+
+def _probe(name, fn):
+    """Run a single health check, returning its status line."""
+    try:
+        return name, fn()
+    except Exception as e:
+        return name, f"❌ {name}: {str(e)[:50]}..."
+
+
 def demo_system_status():
     """Show system status and database connections."""
     console.print(Panel.fit("📊 System Status", style="blue"))
     
+    probes = {
+        "PostgreSQL": _pg_count,
+        "MongoDB": _mongo_count,
+        "Neo4j": _neo4j_count,
+        "Redis": _redis_ping,
+    }
+    
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console,
     ) as progress:
+        task_map = {
+            name: progress.add_task(f"Checking {name}...", total=None)
+            for name in probes
+        }
         
-        # Check PostgreSQL
-        task1 = progress.add_task("Checking PostgreSQL...", total=None)
-        try:
-            from src.db.postgres_client import db
-            with db.get_cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) as count FROM products")
-                product_count = cursor.fetchone()['count']
-            progress.update(task1, description=f"✅ PostgreSQL: {product_count} products")
-        except Exception as e:
-            progress.update(task1, description=f"❌ PostgreSQL: {str(e)[:50]}...")
-        
-        # Check MongoDB
-        task2 = progress.add_task("Checking MongoDB...", total=None)
-        try:
-            from src.db.mongodb_client import mongo_client
-            review_count = mongo_client.get_collection("reviews").count_documents({})
-            progress.update(task2, description=f"✅ MongoDB: {review_count} reviews")
-        except Exception as e:
-            progress.update(task2, description=f"❌ MongoDB: {str(e)[:50]}...")
-        
-        # Check Neo4j
-        task3 = progress.add_task("Checking Neo4j...", total=None)
-        try:
-            from src.db.neo4j_client import neo4j_client
-            with neo4j_client.driver.session() as session:
-                result = session.run("MATCH (p:Product) RETURN count(p) as count")
-                product_count = result.single()['count']
-            progress.update(task3, description=f"✅ Neo4j: {product_count} product nodes")
-        except Exception as e:
-            progress.update(task3, description=f"❌ Neo4j: {str(e)[:50]}...")
-        
-        # Check Redis
-        task4 = progress.add_task("Checking Redis...", total=None)
-        try:
-            from src.db.redis_client import redis_client
-            redis_client.client.ping()
-            progress.update(task4, description="✅ Redis: Connected")
-        except Exception as e:
-            progress.update(task4, description=f"❌ Redis: {str(e)[:50]}...")
+        # The checks are independent network round-trips, so run them concurrently
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            futures = [executor.submit(_probe, name, fn) for name, fn in probes.items()]
+            for future in as_completed(futures):
+                name, description = future.result()
+                progress.update(task_map[name], description=description)
+
+
+def parse_args(argv=None):
+    """Parse demo command-line options."""
+    parser = argparse.ArgumentParser(description="ArtisanMarket feature demo")
+    parser.add_argument(
+        "--pace",
+        type=float,
+        default=0.0,
+        help="Seconds to pause between demo sections (use --pace 1 for the old pacing)",
+    )
+    return parser.parse_args(argv)
 
 
-def main():
+def main(pace: float = 0.0):
     """Run the complete demo."""
     console.print(Panel.fit("🎨 ArtisanMarket - Polyglot Persistence Demo", style="bold blue"))
     console.print("This demo showcases all implemented features of the ArtisanMarket application.\n")
@@ -310,23 +371,28 @@ def main():
     demo_system_status()
     
     # Wait a moment
-    time.sleep(1)
+    if pace:
+        time.sleep(pace)
     
     # Run feature demos
-    demo_search_features()
-    time.sleep(1)
-    
-    demo_cart_features()
-    time.sleep(1)
-    
-    demo_recommendation_features()
-    time.sleep(1)
-    
-    demo_comprehensive_features()
+    sections = [
+        demo_search_features,
+        demo_cart_features,
+        demo_recommendation_features,
+        demo_comprehensive_features,
+    ]
+    for i, section in enumerate(sections):
+        if i and pace:
+            time.sleep(pace)
+        try:
+            section()
+        except ImportError as e:
+            # Services are imported lazily, so a missing driver only skips its section
+            console.print(f"⚠️ Skipping {section.__name__}: {e}", style="yellow")
     
     console.print(Panel.fit("🎉 Demo Complete!", style="bold green"))
     console.print("All features have been demonstrated successfully!")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(pace=parse_args().pace)
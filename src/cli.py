@@ -1,22 +1,73 @@
 """Command-line interface for ArtisanMarket."""
 
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import click
 from rich.console import Console
 from rich.table import Table
-from rich.panel import Panel
-
-from src.loaders.relational_loader import RelationalLoader
-from src.loaders.document_loader import DocumentLoader
-from src.loaders.graph_loader import GraphLoader
-from src.loaders.vector_loader import VectorLoader
-from src.utils.purchase_generator import PurchaseGenerator
-from src.services.search_service import SearchService
-from src.services.cart_service import cart_service
-from src.services.recommendation_service import recommendation_service
-from src.services.order_service import order_service
 
 console = Console()
 
+# Above this many rows, results are printed as plain text instead of a table
+PLAIN_OUTPUT_LIMIT = 50
+
+
+def _truncate(text: str, length: int = 30) -> str:
+    """Shorten text to length characters, adding an ellipsis when cut."""
+    return text[:length] + "..." if len(text) > length else text
+
+
+# Bound once so row loops call it directly instead of rebuilding an f-string
+_money = "${:.2f}".format
+
+# Dataset user IDs are short codes like U001
+_USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _valid_query(query: str) -> bool:
+    """Report and reject blank queries before any service is loaded."""
+    if query.strip():
+        return True
+    console.print("Empty query.", style="yellow")
+    return False
+
+
+def _valid_user_id(user_id: str) -> bool:
+    """Report and reject malformed user IDs before any service is loaded."""
+    if _USER_ID_PATTERN.match(user_id):
+        return True
+    console.print(f"❌ Invalid user ID: {user_id!r}", style="red")
+    return False
+
+
+def _heading(text: str):
+    """Print a blue section rule; cheaper to lay out than a fitted Panel."""
+    console.rule(f"[blue]{text}", style="blue")
+
+
+def _render_results(title: str, columns: list, rows: list, limit: int):
+    """Render result rows under (header, style) columns.
+
+    Rows are printed tab-separated instead of as a Rich table when the
+    limit is large.
+    """
+    if limit >= PLAIN_OUTPUT_LIMIT:
+        # Skip Rich's per-cell markup parsing and layout for long listings
+        click.echo("\t".join(header for header, _ in columns))
+        for row in rows:
+            click.echo("\t".join(map(str, row)))
+        return
+
+    table = Table(title=title)
+    for header, style in columns:
+        table.add_column(header, style=style, no_wrap=True)
+    for row in rows:
+        table.add_row(*row)
+    console.print(table)
+
 
 @click.group()
 def cli():
@@ -33,8 +84,10 @@ def load():
 @load.command()
 def relational():
     """Load data into PostgreSQL."""
-    console.print(Panel.fit("Loading relational data into PostgreSQL...", style="blue"))
+    _heading("Loading relational data into PostgreSQL...")
     try:
+        from src.loaders.relational_loader import RelationalLoader
+
         loader = RelationalLoader()
         loader.load_all()
         console.print("✅ Relational data loaded successfully!", style="green")
@@ -45,8 +98,10 @@ def relational():
 @load.command()
 def documents():
     """Load data into MongoDB."""
-    console.print(Panel.fit("Loading document data into MongoDB...", style="blue"))
+    _heading("Loading document data into MongoDB...")
     try:
+        from src.loaders.document_loader import DocumentLoader
+
         loader = DocumentLoader()
         loader.load_all()
         console.print("✅ Document data loaded successfully!", style="green")
@@ -57,8 +112,10 @@ def documents():
 @load.command()
 def graph():
     """Load data into Neo4j."""
-    console.print(Panel.fit("Loading graph data into Neo4j...", style="blue"))
+    _heading("Loading graph data into Neo4j...")
     try:
+        from src.loaders.graph_loader import GraphLoader
+
         loader = GraphLoader()
         loader.load_all()
         console.print("✅ Graph data loaded successfully!", style="green")
@@ -69,8 +126,10 @@ def graph():
 @load.command()
 def vectors():
     """Load vector embeddings into pgvector."""
-    console.print(Panel.fit("Loading vector embeddings...", style="blue"))
+    _heading("Loading vector embeddings...")
     try:
+        from src.loaders.vector_loader import VectorLoader
+
         loader = VectorLoader()
         loader.load_all()
         console.print("✅ Vector embeddings loaded successfully!", style="green")
@@ -78,43 +137,53 @@ def vectors():
         console.print(f"❌ Error loading vector embeddings: {e}", style="red")
 
 
+def _run_loaders(steps):
+    """Run (message, loader class) steps one after another."""
+    for message, loader_class in steps:
+        console.print(message)
+        loader_class().load_all()
+
+
 @load.command()
 def all():
     """Load all data into all databases."""
-    console.print(Panel.fit("Loading all data into all databases...", style="blue"))
-
-    try:
-        # Load relational data
-        console.print("📊 Loading relational data...")
-        relational_loader = RelationalLoader()
-        relational_loader.load_all()
-
-        # Load document data
-        console.print("📄 Loading document data...")
-        document_loader = DocumentLoader()
-        document_loader.load_all()
-
-        # Load graph data
-        console.print("🕸️ Loading graph data...")
-        graph_loader = GraphLoader()
-        graph_loader.load_all()
-
-        # Load vector embeddings
-        console.print("🧠 Loading vector embeddings...")
-        vector_loader = VectorLoader()
-        vector_loader.load_all()
-
+    from src.loaders.relational_loader import RelationalLoader
+    from src.loaders.document_loader import DocumentLoader
+    from src.loaders.graph_loader import GraphLoader
+    from src.loaders.vector_loader import VectorLoader
+
+    _heading("Loading all data into all databases...")
+
+    # Each backend loads independently; embeddings reference products, so
+    # vectors follow the relational load on the same worker
+    pipelines = [
+        [
+            ("📊 Loading relational data...", RelationalLoader),
+            ("🧠 Loading vector embeddings...", VectorLoader),
+        ],
+        [("📄 Loading document data...", DocumentLoader)],
+        [("🕸️ Loading graph data...", GraphLoader)],
+    ]
+    with ThreadPoolExecutor(max_workers=len(pipelines)) as executor:
+        futures = [executor.submit(_run_loaders, steps) for steps in pipelines]
+        wait(futures)
+
+    errors = [future.exception() for future in futures if future.exception()]
+    if errors:
+        for e in errors:
+            console.print(f"❌ Error loading data: {e}", style="red")
+    else:
         console.print("✅ All data loaded successfully!", style="green")
-    except Exception as e:
-        console.print(f"❌ Error loading data: {e}", style="red")
 
 
 @cli.command()
 @click.option("--count", default=100, help="Number of purchases to generate")
 def generate_purchases(count):
     """Generate purchase history and load into databases."""
-    console.print(Panel.fit(f"Generating {count} purchases...", style="blue"))
+    _heading(f"Generating {count} purchases...")
     try:
+        from src.utils.purchase_generator import PurchaseGenerator
+
         generator = PurchaseGenerator()
         generator.generate_and_load_all(count)
         console.print(
@@ -135,29 +204,36 @@ def search():
 @click.option("--limit", default=5, help="Number of results to return")
 def text(query, limit):
     """Perform full-text search."""
-    console.print(Panel.fit(f"Searching for: '{query}'", style="blue"))
+    if not _valid_query(query):
+        return
+    _heading(f"Searching for: '{query}'")
     try:
-        service = SearchService()
+        from src.services.search_service import get_search_service
+
+        service = get_search_service()
         results = service.full_text_search(query, limit=limit)
 
         if results:
-            table = Table(title=f"Search Results for '{query}'")
-            table.add_column("ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Category", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     result.get("category_id", "N/A"),
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Search Results for '{query}'",
+                [
+                    ("ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Category", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No results found.", style="yellow")
     except Exception as e:
@@ -169,29 +245,36 @@ def text(query, limit):
 @click.option("--limit", default=5, help="Number of results to return")
 def semantic(query, limit):
     """Perform semantic search."""
-    console.print(Panel.fit(f"Semantic search for: '{query}'", style="blue"))
+    if not _valid_query(query):
+        return
+    _heading(f"Semantic search for: '{query}'")
     try:
-        service = SearchService()
+        from src.services.search_service import get_search_service
+
+        service = get_search_service()
         results = service.semantic_search(query, limit=limit)
 
         if results:
-            table = Table(title=f"Semantic Search Results for '{query}'")
-            table.add_column("ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Similarity", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     f"{result.get('similarity', 0):.3f}",
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Semantic Search Results for '{query}'",
+                [
+                    ("ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Similarity", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No results found.", style="yellow")
     except Exception as e:
@@ -203,29 +286,36 @@ def semantic(query, limit):
 @click.option("--limit", default=5, help="Number of results to return")
 def combined(query, limit):
     """Perform combined search (text + semantic)."""
-    console.print(Panel.fit(f"Combined search for: '{query}'", style="blue"))
+    if not _valid_query(query):
+        return
+    _heading(f"Combined search for: '{query}'")
     try:
-        service = SearchService()
+        from src.services.search_service import get_search_service
+
+        service = get_search_service()
         results = service.combined_search(query, limit=limit)
 
         if results:
-            table = Table(title=f"Combined Search Results for '{query}'")
-            table.add_column("ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Category", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     result.get("category_id", "N/A"),
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Combined Search Results for '{query}'",
+                [
+                    ("ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Category", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No results found.", style="yellow")
     except Exception as e:
@@ -242,28 +332,30 @@ def cart():
 @click.argument("user_id")
 def show_cart(user_id):
     """Show user's cart."""
-    console.print(Panel.fit(f"Cart for user {user_id}", style="blue"))
+    if not _valid_user_id(user_id):
+        return
+    _heading(f"Cart for user {user_id}")
     try:
+        from src.services.cart_service import cart_service
+
         cart_total = cart_service.get_cart_total(user_id)
 
         if cart_total["items"]:
             table = Table(title=f"Shopping Cart - User {user_id}")
-            table.add_column("Product", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Quantity", style="cyan")
-            table.add_column("Total", style="yellow")
+            table.add_column("Product", style="magenta", no_wrap=True)
+            table.add_column("Price", style="green", no_wrap=True)
+            table.add_column("Quantity", style="cyan", no_wrap=True)
+            table.add_column("Total", style="yellow", no_wrap=True)
 
             for item in cart_total["items"]:
                 table.add_row(
-                    item["name"][:30] + "..."
-                    if len(item["name"]) > 30
-                    else item["name"],
-                    f"${item['price']:.2f}",
+                    _truncate(item["name"]),
+                    _money(item["price"]),
                     str(item["quantity"]),
-                    f"${item['total']:.2f}",
+                    _money(item["total"]),
                 )
 
-            table.add_row("", "", "Total:", f"${cart_total['total']:.2f}", style="bold")
+            table.add_row("", "", "Total:", _money(cart_total["total"]), style="bold")
             console.print(table)
         else:
             console.print("Cart is empty.", style="yellow")
@@ -277,12 +369,12 @@ def show_cart(user_id):
 @click.option("--quantity", default=1, help="Quantity to add")
 def add(user_id, product_id, quantity):
     """Add item to cart."""
-    console.print(
-        Panel.fit(
-            f"Adding {quantity}x {product_id} to cart for user {user_id}", style="blue"
-        )
-    )
+    if not _valid_user_id(user_id):
+        return
+    _heading(f"Adding {quantity}x {product_id} to cart for user {user_id}")
     try:
+        from src.services.cart_service import cart_service
+
         success = cart_service.add_to_cart(user_id, product_id, quantity)
         if success:
             console.print("✅ Item added to cart successfully!", style="green")
@@ -309,7 +401,11 @@ def orders():
 @click.option("--limit", default=10, help="Number of orders to show")
 def history(user_id, limit):
     """Show user's order history."""
+    if not _valid_user_id(user_id):
+        return
     try:
+        from src.services.order_service import order_service
+
         orders = order_service.get_user_orders(user_id, limit=limit)
         if not orders:
             console.print(f"❌ No orders found for user {user_id}", style="red")
@@ -333,6 +429,8 @@ def history(user_id, limit):
 def show(order_id):
     """Show order details."""
     try:
+        from src.services.order_service import order_service
+
         order = order_service.get_order(order_id)
         if not order:
             console.print(f"❌ Order {order_id} not found", style="red")
@@ -358,6 +456,8 @@ def show(order_id):
 def update_status(order_id, status):
     """Update order status."""
     try:
+        from src.services.order_service import order_service
+
         success = order_service.update_order_status(order_id, status)
         if success:
             console.print(
@@ -374,7 +474,11 @@ def update_status(order_id, status):
 @click.argument("user_id")
 def cancel(order_id, user_id):
     """Cancel an order."""
+    if not _valid_user_id(user_id):
+        return
     try:
+        from src.services.order_service import order_service
+
         success = order_service.cancel_order(order_id, user_id)
         if success:
             console.print(f"✅ Order {order_id} cancelled successfully", style="green")
@@ -388,7 +492,11 @@ def cancel(order_id, user_id):
 @click.argument("user_id")
 def stats(user_id):
     """Show user's order statistics."""
+    if not _valid_user_id(user_id):
+        return
     try:
+        from src.services.order_service import order_service
+
         stats = order_service.get_order_statistics(user_id)
         if not stats:
             console.print(
@@ -415,6 +523,8 @@ def stats(user_id):
 def recent(limit):
     """Show recent orders across all users."""
     try:
+        from src.services.order_service import order_service
+
         orders = order_service.get_recent_orders(limit=limit)
         if not orders:
             console.print("❌ No recent orders found", style="red")
@@ -433,6 +543,8 @@ def recent(limit):
 def analytics():
     """Show order analytics dashboard."""
     try:
+        from src.services.order_service import order_service
+
         analytics = order_service.get_order_analytics()
         if not analytics:
             console.print("❌ No analytics data available", style="red")
@@ -465,28 +577,35 @@ def analytics():
 @click.option("--limit", default=5, help="Number of recommendations")
 def user(user_id, limit):
     """Get personalized recommendations for user."""
-    console.print(Panel.fit(f"Recommendations for user {user_id}", style="blue"))
+    if not _valid_user_id(user_id):
+        return
+    _heading(f"Recommendations for user {user_id}")
     try:
+        from src.services.recommendation_service import recommendation_service
+
         results = recommendation_service.get_user_recommendations(user_id, limit)
 
         if results:
-            table = Table(title=f"Personalized Recommendations - User {user_id}")
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Frequency", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["product_id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     str(result["frequency"]),
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Personalized Recommendations - User {user_id}",
+                [
+                    ("Product ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Frequency", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No recommendations available.", style="yellow")
     except Exception as e:
@@ -498,28 +617,33 @@ def user(user_id, limit):
 @click.option("--limit", default=5, help="Number of recommendations")
 def similar(product_id, limit):
     """Get similar products."""
-    console.print(Panel.fit(f"Similar products to {product_id}", style="blue"))
+    _heading(f"Similar products to {product_id}")
     try:
+        from src.services.recommendation_service import recommendation_service
+
         results = recommendation_service.get_similar_products(product_id, limit)
 
         if results:
-            table = Table(title=f"Similar Products - {product_id}")
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Similarity", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["product_id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     f"{result['similarity']:.3f}",
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Similar Products - {product_id}",
+                [
+                    ("Product ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Similarity", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No similar products found.", style="yellow")
     except Exception as e:
@@ -531,28 +655,33 @@ def similar(product_id, limit):
 @click.option("--limit", default=5, help="Number of recommendations")
 def frequently_bought_together(product_id, limit):
     """Get products frequently bought together."""
-    console.print(Panel.fit(f"Frequently bought together with {product_id}", style="blue"))
+    _heading(f"Frequently bought together with {product_id}")
     try:
+        from src.services.recommendation_service import recommendation_service
+
         results = recommendation_service.get_frequently_bought_together(product_id, limit)
 
         if results:
-            table = Table(title=f"Frequently Bought Together - {product_id}")
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Frequency", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["product_id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     str(result["frequency"]),
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Frequently Bought Together - {product_id}",
+                [
+                    ("Product ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Frequency", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No frequently bought together products found.", style="yellow")
     except Exception as e:
@@ -564,28 +693,33 @@ def frequently_bought_together(product_id, limit):
 @click.option("--limit", default=10, help="Number of recommendations")
 def trending(days, limit):
     """Get trending products based on recent purchases."""
-    console.print(Panel.fit(f"Trending products (last {days} days)", style="blue"))
+    _heading(f"Trending products (last {days} days)")
     try:
+        from src.services.recommendation_service import recommendation_service
+
         results = recommendation_service.get_trending_products(days, limit)
 
         if results:
-            table = Table(title=f"Trending Products - Last {days} Days")
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Recent Purchases", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["product_id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     str(result["recent_purchases"]),
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Trending Products - Last {days} Days",
+                [
+                    ("Product ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Recent Purchases", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No trending products found.", style="yellow")
     except Exception as e:
@@ -597,30 +731,37 @@ def trending(days, limit):
 @click.option("--limit", default=10, help="Number of items to show")
 def purchase_history(user_id, limit):
     """Get user's purchase history."""
-    console.print(Panel.fit(f"Purchase history for user {user_id}", style="blue"))
+    if not _valid_user_id(user_id):
+        return
+    _heading(f"Purchase history for user {user_id}")
     try:
+        from src.services.recommendation_service import recommendation_service
+
         results = recommendation_service.get_user_purchase_history(user_id, limit)
 
         if results:
-            table = Table(title=f"Purchase History - User {user_id}")
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("Quantity", style="yellow")
-            table.add_column("Purchase Date", style="blue")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["product_id"],
-                    result["name"][:25] + "..."
-                    if len(result["name"]) > 25
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"], 25),
+                    _money(result["price"]),
                     str(result["quantity"]),
                     result["purchase_date"],
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Purchase History - User {user_id}",
+                [
+                    ("Product ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("Quantity", "yellow"),
+                    ("Purchase Date", "blue"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No purchase history found.", style="yellow")
     except Exception as e:
@@ -632,75 +773,121 @@ def purchase_history(user_id, limit):
 @click.option("--limit", default=5, help="Number of recommendations")
 def also_bought(product_id, limit):
     """Get 'users who bought this also bought' recommendations."""
-    console.print(Panel.fit(f"Users who bought {product_id} also bought", style="blue"))
+    _heading(f"Users who bought {product_id} also bought")
     try:
+        from src.services.recommendation_service import recommendation_service
+
         results = recommendation_service.get_also_bought_recommendations(product_id, limit)
 
         if results:
-            table = Table(title=f"Also Bought - {product_id}")
-            table.add_column("Product ID", style="cyan")
-            table.add_column("Name", style="magenta")
-            table.add_column("Price", style="green")
-            table.add_column("User Count", style="yellow")
-
-            for result in results:
-                table.add_row(
+            rows = [
+                (
                     result["product_id"],
-                    result["name"][:30] + "..."
-                    if len(result["name"]) > 30
-                    else result["name"],
-                    f"${result['price']:.2f}",
+                    _truncate(result["name"]),
+                    _money(result["price"]),
                     str(result["user_count"]),
                 )
-
-            console.print(table)
+                for result in results
+            ]
+            _render_results(
+                f"Also Bought - {product_id}",
+                [
+                    ("Product ID", "cyan"),
+                    ("Name", "magenta"),
+                    ("Price", "green"),
+                    ("User Count", "yellow"),
+                ],
+                rows,
+                limit,
+            )
         else:
             console.print("No 'also bought' recommendations found.", style="yellow")
     except Exception as e:
         console.print(f"❌ Error getting 'also bought' recommendations: {e}", style="red")
 
 
-@cli.command()
-def status():
-    """Show system status."""
-    console.print(Panel.fit("System Status", style="blue"))
+def _check_postgres():
+    from src.db.postgres_client import db
 
-    # Check database connections
-    try:
-        from src.db.postgres_client import db
+    with db.get_cursor() as cursor:
+        # Planner estimate from the catalog; avoids a full scan of products
+        cursor.execute(
+            "SELECT GREATEST(reltuples, 0)::bigint as count FROM pg_class "
+            "WHERE oid = 'products'::regclass"
+        )
+        product_count = cursor.fetchone()["count"]
+    return f"✅ PostgreSQL: ~{product_count} products"
 
-        with db.get_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as count FROM products")
-            product_count = cursor.fetchone()["count"]
-        console.print(f"✅ PostgreSQL: {product_count} products", style="green")
-    except Exception as e:
-        console.print(f"❌ PostgreSQL: {e}", style="red")
 
-    try:
-        from src.db.mongodb_client import mongo_client
+def _check_mongo():
+    from src.db.mongodb_client import mongo_client
 
-        review_count = mongo_client.get_collection("reviews").count_documents({})
-        console.print(f"✅ MongoDB: {review_count} reviews", style="green")
-    except Exception as e:
-        console.print(f"❌ MongoDB: {e}", style="red")
+    # Collection metadata count; no scan needed for a liveness check
+    review_count = mongo_client.get_collection("reviews").estimated_document_count()
+    return f"✅ MongoDB: ~{review_count} reviews"
 
-    try:
-        from src.db.neo4j_client import neo4j_client
 
-        with neo4j_client.driver.session() as session:
-            result = session.run("MATCH (p:Product) RETURN count(p) as count")
-            product_count = result.single()["count"]
-        console.print(f"✅ Neo4j: {product_count} product nodes", style="green")
-    except Exception as e:
-        console.print(f"❌ Neo4j: {e}", style="red")
+def _check_neo4j():
+    from src.config import NEO4J_CONFIG
+    from src.db.neo4j_client import neo4j_client
 
-    try:
-        from src.db.redis_client import redis_client
+    with neo4j_client.driver.session(database=NEO4J_CONFIG.database) as session:
+        result = session.run("MATCH (p:Product) RETURN count(p) as count")
+        product_count = result.single()["count"]
+    return f"✅ Neo4j: {product_count} product nodes"
+
+
+def _check_redis():
+    from src.db.redis_client import redis_client
+
+    redis_client.client.ping()
+    return "✅ Redis: Connected"
+
+
+STATUS_CHECKS = {
+    "PostgreSQL": _check_postgres,
+    "MongoDB": _check_mongo,
+    "Neo4j": _check_neo4j,
+    "Redis": _check_redis,
+}
+# Seconds the status command waits for the checks before reporting the
+# unfinished ones as timed out
+STATUS_CHECK_TIMEOUT = 10
 
-        redis_client.client.ping()
-        console.print("✅ Redis: Connected", style="green")
+
+def _run_check(name, check):
+    """Run one status check, returning its message and style."""
+    try:
+        return check(), "green"
     except Exception as e:
-        console.print(f"❌ Redis: {e}", style="red")
+        return f"❌ {name}: {e}", "red"
+
+
+@cli.command()
+def status():
+    """Show system status."""
+    _heading("System Status")
+
+    # The checks are independent round-trips, so run them concurrently and
+    # print the results in a fixed order. Daemon threads, not an executor:
+    # a hung backend must not keep the command from returning or exiting.
+    results = {}
+
+    def run(name, check):
+        results[name] = _run_check(name, check)
+
+    threads = {
+        name: threading.Thread(target=run, args=(name, check), daemon=True)
+        for name, check in STATUS_CHECKS.items()
+    }
+    for thread in threads.values():
+        thread.start()
+
+    deadline = time.monotonic() + STATUS_CHECK_TIMEOUT
+    for name, thread in threads.items():
+        thread.join(max(0.0, deadline - time.monotonic()))
+        message, style = results.get(name, (f"❌ {name}: timed out", "red"))
+        console.print(message, style=style)
 
 
 def main():
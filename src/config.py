@@ -1,8 +1,8 @@
 """Configuration management for ArtisanMarket."""
 
 import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TypedDict
 
 from dotenv import load_dotenv
 
@@ -14,62 +14,126 @@ BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "raw_data"
 
 
-class PostgresConfig(TypedDict):
+def _int_env(key: str, default: int) -> int:
+    """Read an integer setting, using the default when unset or empty."""
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+
+@dataclass(frozen=True, slots=True)
+class PostgresConfig:
     host: str
     port: int
     database: str
     user: str
     password: str
+    min_pool_size: int
+    max_pool_size: int
 
 
-class MongoConfig(TypedDict):
+@dataclass(frozen=True, slots=True)
+class MongoConfig:
     uri: str
     database: str
+    max_pool_size: int
+    min_pool_size: int
 
 
-class RedisConfig(TypedDict):
+@dataclass(frozen=True, slots=True)
+class RedisConfig:
     host: str
     port: int
     db: int
     decode_responses: bool
 
 
-class Neo4jConfig(TypedDict):
+@dataclass(frozen=True, slots=True)
+class Neo4jConfig:
     uri: str
     user: str
     password: str
-
-
-# Database configurations
-POSTGRES_CONFIG: PostgresConfig = {
-    "host": os.getenv("POSTGRES_HOST", "localhost"),
-    "port": int(os.getenv("POSTGRES_PORT", 5432)),
-    "database": os.getenv("POSTGRES_DB", "artisan_market"),
-    "user": os.getenv("POSTGRES_USER", "postgres"),
-    "password": os.getenv("POSTGRES_PASSWORD", "password"),
-}
-
-MONGO_CONFIG: MongoConfig = {
-    "uri": os.getenv("MONGO_URI", "mongodb://localhost:27017/"),
-    "database": os.getenv("MONGO_DB", "artisan_market"),
-}
-
-REDIS_CONFIG: RedisConfig = {
-    "host": os.getenv("REDIS_HOST", "localhost"),
-    "port": int(os.getenv("REDIS_PORT", 6379)),
-    "db": int(os.getenv("REDIS_DB", 0)),
-    "decode_responses": True,
-}
-
-NEO4J_CONFIG: Neo4jConfig = {
-    "uri": os.getenv("NEO_URI", "bolt://localhost:7687"),
-    "user": os.getenv("NEO_USER", "neo4j"),
-    "password": os.getenv("NEO_PASSWORD", "password"),
-}
+    database: str
+    max_pool_size: int
+    acquisition_timeout: int
+    max_connection_lifetime: int
+    max_transaction_retry_time: int
+
+
+# Database configurations (immutable once loaded)
+POSTGRES_CONFIG = PostgresConfig(
+    host=os.getenv("POSTGRES_HOST", "localhost"),
+    port=_int_env("POSTGRES_PORT", 5432),
+    database=os.getenv("POSTGRES_DB", "artisan_market"),
+    user=os.getenv("POSTGRES_USER", "postgres"),
+    password=os.getenv("POSTGRES_PASSWORD", "password"),
+    min_pool_size=_int_env("POSTGRES_MIN_POOL", 1),
+    max_pool_size=_int_env("POSTGRES_MAX_POOL", 16),
+)
+
+MONGO_CONFIG = MongoConfig(
+    uri=os.getenv("MONGO_URI", "mongodb://localhost:27017/"),
+    database=os.getenv("MONGO_DB", "artisan_market"),
+    max_pool_size=_int_env("MONGO_MAX_POOL", 100),
+    min_pool_size=_int_env("MONGO_MIN_POOL", 10),
+)
+
+REDIS_CONFIG = RedisConfig(
+    host=os.getenv("REDIS_HOST", "localhost"),
+    port=_int_env("REDIS_PORT", 6379),
+    db=_int_env("REDIS_DB", 0),
+    decode_responses=True,
+)
+
+NEO4J_CONFIG = Neo4jConfig(
+    uri=os.getenv("NEO_URI", "bolt://localhost:7687"),
+    user=os.getenv("NEO_USER", "neo4j"),
+    password=os.getenv("NEO_PASSWORD", "password"),
+    database=os.getenv("NEO_DATABASE", "neo4j"),
+    max_pool_size=_int_env("NEO_MAX_POOL", 100),
+    acquisition_timeout=_int_env("NEO_ACQUISITION_TIMEOUT", 60),
+    max_connection_lifetime=_int_env("NEO_MAX_CONNECTION_LIFETIME", 3600),
+    # Managed transactions retry transient errors for this long (driver
+    # default 30s); short so reads fail fast when the server is down
+    max_transaction_retry_time=_int_env("NEO_MAX_RETRY_TIME", 3),
+)
 
 # Cache settings
 CACHE_TTL: int = 3600  # 1 hour
 CART_TTL: int = 86400  # 24 hours
+CART_TOTAL_TTL: int = 30  # priced cart view, dropped on any cart change
+SEMANTIC_CACHE_TTL: int = 600  # 10 minutes
+RECOMMENDATIONS_TTL: int = 300  # 5 minutes, dropped early on a new purchase
+ORDER_STATS_TTL: int = 60  # order analytics/statistics, dropped on order changes
+PRODUCT_STOCK_TTL: int = 300  # Redis stock mirror, reloaded from PostgreSQL after
+SEMANTIC_CACHE_SIZE: int = 100  # recent query embeddings kept for matching
+QUERY_EMBEDDING_CACHE_SIZE: int = 4096  # in-process LRU of encoded queries
+SEMANTIC_CACHE_THRESHOLD: float = 0.95  # min cosine similarity for a hit
+# PCA keeps the dominant directions and drops the low-variance tail where
+# near-duplicate queries still differ, so projected cosines run higher than
+# full ones; the hit threshold is raised to keep hits as strict.
+SEMANTIC_CACHE_PROJECTED_THRESHOLD: float = 0.97
+SEMANTIC_CACHE_PCA_DIM: int = 128  # projected size of cached query embeddings
+# Embeddings needed to fit the projection; a smaller corpus cannot support
+# SEMANTIC_CACHE_PCA_DIM components, and the cache then keeps full embeddings
+SEMANTIC_CACHE_PCA_MIN_SAMPLES: int = 1000
+SEMANTIC_CACHE_PCA_PATH = DATA_DIR / "semantic_cache_pca.npz"
+SIMILAR_PRODUCTS_TTL: int = 604800  # 7 days, refreshed by the graph loader
+
+# Vector search
+HNSW_M: int = 16  # graph links per node in the HNSW index
+HNSW_EF_CONSTRUCTION: int = 64  # candidate list size while building the index
+HNSW_EF_SEARCH: int = 64  # candidate list size per query (recall vs speed)
+TORCH_THREADS = _int_env("TORCH_THREADS", os.cpu_count() or 1)  # CPU encode threads
+# "torch" or "onnx" (ONNX Runtime, needs the onnx extra)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Export loaded by the onnx backend: the int8 (AVX-512 VNNI) build shipped
+# with all-MiniLM-L6-v2; use onnx/model.onnx for the fp32 graph
+EMBEDDING_ONNX_FILE = os.getenv(
+    "EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx"
+)
+EMBEDDING_MODEL_KWARGS = (
+    {"file_name": EMBEDDING_ONNX_FILE} if EMBEDDING_BACKEND == "onnx" else {}
+)
 
 # Rate limiting
 RATE_LIMIT_REQUESTS: int = 100
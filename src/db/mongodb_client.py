@@ -1,32 +1,95 @@
 """MongoDB connection and utilities."""
 
-from pymongo import MongoClient
+import functools
+import itertools
+from contextlib import suppress
+from typing import Iterable
+
+from pymongo import ASCENDING, IndexModel, MongoClient
 from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from pymongo.write_concern import WriteConcern
 
 from src.config import MONGO_CONFIG
 
 
 class MongoDBClient:
     def __init__(self):
-        self.client = MongoClient(MONGO_CONFIG["uri"])
-        self.db: Database = self.client[MONGO_CONFIG["database"]]
+        # Keep a warm pool and compress the wire protocol (zstd needs
+        # pymongo[zstd]; unavailable compressors are skipped)
+        self.client = MongoClient(
+            MONGO_CONFIG.uri,
+            maxPoolSize=MONGO_CONFIG.max_pool_size,
+            minPoolSize=MONGO_CONFIG.min_pool_size,
+            compressors="zstd,snappy,zlib",
+            retryWrites=True,
+            serverSelectionTimeoutMS=5000,
+        )
+        self.db: Database = self.client[MONGO_CONFIG.database]
 
     def get_collection(self, name: str):
         """Get a MongoDB collection."""
         return self.db[name]
 
+    def bulk_insert(
+        self,
+        name: str,
+        docs: Iterable[dict],
+        batch_size: int = 1000,
+        acknowledged: bool = True,
+    ) -> int:
+        """Insert documents in unordered batches; returns the number inserted."""
+        collection = self.get_collection(name)
+        if not acknowledged:
+            # Fire-and-forget (w=0) for re-runnable loads; the option only
+            # applies to this collection handle, not the shared database
+            collection = collection.with_options(write_concern=WriteConcern(w=0))
+        docs = iter(docs)
+        inserted = 0
+        while batch := list(itertools.islice(docs, batch_size)):
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+        return inserted
+
+    def bulk_write(self, name: str, operations: Iterable, ordered: bool = False):
+        """Send InsertOne/UpdateOne/... operations to a collection in one call."""
+        operations = list(operations)
+        if not operations:
+            return None
+        return self.get_collection(name).bulk_write(operations, ordered=ordered)
+
     def create_indexes(self):
-        """Create necessary indexes."""
-        # Reviews: index on product_id, user_id
-        self.db["reviews"].create_index("product_id")
-        self.db["reviews"].create_index("user_id")
-        # Product specs: index on product_id
-        self.db["product_specs"].create_index("product_id")
-        # Seller profiles: index on seller_id
-        self.db["seller_profiles"].create_index("seller_id")
-        # User preferences: index on user_id
-        self.db["user_preferences"].create_index("user_id")
+        """Create necessary indexes, one command per collection."""
+        indexes = {
+            # Compound index also serves product_id-only lookups (prefix)
+            "reviews": [
+                IndexModel([("product_id", ASCENDING), ("user_id", ASCENDING)]),
+            ],
+            "product_specs": [IndexModel([("product_id", ASCENDING)])],
+            "seller_profiles": [IndexModel([("seller_id", ASCENDING)])],
+            "user_preferences": [IndexModel([("user_id", ASCENDING)])],
+        }
+        for collection, models in indexes.items():
+            self.db[collection].create_indexes(models)
+
+        # Single-field review indexes from earlier versions are now redundant
+        for name in ("product_id_1", "user_id_1"):
+            with suppress(OperationFailure):
+                self.db["reviews"].drop_index(name)
+
+
+@functools.lru_cache(maxsize=1)
+def get_mongo_client() -> MongoDBClient:
+    """Return the shared client, creating it on first use."""
+    return MongoDBClient()
+
+
+class _LazyMongoDBClient:
+    """Proxy that defers connecting to MongoDB until the client is used."""
+
+    def __getattr__(self, name):
+        return getattr(get_mongo_client(), name)
 
 
 # Singleton instance
-mongo_client = MongoDBClient()
+mongo_client = _LazyMongoDBClient()
@@ -1,22 +1,42 @@
 """Neo4j connection and utilities."""
 
+import json
+from contextlib import suppress
+
 from neo4j import GraphDatabase
 
-from src.config import NEO4J_CONFIG
+from src.config import NEO4J_CONFIG, RECOMMENDATIONS_TTL
+from src.db.redis_client import redis_client
+from src.utils.cache import user_recommendations_cache
 
 
 class Neo4jClient:
     def __init__(self):
+        # One bounded pool shared by every caller: connections are reused
+        # rather than re-handshaked, and bursts wait for a free connection
         self.driver = GraphDatabase.driver(
-            NEO4J_CONFIG["uri"], auth=(NEO4J_CONFIG["user"], NEO4J_CONFIG["password"])
+            NEO4J_CONFIG.uri,
+            auth=(NEO4J_CONFIG.user, NEO4J_CONFIG.password),
+            max_connection_pool_size=NEO4J_CONFIG.max_pool_size,
+            connection_acquisition_timeout=NEO4J_CONFIG.acquisition_timeout,
+            max_connection_lifetime=NEO4J_CONFIG.max_connection_lifetime,
+            max_transaction_retry_time=NEO4J_CONFIG.max_transaction_retry_time,
         )
 
     def close(self):
         self.driver.close()
 
+    def ping(self) -> bool:
+        """Check the server is reachable through the driver's pool."""
+        try:
+            self.driver.verify_connectivity()
+        except Exception:
+            return False
+        return True
+
     def create_constraints(self):
         """Create uniqueness constraints."""
-        with self.driver.session() as session:
+        with self.driver.session(database=NEO4J_CONFIG.database) as session:
             # User constraint
             session.run(
                 "CREATE CONSTRAINT user_id IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE"
@@ -25,30 +45,107 @@ class Neo4jClient:
             session.run(
                 "CREATE CONSTRAINT product_id IF NOT EXISTS FOR (p:Product) REQUIRE p.id IS UNIQUE"
             )
-            # TODO: Add more constraints
+            # Category, seller and tag nodes are matched by key when the
+            # loader links products to them
+            session.run(
+                "CREATE CONSTRAINT category_id IF NOT EXISTS FOR (c:Category) REQUIRE c.id IS UNIQUE"
+            )
+            session.run(
+                "CREATE CONSTRAINT seller_id IF NOT EXISTS FOR (s:Seller) REQUIRE s.id IS UNIQUE"
+            )
+            session.run(
+                "CREATE CONSTRAINT tag_name IF NOT EXISTS FOR (t:Tag) REQUIRE t.name IS UNIQUE"
+            )
 
     def add_purchase(self, user_id: str, product_id: str, quantity: int, date: str):
         """Add a purchase relationship."""
-        with self.driver.session() as session:
+        self.add_purchases(
+            [
+                {
+                    "user_id": user_id,
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "date": date,
+                }
+            ]
+        )
+
+    def add_purchases(self, purchases: list[dict]):
+        """Add purchase relationships in one statement.
+
+        Each purchase is a dict with user_id, product_id, quantity and date.
+        """
+        if not purchases:
+            return
+
+        with self.driver.session(database=NEO4J_CONFIG.database) as session:
             session.run(
                 """
-                MATCH (u:User {id: $user_id}), (p:Product {id: $product_id})
-                MERGE (u)-[r:PURCHASED {date: $date}]->(p)
-                ON CREATE SET r.quantity = $quantity
-                ON MATCH SET r.quantity = r.quantity + $quantity
+                UNWIND $purchases AS row
+                MATCH (u:User {id: row.user_id}), (p:Product {id: row.product_id})
+                MERGE (u)-[r:PURCHASED {date: row.date}]->(p)
+                ON CREATE SET r.quantity = row.quantity
+                ON MATCH SET r.quantity = r.quantity + row.quantity
+                SET r.updated_at = datetime()
                 """,
-                user_id=user_id,
-                product_id=product_id,
-                quantity=quantity,
-                date=date,
+                purchases=purchases,
+            )
+
+        # Cached recommendations are now stale: the buyers' own in Redis, and
+        # every user's memoized in-process, since neighbours may have changed
+        user_recommendations_cache.clear()
+        with suppress(Exception):
+            redis_client.client.delete(
+                *{f"reco:{purchase['user_id']}" for purchase in purchases}
             )
 
+    def refresh_co_purchases(self):
+        """Materialise CO_PURCHASED edges scoring how often products sell together.
+
+        Each edge's ``score`` is the number of distinct users who bought both
+        products, so repeat purchases on different dates count once. The first
+        run scores every product; later runs only rescore products purchased
+        since the previous run. APOC commits the work in batches so no single
+        transaction holds the whole graph.
+        """
+        with self.driver.session(database=NEO4J_CONFIG.database) as session:
+            session.run(
+                """
+                MERGE (job:Job {name: 'co_purchased'})
+                WITH job, job.last_computed AS since, datetime() AS started
+                CALL apoc.periodic.iterate(
+                    'MATCH (:User)-[r:PURCHASED]->(p:Product)
+                     WHERE $since IS NULL OR r.updated_at >= $since
+                     RETURN DISTINCT p',
+                    'MATCH (p)<-[:PURCHASED]-(u:User)-[:PURCHASED]->(o:Product)
+                     WHERE o <> p
+                     WITH p, o, count(DISTINCT u) AS buyers
+                     MERGE (p)-[r:CO_PURCHASED]-(o)
+                     SET r.score = buyers',
+                    {batchSize: 1000, parallel: false, params: {since: since}}
+                ) YIELD batches
+                SET job.last_computed = started
+                """
+            ).consume()
+
     def get_recommendations(self, user_id: str, limit: int = 5) -> list[dict]:
-        """Get product recommendations for a user (frequently bought together)."""
-        with self.driver.session() as session:
+        """Get product recommendations for a user (frequently bought together).
+
+        Results are cached in Redis as one hash per user, keyed by limit, so a
+        purchase can invalidate every cached limit with a single DEL.
+        """
+        cache_key = f"reco:{user_id}"
+        with suppress(Exception):
+            cached = redis_client.client.hget(cache_key, limit)
+            if cached:
+                return json.loads(cached)
+
+        with self.driver.session(database=NEO4J_CONFIG.database) as session:
             result = session.run(
                 """
-                MATCH (u:User {id: $user_id})-[:PURCHASED]->(p:Product)<-[:PURCHASED]-(other:User)-[:PURCHASED]->(rec:Product)
+                MATCH (u:User {id: $user_id})
+                USING INDEX u:User(id)
+                MATCH (u)-[:PURCHASED]->(p:Product)<-[:PURCHASED]-(other:User)-[:PURCHASED]->(rec:Product)
                 WHERE NOT (u)-[:PURCHASED]->(rec)
                 RETURN rec.id AS product_id, rec.name AS name, count(*) AS freq
                 ORDER BY freq DESC
@@ -57,7 +154,14 @@ class Neo4jClient:
                 user_id=user_id,
                 limit=limit,
             )
-            return [record.data() for record in result]
+            recommendations = [record.data() for record in result]
+
+        with suppress(Exception):
+            with redis_client.pipeline() as pipe:
+                pipe.hset(cache_key, limit, json.dumps(recommendations))
+                pipe.expire(cache_key, RECOMMENDATIONS_TTL)
+
+        return recommendations
 
 
 # Singleton instance
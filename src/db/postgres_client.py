@@ -1,9 +1,12 @@
 """PostgreSQL connection and utilities."""
 
+import threading
+import weakref
 from contextlib import contextmanager
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -11,23 +14,72 @@ from src.config import POSTGRES_CONFIG
 
 Base = declarative_base()
 
+# Databases created before embeddings moved to halfvec still hold
+# vector(384); convert them in place. The old vector_cosine_ops index cannot
+# follow the new type, so it is dropped first and rebuilt by the loader.
+CONVERT_EMBEDDINGS_TO_HALFVEC = """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'product_embeddings'
+              AND column_name = 'description_embedding'
+              AND udt_name = 'vector'
+        ) THEN
+            DROP INDEX IF EXISTS idx_product_embeddings_ivfflat;
+            ALTER TABLE product_embeddings
+                ALTER COLUMN description_embedding TYPE halfvec(384)
+                USING description_embedding::halfvec(384);
+        END IF;
+    END $$;
+"""
+
 
 class PostgresConnection:
     def __init__(self):
         self.config = POSTGRES_CONFIG
         self._engine = None
         self._session_factory = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Names of the statements already prepared on each pooled connection
+        self._prepared = weakref.WeakKeyDictionary()
+        # Pooled connections that already know the pgvector types
+        self._vector_registered = weakref.WeakSet()
 
     @property
     def engine(self):
         if not self._engine:
             db_url = (
-                f"postgresql://{self.config['user']}:{self.config['password']}@"
-                f"{self.config['host']}:{self.config['port']}/{self.config['database']}"
+                f"postgresql://{self.config.user}:{self.config.password}@"
+                f"{self.config.host}:{self.config.port}/{self.config.database}"
+            )
+            self._engine = create_engine(
+                db_url,
+                pool_size=10,
+                max_overflow=20,
+                pool_use_lifo=True,
+                pool_pre_ping=True,
             )
-            self._engine = create_engine(db_url)
         return self._engine
 
+    @property
+    def pool(self) -> ThreadedConnectionPool:
+        """Connection pool shared by get_cursor, created on first use."""
+        with self._pool_lock:
+            if not self._pool:
+                self._pool = ThreadedConnectionPool(
+                    self.config.min_pool_size,
+                    self.config.max_pool_size,
+                    host=self.config.host,
+                    port=self.config.port,
+                    database=self.config.database,
+                    user=self.config.user,
+                    password=self.config.password,
+                )
+        return self._pool
+
     @property
     def session_factory(self):
         if not self._session_factory:
@@ -37,7 +89,9 @@ class PostgresConnection:
     @contextmanager
     def get_cursor(self):
         """Get a database cursor for raw SQL queries."""
-        conn = psycopg2.connect(**self.config)
+        conn = self.pool.getconn()
+        if conn not in self._vector_registered:
+            self._register_vector(conn)
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 yield cursor
@@ -46,7 +100,37 @@ class PostgresConnection:
             conn.rollback()
             raise e
         finally:
-            conn.close()
+            # Broken connections are discarded rather than handed out again
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    def _register_vector(self, conn):
+        """Adapt numpy arrays to pgvector types on a pooled connection.
+
+        Embeddings are then passed as ndarrays and serialised by pgvector,
+        rather than built into Python lists and sent as float arrays.
+        """
+        from pgvector.psycopg2 import register_vector
+
+        try:
+            register_vector(conn)
+        except psycopg2.ProgrammingError:
+            # The extension is enabled by create_tables; retry on next use
+            return
+        self._vector_registered.add(conn)
+
+    def execute_prepared(self, cursor, name: str, query: str, params: tuple):
+        """Run a query as a server-side prepared statement.
+
+        ``query`` uses ``$1, $2, ...`` placeholders. It is prepared the first
+        time ``name`` runs on the cursor's connection and executed by name
+        afterwards, so the server skips parsing and planning.
+        """
+        prepared = self._prepared.setdefault(cursor.connection, set())
+        if name not in prepared:
+            cursor.execute(f"PREPARE {name} AS {query}")
+            prepared.add(name)
+        args = f" ({', '.join(['%s'] * len(params))})" if params else ""
+        cursor.execute(f"EXECUTE {name}{args}", params)
 
     def create_tables(self):
         """Create all tables in the database."""
@@ -100,14 +184,30 @@ class PostgresConnection:
                     stock INT
                 );
             """)
+
+            # Full-text search document, kept in sync by Postgres and indexed
+            # so text search avoids scanning every description
+            cursor.execute("""
+                ALTER TABLE products ADD COLUMN IF NOT EXISTS fts tsvector
+                    GENERATED ALWAYS AS (
+                        to_tsvector(
+                            'english',
+                            coalesce(name, '') || ' ' || coalesce(description, '')
+                            || ' ' || coalesce(tags, '')
+                        )
+                    ) STORED;
+                CREATE INDEX IF NOT EXISTS idx_products_fts
+                    ON products USING GIN (fts);
+            """)
             # Product Embeddings (only create if pgvector is available)
             try:
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS product_embeddings (
                         product_id VARCHAR(10) PRIMARY KEY REFERENCES products(id),
-                        description_embedding vector(384)
+                        description_embedding halfvec(384)
                     );
                 """)
+                cursor.execute(CONVERT_EMBEDDINGS_TO_HALFVEC)
             except Exception as e:
                 print(f"Warning: Could not create product_embeddings table: {e}")
                 print("Vector search functionality will not be available.")
@@ -135,6 +235,32 @@ class PostgresConnection:
                 );
             """)
 
+            # Indexes on foreign-key columns; Postgres only indexes the
+            # referenced side. Orders are listed per user, newest first.
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_products_category
+                    ON products(category_id);
+                CREATE INDEX IF NOT EXISTS idx_products_seller
+                    ON products(seller_id);
+                CREATE INDEX IF NOT EXISTS idx_orders_user_date
+                    ON orders(user_id, order_date DESC);
+                CREATE INDEX IF NOT EXISTS idx_order_items_order_product
+                    ON order_items(order_id, product_id);
+                CREATE INDEX IF NOT EXISTS idx_order_items_product
+                    ON order_items(product_id);
+            """)
+
+            # Per-user statistics only read completed orders; the partial
+            # index answers them from the index alone. Analytics trends scan
+            # recent dates, which a tiny BRIN index narrows to a few blocks.
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_orders_user_completed
+                    ON orders(user_id, order_date) INCLUDE (total_amount)
+                    WHERE status = 'completed';
+                CREATE INDEX IF NOT EXISTS idx_orders_date_brin
+                    ON orders USING BRIN (order_date);
+            """)
+
 
 # Singleton instance
 db = PostgresConnection()
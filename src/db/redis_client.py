@@ -1,33 +1,185 @@
 """Redis connection and utilities."""
 
-import json
-from typing import Any
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Any, Iterable
 
+import orjson
 import redis
 
-from src.config import CACHE_TTL, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, REDIS_CONFIG
+from src.config import (
+    CACHE_TTL,
+    PRODUCT_STOCK_TTL,
+    RATE_LIMIT_REQUESTS,
+    RATE_LIMIT_WINDOW,
+    REDIS_CONFIG,
+    SIMILAR_PRODUCTS_TTL,
+)
+
+SIMILAR_PRODUCTS_INFO = "sim:products"
+PRODUCT_STOCK_PREFIX = "stock:"
+
+# KEYS: cart, cached cart total, then each item's stock mirror key;
+# ARGV: cart ttl, then each item's product id and quantity.
+# Items are added in order. Each returns 1 when added, 0 when the cart would
+# then hold more than the mirrored stock (the add is undone) and -1 when the
+# product's stock is not mirrored.
+ADD_IF_IN_STOCK = """
+local results = {}
+local added = false
+for i = 3, #KEYS do
+    local product = ARGV[2 * i - 4]
+    local quantity = tonumber(ARGV[2 * i - 3])
+    local stock = redis.call('GET', KEYS[i])
+    if not stock then
+        results[#results + 1] = -1
+    else
+        local in_cart = redis.call('HINCRBY', KEYS[1], product, quantity)
+        if in_cart > tonumber(stock) then
+            if in_cart == quantity then
+                redis.call('HDEL', KEYS[1], product)
+            else
+                redis.call('HINCRBY', KEYS[1], product, -quantity)
+            end
+            results[#results + 1] = 0
+        else
+            added = true
+            results[#results + 1] = 1
+        end
+    end
+end
+if added then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    redis.call('DEL', KEYS[2])
+end
+return results
+"""
+
+# Datetimes and numpy values serialise natively, so cached documents and
+# embeddings need no custom encoder
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
 
 
 class RedisClient:
     def __init__(self):
-        self.client = redis.Redis(**REDIS_CONFIG)
+        self.client = redis.Redis(**asdict(REDIS_CONFIG))
+        # Loaded with EVALSHA on first use, no round trip here
+        self._add_if_in_stock = self.client.register_script(ADD_IF_IN_STOCK)
 
     def get_json(self, key: str) -> Any | None:
         """Get JSON data from Redis."""
         data = self.client.get(key)
-        return json.loads(data) if data else None
+        return orjson.loads(data) if data else None
 
     def set_json(self, key: str, value: Any, ttl: int = CACHE_TTL) -> bool:
         """Set JSON data in Redis with TTL."""
-        return self.client.setex(key, ttl, json.dumps(value))
+        return self.client.setex(key, ttl, orjson.dumps(value, option=JSON_OPTIONS))
+
+    @contextmanager
+    def pipeline(self):
+        """Queue commands on a non-transactional pipeline, sent in one round trip."""
+        pipe = self.client.pipeline(transaction=False)
+        yield pipe
+        pipe.execute()
+
+    def bulk_set_json(self, items: dict[str, Any], ttl: int = CACHE_TTL):
+        """Set many JSON values with TTL in one round trip."""
+        with self.pipeline() as pipe:
+            for key, value in items.items():
+                pipe.setex(key, ttl, orjson.dumps(value, option=JSON_OPTIONS))
 
     def add_to_cart(self, user_id: str, product_id: str, quantity: int):
         """Add item to user's cart."""
+        self.add_items_to_cart(user_id, [(product_id, quantity)])
+
+    def add_items_to_cart(self, user_id: str, items: Iterable[tuple[str, int]]):
+        """Add (product_id, quantity) items to user's cart in one round trip."""
         cart_key = f"cart:{user_id}"
-        # Increment or set product quantity
-        self.client.hincrby(cart_key, product_id, quantity)
-        # Set TTL for cart
-        self.client.expire(cart_key, CACHE_TTL)
+        with self.pipeline() as pipe:
+            # Increment or set product quantities
+            for product_id, quantity in items:
+                pipe.hincrby(cart_key, product_id, quantity)
+            # Set TTL for cart
+            pipe.expire(cart_key, CACHE_TTL)
+
+    def add_to_cart_if_in_stock(
+        self, user_id: str, product_id: str, quantity: int, ttl: int
+    ) -> int:
+        """Check mirrored stock and add to the cart atomically in one round trip.
+
+        Returns 1 if added, 0 if the cart would hold more than the stock and
+        -1 if the product's stock is not mirrored.
+        """
+        return self.add_items_to_cart_if_in_stock(
+            user_id, [(product_id, quantity)], ttl
+        )[0]
+
+    def add_items_to_cart_if_in_stock(
+        self, user_id: str, items: list[tuple[str, int]], ttl: int
+    ) -> list[int]:
+        """Add (product_id, quantity) items that fit the mirrored stock, atomically.
+
+        The quantity already in the cart counts against the stock. Returns one
+        result per item, as for ``add_to_cart_if_in_stock``.
+        """
+        keys = [f"cart:{user_id}", f"cart_total:{user_id}"]
+        args: list = [ttl]
+        for product_id, quantity in items:
+            keys.append(f"{PRODUCT_STOCK_PREFIX}{product_id}")
+            args.extend([product_id, quantity])
+        return self._add_if_in_stock(keys=keys, args=args)
+
+    def set_product_stock(self, stock: dict[str, int]):
+        """Mirror product stock levels from PostgreSQL for PRODUCT_STOCK_TTL."""
+        with self.pipeline() as pipe:
+            for product_id, level in stock.items():
+                key = f"{PRODUCT_STOCK_PREFIX}{product_id}"
+                pipe.setex(key, PRODUCT_STOCK_TTL, level)
+
+    def clear_product_stock(self):
+        """Drop the stock mirror; it is refilled from PostgreSQL on demand."""
+        keys = list(
+            self.client.scan_iter(match=f"{PRODUCT_STOCK_PREFIX}*", count=1000)
+        )
+        for start in range(0, len(keys), 1000):
+            self.client.delete(*keys[start : start + 1000])
+
+    def set_similar_products(
+        self,
+        neighbours: dict[str, dict[str, float]],
+        products: dict[str, dict[str, Any]],
+        ttl: int = SIMILAR_PRODUCTS_TTL,
+    ):
+        """Store precomputed similar products as one sorted set per product."""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(SIMILAR_PRODUCTS_INFO)
+        pipe.hset(
+            SIMILAR_PRODUCTS_INFO,
+            mapping={pid: orjson.dumps(info) for pid, info in products.items()},
+        )
+        pipe.expire(SIMILAR_PRODUCTS_INFO, ttl)
+        for product_id, scores in neighbours.items():
+            key = f"sim:{product_id}"
+            pipe.delete(key)
+            if scores:
+                pipe.zadd(key, scores)
+                pipe.expire(key, ttl)
+        pipe.execute()
+
+    def get_similar_products(self, product_id: str, limit: int) -> list[dict]:
+        """Get precomputed similar products, best first; empty if not cached."""
+        neighbours = self.client.zrevrange(
+            f"sim:{product_id}", 0, limit - 1, withscores=True
+        )
+        if not neighbours:
+            return []
+
+        infos = self.client.hmget(SIMILAR_PRODUCTS_INFO, [pid for pid, _ in neighbours])
+        return [
+            {"product_id": pid, **orjson.loads(info), "similarity": score}
+            for (pid, score), info in zip(neighbours, infos)
+            if info
+        ]
 
     def rate_limit_check(self, user_id: str, endpoint: str) -> bool:
         """Check if user has exceeded rate limit."""
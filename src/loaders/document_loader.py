@@ -1,31 +1,47 @@
 """Load data into MongoDB collections."""
 
+import logging
 import random
 from datetime import datetime, timedelta
 from typing import List
 
+import numpy as np
+
 from src.db.mongodb_client import mongo_client
-from src.utils.data_parser import DataParser
+from src.utils.concurrency import run_concurrently
+from src.utils.data_parser import CachedDataParser
+
+logger = logging.getLogger(__name__)
 
 
 class DocumentLoader:
     def __init__(self):
         self.db = mongo_client
-        self.parser = DataParser()
+        self.parser = CachedDataParser()
 
     def load_reviews(self):
         """Load product reviews with nested comments."""
         products = self.parser.parse_products()
         users = self.parser.parse_users()
-        reviews_collection = self.db.get_collection("reviews")
+        reviews = []
 
-        # Generate realistic reviews for each product
-        for _, product in products.iterrows():
-            # Generate 1-5 reviews per product
-            num_reviews = random.randint(1, 5)
+        # Generate 1-5 reviews per product, drawing every reviewer up front
+        # rather than sampling the users frame once per review
+        review_counts = [random.randint(1, 5) for _ in range(len(products))]
+        total_reviews = sum(review_counts)
+        reviewers = iter(
+            users.sample(n=total_reviews, replace=True).to_dict("records")
+        )
 
+        # Draw per-review vote counts and purchase flags in one go
+        rng = np.random.default_rng()
+        helpful_votes = iter(rng.integers(0, 51, size=total_reviews).tolist())
+        verified = iter((rng.random(total_reviews) < 0.5).tolist())
+
+        # Generate realistic reviews for each product
+        for product, num_reviews in zip(products.to_dict("records"), review_counts):
             for _ in range(num_reviews):
-                user = users.sample(1).iloc[0]
+                user = next(reviewers)
 
                 # Generate review content based on product category
                 review_data = self._generate_review_content(product, user)
@@ -40,48 +56,76 @@ class DocumentLoader:
                     "title": review_data["title"],
                     "content": review_data["content"],
                     "images": review_data["images"],
-                    "helpful_votes": random.randint(0, 50),
-                    "verified_purchase": random.choice([True, False]),
+                    "helpful_votes": next(helpful_votes),
+                    "verified_purchase": next(verified),
                     "created_at": review_data["created_at"],
                     "comments": comments,
                 }
 
-                reviews_collection.insert_one(review_doc)
+                reviews.append(review_doc)
 
+        loaded = self._insert_unacknowledged("reviews", reviews)
         print(f"Loaded reviews for {len(products)} products")
+        return loaded
 
     def load_product_specs(self):
         """Load variable product specifications by category."""
         products = self.parser.parse_products()
-        specs_collection = self.db.get_collection("product_specs")
 
-        for _, product in products.iterrows():
-            specs_doc = self._generate_product_specs(product)
-            specs_collection.insert_one(specs_doc)
+        specs = [
+            self._generate_product_specs(product)
+            for product in products.to_dict("records")
+        ]
+        loaded = self._insert_unacknowledged("product_specs", specs)
 
         print(f"Loaded product specs for {len(products)} products")
+        return loaded
 
     def load_seller_profiles(self):
         """Load rich seller information with portfolio items."""
         sellers = self.parser.parse_sellers()
-        profiles_collection = self.db.get_collection("seller_profiles")
 
-        for _, seller in sellers.iterrows():
-            profile_doc = self._generate_seller_profile(seller)
-            profiles_collection.insert_one(profile_doc)
+        profiles = [
+            self._generate_seller_profile(seller)
+            for seller in sellers.to_dict("records")
+        ]
+        loaded = self._insert_unacknowledged("seller_profiles", profiles)
 
         print(f"Loaded seller profiles for {len(sellers)} sellers")
+        return loaded
 
     def load_user_preferences(self):
         """Load user behavior and preference tracking."""
         users = self.parser.parse_users()
-        preferences_collection = self.db.get_collection("user_preferences")
 
-        for _, user in users.iterrows():
-            preferences_doc = self._generate_user_preferences(user)
-            preferences_collection.insert_one(preferences_doc)
+        preferences = [
+            self._generate_user_preferences(user) for user in users.to_dict("records")
+        ]
+        loaded = self._insert_unacknowledged("user_preferences", preferences)
 
         print(f"Loaded user preferences for {len(users)} users")
+        return loaded
+
+    def _insert_unacknowledged(self, name: str, docs: List[dict]) -> bool:
+        """Insert docs without write acknowledgement and verify the count.
+
+        The w=0 batches return before the server has applied them, so the
+        collection is counted again with an acknowledged read afterwards.
+        Returns False and logs a warning when the count is short.
+        """
+        collection = self.db.get_collection(name)
+        expected = collection.estimated_document_count()
+        expected += self.db.bulk_insert(name, docs, acknowledged=False)
+        count = collection.estimated_document_count()
+        if count != expected:
+            logger.warning(
+                "%s holds %d documents after loading, expected %d",
+                name,
+                count,
+                expected,
+            )
+            return False
+        return True
 
     def _generate_review_content(self, product, user) -> dict:
         """Generate realistic review content based on product."""
@@ -124,14 +168,14 @@ class DocumentLoader:
         """Generate comments for reviews."""
         comments = []
         num_comments = random.randint(0, 3)
+        commenter_ids = users["ID"].sample(n=num_comments, replace=True)
 
-        for _ in range(num_comments):
-            user = users.sample(1).iloc[0]
+        for user_id in commenter_ids:
             comment_date = review_date + timedelta(days=random.randint(1, 30))
 
             comments.append(
                 {
-                    "user_id": user["ID"],
+                    "user_id": user_id,
                     "content": random.choice(
                         [
                             "I agree!",
@@ -238,19 +282,19 @@ class DocumentLoader:
         print("Creating indexes...")
         self.create_indexes()
 
-        print("Loading reviews...")
-        self.load_reviews()
-
-        print("Loading product specs...")
-        self.load_product_specs()
-
-        print("Loading seller profiles...")
-        self.load_seller_profiles()
-
-        print("Loading user preferences...")
-        self.load_user_preferences()
-
-        print("Document data loading complete!")
+        # Each collection is generated and written independently
+        print("Loading reviews, product specs, seller profiles and preferences...")
+        loaded = run_concurrently(
+            self.load_reviews,
+            self.load_product_specs,
+            self.load_seller_profiles,
+            self.load_user_preferences,
+        )
+
+        if all(loaded):
+            print("Document data loading complete!")
+        else:
+            print("Document data loading finished with missing documents")
 
 
 if __name__ == "__main__":
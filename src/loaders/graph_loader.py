@@ -1,13 +1,31 @@
 """Load data into Neo4j graph database."""
 
+from src.config import NEO4J_CONFIG
 from src.db.neo4j_client import neo4j_client
-from src.utils.data_parser import DataParser
+from src.db.redis_client import redis_client
+from src.utils.concurrency import run_concurrently
+from src.utils.data_parser import CachedDataParser
+
+
+# Rows sent per UNWIND statement, keeping each transaction's memory bounded
+BATCH_SIZE = 10000
 
 
 class GraphLoader:
     def __init__(self):
         self.client = neo4j_client
-        self.parser = DataParser()
+        self.parser = CachedDataParser()
+
+    def _run_batched(self, session, query: str, rows: list):
+        """Run an UNWIND $rows query over rows, one write transaction per batch."""
+        for start in range(0, len(rows), BATCH_SIZE):
+            session.execute_write(
+                self._write_rows, query, rows[start : start + BATCH_SIZE]
+            )
+
+    @staticmethod
+    def _write_rows(tx, query: str, rows: list):
+        tx.run(query, rows=rows).consume()
 
     def create_constraints(self):
         """Create uniqueness constraints for nodes."""
@@ -16,62 +34,62 @@ class GraphLoader:
     def load_categories(self):
         """Load category nodes."""
         categories = self.parser.parse_categories()
-
-        with self.client.driver.session() as session:
-            for _, category in categories.iterrows():
-                session.run(
-                    """
-                    MERGE (c:Category {id: $id})
-                    SET c.name = $name, c.description = $description
-                    """,
-                    id=category["ID"],
-                    name=category["NAME"],
-                    description=category["DESCRIPTION"],
-                )
+        rows = categories[["ID", "NAME", "DESCRIPTION"]].to_dict("records")
+
+        with self.client.driver.session(database=NEO4J_CONFIG.database) as session:
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS row
+                MERGE (c:Category {id: row.ID})
+                SET c.name = row.NAME, c.description = row.DESCRIPTION
+                """,
+                rows,
+            )
 
         print(f"Loaded {len(categories)} categories")
 
     def load_sellers(self):
         """Load seller nodes."""
         sellers = self.parser.parse_sellers()
-
-        with self.client.driver.session() as session:
-            for _, seller in sellers.iterrows():
-                session.run(
-                    """
-                    MERGE (s:Seller {id: $id})
-                    SET s.name = $name, s.specialty = $specialty, 
-                        s.rating = $rating, s.joined = $joined
-                    """,
-                    id=seller["ID"],
-                    name=seller["NAME"],
-                    specialty=seller["SPECIALTY"],
-                    rating=seller["RATING"],
-                    joined=seller["JOINED"],
-                )
+        rows = sellers[["ID", "NAME", "SPECIALTY", "RATING", "JOINED"]].to_dict(
+            "records"
+        )
+
+        with self.client.driver.session(database=NEO4J_CONFIG.database) as session:
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS row
+                MERGE (s:Seller {id: row.ID})
+                SET s.name = row.NAME, s.specialty = row.SPECIALTY,
+                    s.rating = row.RATING, s.joined = row.JOINED
+                """,
+                rows,
+            )
 
         print(f"Loaded {len(sellers)} sellers")
 
     def load_users(self):
         """Load user nodes."""
         users = self.parser.parse_users()
-
-        with self.client.driver.session() as session:
-            for _, user in users.iterrows():
-                session.run(
-                    """
-                    MERGE (u:User {id: $id})
-                    SET u.name = $name, u.email = $email, 
-                        u.join_date = $join_date, u.location = $location,
-                        u.interests = $interests
-                    """,
-                    id=user["ID"],
-                    name=user["NAME"],
-                    email=user["EMAIL"],
-                    join_date=user["JOIN_DATE"],
-                    location=user["LOCATION"],
-                    interests=",".join(user["INTERESTS"]),
-                )
+        users = users.assign(INTERESTS=users["INTERESTS"].str.join(","))
+        rows = users[
+            ["ID", "NAME", "EMAIL", "JOIN_DATE", "LOCATION", "INTERESTS"]
+        ].to_dict("records")
+
+        with self.client.driver.session(database=NEO4J_CONFIG.database) as session:
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS row
+                MERGE (u:User {id: row.ID})
+                SET u.name = row.NAME, u.email = row.EMAIL,
+                    u.join_date = row.JOIN_DATE, u.location = row.LOCATION,
+                    u.interests = row.INTERESTS
+                """,
+                rows,
+            )
 
         print(f"Loaded {len(users)} users")
 
@@ -80,106 +98,124 @@ class GraphLoader:
         products = self.parser.parse_products()
         categories = self.parser.parse_categories()
 
-        # Create category name to ID mapping
-        category_map = dict(zip(categories["NAME"], categories["ID"], strict=False))
-
-        with self.client.driver.session() as session:
-            for _, product in products.iterrows():
-                # Create product node
-                session.run(
-                    """
-                    MERGE (p:Product {id: $id})
-                    SET p.name = $name, p.price = $price, 
-                        p.description = $description, p.tags = $tags,
-                        p.stock = $stock
-                    """,
-                    id=product["ID"],
-                    name=product["NAME"],
-                    price=product["PRICE"],
-                    description=product["DESCRIPTION"],
-                    tags=",".join(product["TAGS"]),
-                    stock=product["STOCK"],
-                )
-
-                # Create BELONGS_TO relationship with category
-                category_name = product["CATEGORY"]
-                category_id = category_map.get(category_name)
-
-                if category_id:
-                    session.run(
-                        """
-                        MATCH (p:Product {id: $product_id})
-                        MATCH (c:Category {id: $category_id})
-                        MERGE (p)-[:BELONGS_TO]->(c)
-                        """,
-                        product_id=product["ID"],
-                        category_id=category_id,
-                    )
-
-                # Create SOLD_BY relationship with seller
-                session.run(
-                    """
-                    MATCH (p:Product {id: $product_id})
-                    MATCH (s:Seller {id: $seller_id})
-                    MERGE (p)-[:SOLD_BY]->(s)
-                    """,
-                    product_id=product["ID"],
-                    seller_id=product["SELLER_ID"],
-                )
+        # Resolve category names to ids with one left join; the tag list is
+        # kept for HAS_TAG and a joined copy is stored on the node
+        products = products.merge(
+            categories[["ID", "NAME"]].rename(
+                columns={"ID": "CATEGORY_ID", "NAME": "CATEGORY"}
+            ),
+            on="CATEGORY",
+            how="left",
+        ).assign(
+            TAG_LIST=lambda frame: frame["TAGS"],
+            TAGS=lambda frame: frame["TAGS"].str.join(","),
+        )
+        # Unknown categories become null so no BELONGS_TO is created
+        products["CATEGORY_ID"] = products["CATEGORY_ID"].astype(object)
+        products.loc[products["CATEGORY_ID"].isna(), "CATEGORY_ID"] = None
+
+        # Create product nodes with their category, seller and tag
+        # relationships in one statement per batch
+        with self.client.driver.session(database=NEO4J_CONFIG.database) as session:
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS row
+                MERGE (p:Product {id: row.ID})
+                SET p.name = row.NAME, p.price = row.PRICE,
+                    p.description = row.DESCRIPTION, p.tags = row.TAGS,
+                    p.stock = row.STOCK
+                WITH p, row
+                OPTIONAL MATCH (c:Category {id: row.CATEGORY_ID})
+                OPTIONAL MATCH (s:Seller {id: row.SELLER_ID})
+                FOREACH (_ IN CASE WHEN c IS NULL THEN [] ELSE [1] END |
+                    MERGE (p)-[:BELONGS_TO]->(c))
+                FOREACH (_ IN CASE WHEN s IS NULL THEN [] ELSE [1] END |
+                    MERGE (p)-[:SOLD_BY]->(s))
+                FOREACH (tag IN row.TAG_LIST |
+                    MERGE (t:Tag {name: tag})
+                    MERGE (p)-[:HAS_TAG]->(t))
+                """,
+                products[
+                    [
+                        "ID",
+                        "NAME",
+                        "PRICE",
+                        "DESCRIPTION",
+                        "TAGS",
+                        "STOCK",
+                        "CATEGORY_ID",
+                        "SELLER_ID",
+                        "TAG_LIST",
+                    ]
+                ].to_dict("records"),
+            )
 
         print(f"Loaded {len(products)} products with relationships")
 
     def create_similar_product_relationships(self):
-        """Create SIMILAR_TO relationships between products based on tags."""
+        """Create SIMILAR_TO relationships between products based on tags.
+
+        Pairs are found through shared Tag nodes, so only products with a tag
+        in common are compared. The score is the Jaccard index of the two tag
+        sets and at least two common tags are required.
+        """
         products = self.parser.parse_products()
+        neighbours = {product_id: {} for product_id in products["ID"]}
 
-        with self.client.driver.session() as session:
-            # Find products with similar tags and create relationships
-            for _, product in products.iterrows():
-                product_tags = set(product["TAGS"])
-
-                # Find other products with overlapping tags
-                for _, other_product in products.iterrows():
-                    if product["ID"] == other_product["ID"]:
-                        continue
-
-                    other_tags = set(other_product["TAGS"])
-                    common_tags = product_tags.intersection(other_tags)
-
-                    # Create relationship if there are common tags
-                    if len(common_tags) >= 2:
-                        similarity_score = len(common_tags) / len(
-                            product_tags.union(other_tags)
-                        )
-
-                        session.run(
-                            """
-                            MATCH (p1:Product {id: $product1_id})
-                            MATCH (p2:Product {id: $product2_id})
-                            MERGE (p1)-[r:SIMILAR_TO]->(p2)
-                            SET r.score = $score, r.common_tags = $common_tags
-                            """,
-                            product1_id=product["ID"],
-                            product2_id=other_product["ID"],
-                            score=similarity_score,
-                            common_tags=list(common_tags),
-                        )
+        with self.client.driver.session(database=NEO4J_CONFIG.database) as session:
+            records = session.execute_write(self._merge_similar_products)
+            for record in records:
+                # Product nodes left over from an earlier load are not in the CSV
+                # and have no cached metadata, so keep them out of the mirror
+                product_id, other_id = record["product_id"], record["other_id"]
+                if product_id in neighbours and other_id in neighbours:
+                    neighbours[product_id][other_id] = record["score"]
 
         print("Created similar product relationships")
 
+        # Mirror the neighbours into Redis so lookups skip the graph query
+        try:
+            redis_client.set_similar_products(
+                neighbours,
+                {
+                    product_id: {"name": name, "price": float(price)}
+                    for product_id, name, price in zip(
+                        products["ID"], products["NAME"], products["PRICE"]
+                    )
+                },
+            )
+            print("Cached similar products in Redis")
+        except Exception as e:
+            print(f"Could not cache similar products in Redis: {e}")
+
+    @staticmethod
+    def _merge_similar_products(tx) -> list[dict]:
+        """Merge SIMILAR_TO between products sharing tags and return the scores."""
+        result = tx.run(
+            """
+            MATCH (p1:Product)-[:HAS_TAG]->(t:Tag)<-[:HAS_TAG]-(p2:Product)
+            WITH p1, p2, collect(t.name) AS common_tags
+            WHERE size(common_tags) >= 2
+            WITH p1, p2, common_tags,
+                 COUNT { (p1)-[:HAS_TAG]->() } + COUNT { (p2)-[:HAS_TAG]->() }
+                 - size(common_tags) AS union_size
+            MERGE (p1)-[r:SIMILAR_TO]->(p2)
+            SET r.score = toFloat(size(common_tags)) / union_size,
+                r.common_tags = common_tags
+            RETURN p1.id AS product_id, p2.id AS other_id, r.score AS score
+            """
+        )
+        return result.data()
+
     def load_all(self):
         """Load all graph data into Neo4j."""
         print("Creating constraints...")
         self.create_constraints()
 
-        print("Loading categories...")
-        self.load_categories()
-
-        print("Loading sellers...")
-        self.load_sellers()
-
-        print("Loading users...")
-        self.load_users()
+        # Categories, sellers and users are independent of each other
+        print("Loading categories, sellers and users...")
+        run_concurrently(self.load_categories, self.load_sellers, self.load_users)
 
         print("Loading products and relationships...")
         self.load_products()
@@ -1,55 +1,79 @@
 """Load data into PostgreSQL database."""
 
+import io
+from contextlib import suppress
+
+import pandas as pd
+
 from src.db.postgres_client import db
-from src.utils.data_parser import DataParser
+from src.db.redis_client import redis_client
+from src.utils.concurrency import run_concurrently
+from src.utils.data_parser import CachedDataParser
 
 
 class RelationalLoader:
     def __init__(self):
         self.db = db
-        self.parser = DataParser()
+        self.parser = CachedDataParser()
 
-    def load_categories(self):
-        """Load categories into PostgreSQL."""
-        categories = self.parser.parse_categories()
+    def _copy_rows(self, table: str, frame: pd.DataFrame):
+        """Stream a frame into table with COPY, skipping ids already present.
 
+        The frame's columns must be named after the table's columns. Rows are
+        copied into a temporary table first so the final INSERT can keep the
+        ON CONFLICT (id) DO NOTHING semantics.
+        """
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+
+        columns = ", ".join(frame.columns)
         with self.db.get_cursor() as cursor:
-            for _, row in categories.iterrows():
-                query = """
-                        INSERT INTO categories (id, name, description)
-                        VALUES (%(ID)s, %(NAME)s, %(DESCRIPTION)s) ON CONFLICT (id) DO NOTHING;
-                        """
-                cursor.execute(query, row.to_dict())
+            cursor.execute(
+                f"CREATE TEMP TABLE tmp_{table} (LIKE {table}) ON COMMIT DROP;"
+            )
+            cursor.copy_expert(
+                f"COPY tmp_{table} ({columns}) FROM STDIN WITH (FORMAT csv);", buffer
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({columns})
+                SELECT {columns} FROM tmp_{table}
+                ON CONFLICT (id) DO NOTHING;
+                """
+            )
 
+    def load_categories(self):
+        """Load categories into PostgreSQL."""
+        categories = self.parser.parse_categories()
+        self._copy_rows(
+            "categories",
+            categories[["ID", "NAME", "DESCRIPTION"]].rename(columns=str.lower),
+        )
         print(f"Loaded {len(categories)} categories")
 
     def load_sellers(self):
         """Load sellers into PostgreSQL."""
         sellers = self.parser.parse_sellers()
-        with self.db.get_cursor() as cursor:
-            for _, row in sellers.iterrows():
-                query = """
-                    INSERT INTO sellers (id, name, specialty, rating, joined)
-                    VALUES (%(ID)s, %(NAME)s, %(SPECIALTY)s, %(RATING)s, %(JOINED)s)
-                    ON CONFLICT (id) DO NOTHING;
-                """
-                cursor.execute(query, row.to_dict())
+        self._copy_rows(
+            "sellers",
+            sellers[["ID", "NAME", "SPECIALTY", "RATING", "JOINED"]].rename(
+                columns=str.lower
+            ),
+        )
         print(f"Loaded {len(sellers)} sellers")
 
     def load_users(self):
         """Load users into PostgreSQL."""
         users = self.parser.parse_users()
-        with self.db.get_cursor() as cursor:
-            for _, row in users.iterrows():
-                query = """
-                    INSERT INTO users (id, name, email, join_date, location, interests)
-                    VALUES (%(ID)s, %(NAME)s, %(EMAIL)s, %(JOIN_DATE)s, %(LOCATION)s, %(INTERESTS)s)
-                    ON CONFLICT (id) DO NOTHING;
-                """
-                # Convert interests list to comma-separated string
-                row_dict = row.to_dict()
-                row_dict["INTERESTS"] = ",".join(row_dict["INTERESTS"])
-                cursor.execute(query, row_dict)
+        # Store interests as a comma-separated string
+        users = users.assign(INTERESTS=users["INTERESTS"].str.join(","))
+        self._copy_rows(
+            "users",
+            users[
+                ["ID", "NAME", "EMAIL", "JOIN_DATE", "LOCATION", "INTERESTS"]
+            ].rename(columns=str.lower),
+        )
         print(f"Loaded {len(users)} users")
 
     def load_products(self):
@@ -57,31 +81,44 @@ class RelationalLoader:
         products = self.parser.parse_products()
         categories = self.parser.parse_categories()
 
-        # Create a mapping from category name to category id
-        category_map = dict(zip(categories["NAME"], categories["ID"], strict=False))
-
-        with self.db.get_cursor() as cursor:
-            for _, row in products.iterrows():
-                # Map category name to category id
-                category_name = row["CATEGORY"]
-                category_id = category_map.get(category_name)
-
-                if category_id is None:
-                    print(
-                        f"Warning: Category '{category_name}' not found for product {row['ID']}"
-                    )
-                    continue
-
-                query = """
-                    INSERT INTO products (id, name, category_id, price, seller_id, description, tags, stock)
-                    VALUES (%(ID)s, %(NAME)s, %(category_id)s, %(PRICE)s, %(SELLER_ID)s, %(DESCRIPTION)s, %(tags)s, %(STOCK)s)
-                    ON CONFLICT (id) DO NOTHING;
-                """
-                # Convert tags list to comma-separated string
-                row_dict = row.to_dict()
-                row_dict["tags"] = ",".join(row_dict["TAGS"])
-                row_dict["category_id"] = category_id
-                cursor.execute(query, row_dict)
+        # Resolve category names to ids with one left join
+        products = products.merge(
+            categories[["ID", "NAME"]].rename(
+                columns={"ID": "CATEGORY_ID", "NAME": "CATEGORY"}
+            ),
+            on="CATEGORY",
+            how="left",
+        )
+
+        unmatched = products[products["CATEGORY_ID"].isna()]
+        if not unmatched.empty:
+            print(
+                f"Warning: Category not found for products "
+                f"{', '.join(unmatched['ID'])}; skipping them"
+            )
+
+        # Store tags as a comma-separated string
+        products = products[products["CATEGORY_ID"].notna()].assign(
+            TAGS=lambda frame: frame["TAGS"].str.join(",")
+        )
+        self._copy_rows(
+            "products",
+            products[
+                [
+                    "ID",
+                    "NAME",
+                    "CATEGORY_ID",
+                    "PRICE",
+                    "SELLER_ID",
+                    "DESCRIPTION",
+                    "TAGS",
+                    "STOCK",
+                ]
+            ].rename(columns=str.lower),
+        )
+        # Stock may have changed; the cart's Redis mirror refills on demand
+        with suppress(Exception):
+            redis_client.clear_product_stock()
         print(f"Loaded {len(products)} products")
 
     def load_all(self):
@@ -89,12 +126,10 @@ class RelationalLoader:
         print("Creating tables...")
         self.db.create_tables()
 
-        print("Loading categories...")
-        self.load_categories()
-        print("Loading sellers...")
-        self.load_sellers()
-        print("Loading users...")
-        self.load_users()
+        # Categories, sellers and users have no foreign keys between them;
+        # products reference categories and sellers so they load last
+        print("Loading categories, sellers and users...")
+        run_concurrently(self.load_categories, self.load_sellers, self.load_users)
         print("Loading products...")
         self.load_products()
         print("Relational data loading complete!")
@@ -1,16 +1,45 @@
 """Load vector embeddings into pgvector."""
 
+import hashlib
+
 import numpy as np
+import torch
+from psycopg2.extras import execute_values
 from sentence_transformers import SentenceTransformer
+from sklearn.decomposition import PCA
 
-from src.db.postgres_client import db
-from src.utils.data_parser import DataParser
+from src.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_KWARGS,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_M,
+    SEMANTIC_CACHE_PCA_DIM,
+    SEMANTIC_CACHE_PCA_MIN_SAMPLES,
+    SEMANTIC_CACHE_PCA_PATH,
+    TORCH_THREADS,
+)
+from src.db.postgres_client import CONVERT_EMBEDDINGS_TO_HALFVEC, db
+from src.utils.data_parser import CachedDataParser
 
 
 class VectorLoader:
+    # Texts per encoder forward pass; larger batches mostly add padding
+    BATCH_SIZE = 64
+    # Below this many texts, starting one worker per GPU costs more than it saves
+    MULTI_PROCESS_MIN_TEXTS = 10000
+
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
-        self.parser = DataParser()
+        self.model_name = model_name
+        # Quantised ONNX exports embed slightly differently; cache them apart
+        self.model_id = "/".join([model_name, *EMBEDDING_MODEL_KWARGS.values()])
+        # Use every core for the CPU matmuls; fp16 inference on GPU
+        torch.set_num_threads(TORCH_THREADS)
+        self.model = SentenceTransformer(
+            model_name, backend=EMBEDDING_BACKEND, model_kwargs=EMBEDDING_MODEL_KWARGS
+        )
+        if EMBEDDING_BACKEND == "torch" and torch.cuda.is_available():
+            self.model.half()
+        self.parser = CachedDataParser()
 
     def create_vector_extension(self):
         """Enable pgvector extension and create embeddings table."""
@@ -19,41 +48,157 @@ class VectorLoader:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS product_embeddings (
                     product_id VARCHAR(10) PRIMARY KEY,
-                    description_embedding vector(384)  -- 384 dimensions for MiniLM
+                    description_embedding halfvec(384)  -- MiniLM, stored as fp16
+                );
+            """)
+            cursor.execute(CONVERT_EMBEDDINGS_TO_HALFVEC)
+            # Encoded texts keyed by a hash of model name and text, so
+            # unchanged products are not re-encoded on the next load
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key BYTEA PRIMARY KEY,
+                    embedding halfvec(384)
                 );
             """)
 
     def generate_embeddings(self):
         """Generate embeddings for all product descriptions."""
         products = self.parser.parse_products()
+        if products.empty:
+            return
+
+        # Combine relevant text fields
+        texts = [
+            f"{name} {description} {' '.join(tags)}"
+            for name, description, tags in zip(
+                products["NAME"], products["DESCRIPTION"], products["TAGS"]
+            )
+        ]
 
-        for _, product in products.iterrows():
-            # Combine relevant text fields
-            text = f"{product['NAME']} {product['DESCRIPTION']} {' '.join(product['TAGS'])}"
+        embeddings = self._encode_cached(texts)
 
-            # Generate embedding
-            embedding = self.model.encode(text)
+        # Store in database
+        self._store_embeddings(products["ID"], embeddings)
 
-            # Store in database
-            self._store_embedding(product["ID"], embedding)
+        self.fit_cache_projection(embeddings)
+
+    def _encode_cached(self, texts: list[str]) -> np.ndarray:
+        """Encode texts, reusing embeddings cached for identical inputs."""
+        keys = [
+            hashlib.blake2b(
+                f"{self.model_id}\0{text}".encode(), digest_size=16
+            ).digest()
+            for text in texts
+        ]
 
-    def _store_embedding(self, product_id: str, embedding: np.ndarray):
-        """Store embedding in pgvector."""
         with db.get_cursor() as cursor:
             cursor.execute(
+                "SELECT key, embedding FROM embedding_cache WHERE key = ANY(%s);",
+                (keys,),
+            )
+            cached = {
+                bytes(row["key"]): row["embedding"].to_numpy()
+                for row in cursor.fetchall()
+            }
+
+            misses = [i for i, key in enumerate(keys) if key not in cached]
+            if misses:
+                # Encode only the new or changed texts
+                encoded = self._encode([texts[i] for i in misses])
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO embedding_cache (key, embedding) VALUES %s
+                    ON CONFLICT (key) DO NOTHING;
+                    """,
+                    [(keys[i], emb) for i, emb in zip(misses, encoded)],
+                    template="(%s, %s::halfvec)",
+                    page_size=500,
+                )
+                cached.update(zip((keys[i] for i in misses), encoded))
+
+        return np.stack([cached[key] for key in keys]).astype(np.float32)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts in batches, fanning out across GPUs for large loads."""
+        if (
+            torch.cuda.device_count() > 1
+            and len(texts) >= self.MULTI_PROCESS_MIN_TEXTS
+        ):
+            pool = self.model.start_multi_process_pool()
+            try:
+                return self.model.encode_multi_process(
+                    texts, pool, batch_size=self.BATCH_SIZE
+                )
+            finally:
+                self.model.stop_multi_process_pool(pool)
+
+        with torch.inference_mode():
+            return self.model.encode(
+                texts,
+                batch_size=self.BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+
+    def fit_cache_projection(self, embeddings: np.ndarray):
+        """Fit the PCA used to shrink query embeddings in the semantic cache.
+
+        Below SEMANTIC_CACHE_PCA_MIN_SAMPLES embeddings the fit would yield
+        fewer components than configured and describe little beyond the
+        catalogue itself, so no projection is saved and any earlier one is
+        removed; the cache then compares full embeddings.
+        """
+        if len(embeddings) < SEMANTIC_CACHE_PCA_MIN_SAMPLES:
+            SEMANTIC_CACHE_PCA_PATH.unlink(missing_ok=True)
+            return
+        pca = PCA(n_components=SEMANTIC_CACHE_PCA_DIM).fit(embeddings)
+        np.savez(
+            SEMANTIC_CACHE_PCA_PATH,
+            mean=pca.mean_.astype(np.float32),
+            components=pca.components_.astype(np.float32),
+        )
+
+    def _store_embeddings(self, product_ids, embeddings: np.ndarray):
+        """Store all embeddings in pgvector with one multi-row upsert."""
+        with db.get_cursor() as cursor:
+            execute_values(
+                cursor,
                 """
                 INSERT INTO product_embeddings (product_id, description_embedding)
-                VALUES (%s, %s)
+                VALUES %s
                 ON CONFLICT (product_id) DO UPDATE
                 SET description_embedding = EXCLUDED.description_embedding;
                 """,
-                (product_id, embedding.tolist()),
+                list(zip(product_ids, embeddings)),
+                template="(%s, %s::halfvec)",
+                page_size=500,
+            )
+
+    def create_vector_index(self):
+        """Build the HNSW cosine index once embeddings are loaded.
+
+        Building after the bulk load is faster than growing the graph row by
+        row; once built, HNSW absorbs later upserts without a rebuild.
+        """
+        with db.get_cursor() as cursor:
+            # Superseded by HNSW, which needs no training on existing rows
+            cursor.execute("DROP INDEX IF EXISTS idx_product_embeddings_ivfflat;")
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_product_embeddings_hnsw
+                    ON product_embeddings
+                    USING hnsw (description_embedding halfvec_cosine_ops)
+                    WITH (m = %s, ef_construction = %s);
+                """,
+                (HNSW_M, HNSW_EF_CONSTRUCTION),
             )
 
     def load_all(self):
-        """Create extension/table and generate/store all embeddings."""
+        """Create extension/table, generate/store embeddings and index them."""
         self.create_vector_extension()
         self.generate_embeddings()
+        self.create_vector_index()
         print("Vector embeddings loaded!")
 
 
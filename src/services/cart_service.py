@@ -1,10 +1,20 @@
 """Shopping cart management service using Redis."""
 
-from typing import Dict, List, Optional
+from contextlib import suppress
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
 
 from src.db.redis_client import redis_client
 from src.db.postgres_client import db
-from src.config import CART_TTL
+from src.db.neo4j_client import neo4j_client
+from src.services.order_service import (
+    insert_order,
+    invalidate_order_stats,
+    purchase_rows,
+)
+from src.config import CART_TOTAL_TTL, CART_TTL
 
 
 class CartService:
@@ -24,24 +34,66 @@ class CartService:
     def add_to_cart(self, user_id: str, product_id: str, quantity: int = 1) -> bool:
         """Add item to user's cart."""
         try:
-            # Verify product exists and has stock
-            if not self._verify_product(product_id, quantity):
-                return False
-
-            cart_key = f"cart:{user_id}"
-            self.redis.client.hincrby(cart_key, product_id, quantity)
-            self.redis.client.expire(cart_key, self.cart_ttl)
+            # Verify stock and add in one atomic Redis script
+            added = self.redis.add_to_cart_if_in_stock(
+                user_id, product_id, quantity, self.cart_ttl
+            )
+            if added != 1:
+                # Stock not mirrored yet, or the mirror says it is short and may
+                # be stale: PostgreSQL decides, and verifying refreshes the mirror
+                if not self._verify_product(product_id, quantity):
+                    return False
+                added = self.redis.add_to_cart_if_in_stock(
+                    user_id, product_id, quantity, self.cart_ttl
+                )
 
-            return True
+            return added == 1
         except Exception as e:
             print(f"Error adding to cart: {e}")
             return False
 
+    def add_many_to_cart(
+        self, user_id: str, items: List[Tuple[str, int]]
+    ) -> List[bool]:
+        """Add several items to user's cart, checking stock atomically as
+        ``add_to_cart`` does.
+
+        Returns one success flag per ``(product_id, quantity)`` pair.
+        """
+        if not items:
+            return []
+
+        try:
+            added = self.redis.add_items_to_cart_if_in_stock(
+                user_id, items, self.cart_ttl
+            )
+            retry = [i for i, result in enumerate(added) if result != 1]
+            if retry:
+                # Unmirrored or possibly stale stock: reload it from PostgreSQL
+                # with one query, then retry the items of known products
+                products = self._get_products_by_ids(
+                    list({items[i][0] for i in retry})
+                )
+                self._mirror_stock(list(products.values()))
+                retry = [i for i in retry if items[i][0] in products]
+                if retry:
+                    retried = self.redis.add_items_to_cart_if_in_stock(
+                        user_id, [items[i] for i in retry], self.cart_ttl
+                    )
+                    for i, result in zip(retry, retried):
+                        added[i] = result
+
+            return [result == 1 for result in added]
+        except Exception as e:
+            print(f"Error adding to cart: {e}")
+            return [False] * len(items)
+
     def remove_from_cart(self, user_id: str, product_id: str) -> bool:
         """Remove item from user's cart."""
         try:
             cart_key = f"cart:{user_id}"
             self.redis.client.hdel(cart_key, product_id)
+            self.redis.client.delete(f"cart_total:{user_id}")
             return True
         except Exception as e:
             print(f"Error removing from cart: {e}")
@@ -60,6 +112,7 @@ class CartService:
             cart_key = f"cart:{user_id}"
             self.redis.client.hset(cart_key, product_id, quantity)
             self.redis.client.expire(cart_key, self.cart_ttl)
+            self.redis.client.delete(f"cart_total:{user_id}")
 
             return True
         except Exception as e:
@@ -70,47 +123,84 @@ class CartService:
         """Clear user's entire cart."""
         try:
             cart_key = f"cart:{user_id}"
-            self.redis.client.delete(cart_key)
+            self.redis.client.delete(cart_key, f"cart_total:{user_id}")
             return True
         except Exception as e:
             print(f"Error clearing cart: {e}")
             return False
 
-    def get_cart_total(self, user_id: str) -> Dict[str, float]:
-        """Get cart total with product details."""
-        cart = self.get_cart(user_id)
+    def _get_cart_with_expiry(
+        self, user_id: str
+    ) -> Tuple[Dict[str, int], Optional[int], Optional[dict]]:
+        """Read cart contents, remaining TTL and cached total in one round-trip."""
+        cart_key = f"cart:{user_id}"
+        pipe = self.redis.client.pipeline(transaction=True)
+        pipe.hgetall(cart_key)
+        pipe.ttl(cart_key)
+        pipe.get(f"cart_total:{user_id}")
+        cart_data, ttl, cached_total = pipe.execute()
+
+        cart = {product_id: int(quantity) for product_id, quantity in cart_data.items()}
+        cached_total = orjson.loads(cached_total) if cached_total else None
+        return cart, ttl if ttl > 0 else None, cached_total
+
+    def get_cart_total(self, user_id: str, use_cache: bool = True) -> Dict[str, float]:
+        """Get cart total with product details and time until expiry.
+
+        Priced carts are cached briefly; pass ``use_cache=False`` for current
+        prices, e.g. when placing an order.
+        """
+        cart, expiry, cached_total = self._get_cart_with_expiry(user_id)
         if not cart:
-            return {"total": 0.0, "items": []}
+            return {"total": 0.0, "items": [], "item_count": 0, "expiry": None}
+        if use_cache and cached_total:
+            return {**cached_total, "expiry": expiry}
 
         # Get product details from PostgreSQL
         product_ids = list(cart.keys())
         products = self._get_products_by_ids(product_ids)
 
-        total = 0.0
-        items = []
-
-        for product_id, quantity in cart.items():
-            if product_id in products:
-                product = products[product_id]
-                item_total = product["price"] * quantity
-                total += item_total
-
-                items.append(
-                    {
-                        "product_id": product_id,
-                        "name": product["name"],
-                        "price": product["price"],
-                        "quantity": quantity,
-                        "total": item_total,
-                    }
-                )
-
-        return {"total": total, "items": items, "item_count": len(items)}
+        # Price every line in one vectorised multiply
+        found = [product_id for product_id in cart if product_id in products]
+        prices = np.fromiter(
+            (products[product_id]["price"] for product_id in found),
+            dtype=np.float64,
+            count=len(found),
+        )
+        quantities = np.fromiter(
+            (cart[product_id] for product_id in found),
+            dtype=np.int64,
+            count=len(found),
+        )
+        totals = prices * quantities
+
+        items = [
+            {
+                "product_id": product_id,
+                "name": products[product_id]["name"],
+                "price": price,
+                "quantity": quantity,
+                "total": item_total,
+            }
+            for product_id, price, quantity, item_total in zip(
+                found, prices.tolist(), quantities.tolist(), totals.tolist()
+            )
+        ]
+
+        cart_total = {
+            "total": float(totals.sum()),
+            "items": items,
+            "item_count": len(items),
+        }
+        # Best effort: a failed write only means the next call reprices
+        with suppress(Exception):
+            self.redis.set_json(f"cart_total:{user_id}", cart_total, ttl=CART_TOTAL_TTL)
+        return {**cart_total, "expiry": expiry}
 
     def convert_cart_to_order(self, user_id: str) -> Optional[int]:
         """Convert cart to order and clear cart."""
         try:
-            cart_total = self.get_cart_total(user_id)
+            cart_total = self.get_cart_total(user_id, use_cache=False)
             if not cart_total["items"]:
                 return None
 
@@ -140,18 +230,30 @@ class CartService:
         """Verify product exists and has sufficient stock."""
         try:
             with db.get_cursor() as cursor:
-                cursor.execute(
-                    "SELECT id, stock FROM products WHERE id = %s", (product_id,)
+                db.execute_prepared(
+                    cursor,
+                    "cart_verify_product",
+                    "SELECT id, stock FROM products WHERE id = $1",
+                    (product_id,),
                 )
                 result = cursor.fetchone()
 
-                if not result:
-                    return False
+            if not result:
+                return False
 
-                return result["stock"] >= quantity
+            self._mirror_stock([result])
+            return result["stock"] >= quantity
         except Exception:
             return False
 
+    def _mirror_stock(self, rows: List[dict]):
+        """Copy stock levels into Redis for the add-to-cart script.
+
+        Best effort: a stale or missing mirror only affects the cart check.
+        """
+        with suppress(Exception):
+            self.redis.set_product_stock({row["id"]: row["stock"] for row in rows})
+
     def _get_products_by_ids(self, product_ids: List[str]) -> Dict[str, dict]:
         """Get product details by IDs."""
         if not product_ids:
@@ -159,11 +261,13 @@ class CartService:
 
         try:
             with db.get_cursor() as cursor:
-                # Create placeholders for IN clause
-                placeholders = ",".join(["%s"] * len(product_ids))
-                cursor.execute(
-                    f"SELECT id, name, price FROM products WHERE id IN ({placeholders})",
-                    product_ids,
+                # Pass the ids as a single array parameter so one prepared
+                # statement serves any number of products
+                db.execute_prepared(
+                    cursor,
+                    "cart_products_by_ids",
+                    "SELECT id, name, price, stock FROM products WHERE id = ANY($1)",
+                    (list(product_ids),),
                 )
                 results = cursor.fetchall()
 
@@ -172,48 +276,24 @@ class CartService:
             return {}
 
     def _create_order(self, user_id: str, cart_total: dict) -> Optional[int]:
-        """Create order in PostgreSQL."""
+        """Create order in PostgreSQL and record its purchases in Neo4j.
+
+        As in ``OrderService.create_order``, a failed graph write rolls the
+        order back, so recommendations see every checkout.
+        """
         try:
             with db.get_cursor() as cursor:
-                # Create order
-                cursor.execute(
-                    """
-                    INSERT INTO orders (user_id, total_amount, status)
-                    VALUES (%s, %s, 'pending')
-                    RETURNING id
-                """,
-                    (user_id, cart_total["total"]),
+                order_id, stock = insert_order(
+                    cursor, user_id, cart_total["items"], cart_total["total"]
                 )
-
-                order_id = cursor.fetchone()["id"]
-
-                # Create order items
-                for item in cart_total["items"]:
-                    cursor.execute(
-                        """
-                        INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """,
-                        (
-                            order_id,
-                            item["product_id"],
-                            item["quantity"],
-                            item["price"],
-                            item["total"],
-                        ),
-                    )
-
-                    # Update product stock
-                    cursor.execute(
-                        """
-                        UPDATE products 
-                        SET stock = stock - %s 
-                        WHERE id = %s
-                    """,
-                        (item["quantity"], item["product_id"]),
-                    )
-
-                return order_id
+                neo4j_client.add_purchases(purchase_rows(user_id, cart_total["items"]))
+
+            self._mirror_stock(stock)
+            invalidate_order_stats(user_id)
+            # A failed refresh is caught up incrementally by the next one
+            with suppress(Exception):
+                neo4j_client.refresh_co_purchases()
+            return order_id
         except Exception as e:
             print(f"Error creating order: {e}")
             return None
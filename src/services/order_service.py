@@ -1,14 +1,104 @@
 """Order service for managing orders and order history."""
 
 import logging
+from contextlib import suppress
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
+from psycopg2.extras import execute_values
+
+from src.config import ORDER_STATS_TTL
 from src.db.postgres_client import db
 from src.db.neo4j_client import neo4j_client
+from src.db.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
+ORDER_ANALYTICS_KEY = "order_analytics"
+
+
+def insert_order(
+    cursor, user_id: str, items: List[Dict], total_amount: float
+) -> Tuple[int, List[Dict]]:
+    """Insert an order with its items and take the stock, in one statement.
+
+    Items need product_id, quantity, price and total. Returns the new order
+    id and the products' updated stock levels. Raises ValueError, leaving the
+    caller to roll back, if any product is unknown or short of stock; the
+    cart's Redis check is advisory, this is where overselling is stopped.
+    """
+    cursor.execute(
+        """
+        WITH new_order AS (
+            INSERT INTO orders (user_id, total_amount, status, order_date)
+            VALUES (%s, %s, 'pending', %s)
+            RETURNING id
+        ),
+        items AS (
+            SELECT *
+            FROM UNNEST(%s::text[], %s::int[], %s::float8[], %s::float8[])
+                AS v(product_id, quantity, unit_price, total_price)
+        ),
+        new_items AS (
+            INSERT INTO order_items
+                (order_id, product_id, quantity, unit_price, total_price)
+            SELECT new_order.id, items.*
+            FROM new_order, items
+        ),
+        stock AS (
+            UPDATE products p
+            SET stock = p.stock - v.quantity
+            FROM (
+                SELECT product_id, SUM(quantity) AS quantity
+                FROM items
+                GROUP BY product_id
+            ) AS v
+            WHERE p.id = v.product_id AND p.stock >= v.quantity
+            RETURNING p.id, p.stock
+        )
+        SELECT new_order.id,
+               COALESCE((SELECT json_agg(stock) FROM stock), '[]') AS stock
+        FROM new_order
+    """,
+        (
+            user_id,
+            total_amount,
+            datetime.now(),
+            [item["product_id"] for item in items],
+            [item["quantity"] for item in items],
+            [item["price"] for item in items],
+            [item["total"] for item in items],
+        ),
+    )
+    row = cursor.fetchone()
+    if len(row["stock"]) < len({item["product_id"] for item in items}):
+        raise ValueError("Insufficient stock for order")
+    return row["id"], row["stock"]
+
+
+def purchase_rows(user_id: str, items: List[Dict]) -> List[Dict]:
+    """Turn order items into the purchases ``Neo4jClient.add_purchases`` takes."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    return [
+        {
+            "user_id": user_id,
+            "product_id": item["product_id"],
+            "quantity": item["quantity"],
+            "date": today,
+        }
+        for item in items
+    ]
+
+
+def invalidate_order_stats(user_id: str):
+    """Drop cached statistics that an order change makes stale.
+
+    Call after the change has committed, so a concurrent reader cannot cache
+    the pre-commit state again.
+    """
+    with suppress(Exception):
+        redis_client.client.delete(f"user_stats:{user_id}", ORDER_ANALYTICS_KEY)
+
 
 class OrderService:
     """Service for managing orders and order processing."""
@@ -23,70 +113,62 @@ class OrderService:
         """Create a new order in PostgreSQL."""
         try:
             with self.db.get_cursor() as cursor:
-                # Create order
-                cursor.execute(
-                    """
-                    INSERT INTO orders (user_id, total_amount, status, order_date)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id
-                """,
-                    (user_id, total_amount, "pending", datetime.now()),
-                )
+                order_id, stock = insert_order(cursor, user_id, items, total_amount)
+
+                # Add purchases to Neo4j for recommendations in one statement
+                self.neo4j.add_purchases(purchase_rows(user_id, items))
+
+            # Mirror and invalidate only once the order has committed
+            self._mirror_stock(stock)
+            invalidate_order_stats(user_id)
+
+            # Rescore bought-together edges for the products just purchased;
+            # a failed refresh is caught up incrementally by the next one
+            with suppress(Exception):
+                self.neo4j.refresh_co_purchases()
 
-                order_id = cursor.fetchone()["id"]
-
-                # Create order items
-                for item in items:
-                    cursor.execute(
-                        """
-                        INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """,
-                        (
-                            order_id,
-                            item["product_id"],
-                            item["quantity"],
-                            item["price"],
-                            item["total"],
-                        ),
-                    )
-
-                    # Update product stock
-                    cursor.execute(
-                        """
-                        UPDATE products 
-                        SET stock = stock - %s 
-                        WHERE id = %s
-                    """,
-                        (item["quantity"], item["product_id"]),
-                    )
-
-                # Add purchase to Neo4j for recommendations
-                for item in items:
-                    self.neo4j.add_purchase(
-                        user_id,
-                        item["product_id"],
-                        item["quantity"],
-                        datetime.now().strftime("%Y-%m-%d"),
-                    )
-
-                logger.info(f"Order {order_id} created for user {user_id}")
-                return order_id
+            logger.info(f"Order {order_id} created for user {user_id}")
+            return order_id
 
         except Exception as e:
             logger.error(f"Error creating order: {e}")
             return None
 
+    @staticmethod
+    def _mirror_stock(rows: List[Dict]):
+        """Copy updated stock levels into Redis for the add-to-cart check."""
+        with suppress(Exception):
+            redis_client.set_product_stock({row["id"]: row["stock"] for row in rows})
+
     def get_order(self, order_id: int) -> Optional[Dict]:
         """Get order details by ID."""
         try:
             with self.db.get_cursor() as cursor:
+                # The order and its items come back in one round-trip
                 cursor.execute(
                     """
-                    SELECT o.*, u.name as user_name, u.email
+                    SELECT o.*, u.name as user_name, u.email,
+                           COALESCE(
+                               json_agg(
+                                   json_build_object(
+                                       'id', oi.id,
+                                       'order_id', oi.order_id,
+                                       'product_id', oi.product_id,
+                                       'quantity', oi.quantity,
+                                       'unit_price', oi.unit_price,
+                                       'total_price', oi.total_price,
+                                       'product_name', p.name,
+                                       'description', p.description
+                                   )
+                               ) FILTER (WHERE p.id IS NOT NULL),
+                               '[]'
+                           ) as items
                     FROM orders o
                     JOIN users u ON o.user_id = u.id
+                    LEFT JOIN order_items oi ON o.id = oi.order_id
+                    LEFT JOIN products p ON oi.product_id = p.id
                     WHERE o.id = %s
+                    GROUP BY o.id, u.name, u.email
                 """,
                     (order_id,),
                 )
@@ -95,20 +177,6 @@ class OrderService:
                 if not order:
                     return None
 
-                # Get order items
-                cursor.execute(
-                    """
-                    SELECT oi.*, p.name as product_name, p.description
-                    FROM order_items oi
-                    JOIN products p ON oi.product_id = p.id
-                    WHERE oi.order_id = %s
-                """,
-                    (order_id,),
-                )
-
-                items = cursor.fetchall()
-                order["items"] = items
-
                 # Add created_at field for compatibility (use order_date)
                 order["created_at"] = order["order_date"]
 
@@ -122,12 +190,28 @@ class OrderService:
         """Get order history for a user."""
         try:
             with self.db.get_cursor() as cursor:
+                # Items are aggregated per order so history is a single query
                 cursor.execute(
                     """
                     SELECT o.*, 
-                           COUNT(oi.id) as item_count
+                           COUNT(oi.id) as item_count,
+                           COALESCE(
+                               json_agg(
+                                   json_build_object(
+                                       'id', oi.id,
+                                       'order_id', oi.order_id,
+                                       'product_id', oi.product_id,
+                                       'quantity', oi.quantity,
+                                       'unit_price', oi.unit_price,
+                                       'total_price', oi.total_price,
+                                       'product_name', p.name
+                                   )
+                               ) FILTER (WHERE p.id IS NOT NULL),
+                               '[]'
+                           ) as items
                     FROM orders o
                     LEFT JOIN order_items oi ON o.id = oi.order_id
+                    LEFT JOIN products p ON oi.product_id = p.id
                     WHERE o.user_id = %s
                     GROUP BY o.id
                     ORDER BY o.order_date DESC
@@ -136,23 +220,7 @@ class OrderService:
                     (user_id, limit),
                 )
 
-                orders = cursor.fetchall()
-
-                # Get items for each order
-                for order in orders:
-                    cursor.execute(
-                        """
-                        SELECT oi.*, p.name as product_name
-                        FROM order_items oi
-                        JOIN products p ON oi.product_id = p.id
-                        WHERE oi.order_id = %s
-                    """,
-                        (order["id"],),
-                    )
-
-                    order["items"] = cursor.fetchall()
-
-                return orders
+                return cursor.fetchall()
 
         except Exception as e:
             logger.error(f"Error getting orders for user {user_id}: {e}")
@@ -167,18 +235,30 @@ class OrderService:
                     UPDATE orders 
                     SET status = %s
                     WHERE id = %s
+                    RETURNING user_id
                 """,
                     (status, order_id),
                 )
 
-                return cursor.rowcount > 0
+                if cursor.rowcount == 0:
+                    return False
+                user_id = cursor.fetchone()["user_id"]
+
+            invalidate_order_stats(user_id)
+            return True
 
         except Exception as e:
             logger.error(f"Error updating order {order_id} status: {e}")
             return False
 
     def get_order_statistics(self, user_id: str) -> Dict[str, Any]:
-        """Get order statistics for a user."""
+        """Get order statistics for a user, cached briefly in Redis."""
+        cache_key = f"user_stats:{user_id}"
+        with suppress(Exception):
+            cached = redis_client.get_json(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             with self.db.get_cursor() as cursor:
                 cursor.execute(
@@ -213,7 +293,9 @@ class OrderService:
 
                 stats["top_products"] = cursor.fetchall()
 
-                return stats
+            with suppress(Exception):
+                redis_client.set_json(cache_key, stats, ttl=ORDER_STATS_TTL)
+            return stats
 
         except Exception as e:
             logger.error(f"Error getting order statistics for user {user_id}: {e}")
@@ -272,15 +354,23 @@ class OrderService:
                 items = cursor.fetchall()
 
                 # Restore stock
-                for item in items:
-                    cursor.execute(
-                        """
-                        UPDATE products 
-                        SET stock = stock + %s 
-                        WHERE id = %s
-                    """,
-                        (item["quantity"], item["product_id"]),
-                    )
+                stock = execute_values(
+                    cursor,
+                    """
+                    UPDATE products p
+                    SET stock = p.stock + v.quantity
+                    FROM (
+                        SELECT product_id, SUM(quantity) AS quantity
+                        FROM (VALUES %s) AS items(product_id, quantity)
+                        GROUP BY product_id
+                    ) AS v
+                    WHERE p.id = v.product_id
+                    RETURNING p.id, p.stock
+                """,
+                    [(item["product_id"], item["quantity"]) for item in items],
+                    template="(%s, %s::int)",
+                    fetch=True,
+                )
 
                 # Update order status
                 cursor.execute(
@@ -292,15 +382,24 @@ class OrderService:
                     (order_id,),
                 )
 
-                logger.info(f"Order {order_id} cancelled by user {user_id}")
-                return True
+            # Mirror and invalidate only once the cancellation has committed
+            self._mirror_stock(stock)
+            invalidate_order_stats(user_id)
+
+            logger.info(f"Order {order_id} cancelled by user {user_id}")
+            return True
 
         except Exception as e:
             logger.error(f"Error cancelling order {order_id}: {e}")
             return False
 
     def get_order_analytics(self) -> Dict[str, Any]:
-        """Get order analytics for admin dashboard."""
+        """Get order analytics for admin dashboard, cached briefly in Redis."""
+        with suppress(Exception):
+            cached = redis_client.get_json(ORDER_ANALYTICS_KEY)
+            if cached is not None:
+                return cached
+
         try:
             with self.db.get_cursor() as cursor:
                 # Total orders and revenue
@@ -349,7 +448,11 @@ class OrderService:
 
                 analytics["daily_trends"] = cursor.fetchall()
 
-                return analytics
+            with suppress(Exception):
+                redis_client.set_json(
+                    ORDER_ANALYTICS_KEY, analytics, ttl=ORDER_STATS_TTL
+                )
+            return analytics
 
         except Exception as e:
             logger.error(f"Error getting order analytics: {e}")
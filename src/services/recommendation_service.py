@@ -1,232 +1,386 @@
 """Product recommendation service using Neo4j graph database."""
 
-from typing import List, Dict, Any
+from contextlib import suppress
+from typing import Any, Dict, Iterator, List
 from datetime import datetime, timedelta
 
+from neo4j import READ_ACCESS
+
+from src.config import NEO4J_CONFIG
 from src.db.neo4j_client import neo4j_client
+from src.db.redis_client import redis_client
+from src.utils.cache import redis_cached, user_recommendations_cache
+
+# Most similar users (by products in common) whose purchases are scored
+SIMILAR_USERS_LIMIT = 50
 
 
 class RecommendationService:
     def __init__(self):
         self.client = neo4j_client
 
+    def _read_session(self):
+        """Open a session whose queries may be routed to read replicas."""
+        return self.client.driver.session(
+            database=NEO4J_CONFIG.database, default_access_mode=READ_ACCESS
+        )
+
+    def _execute_read(self, work, *args):
+        """Run ``work(tx, *args)`` in a managed, retried read transaction."""
+        with self._read_session() as session:
+            return session.execute_read(work, *args)
+
+    def _read(self, query: str, **params) -> List[Dict[str, Any]]:
+        """Run one read query and return its records as dicts."""
+        return self._execute_read(self._fetch_tx, query, params)
+
+    @staticmethod
+    def _fetch_tx(tx, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Run a query on a transaction and materialise its records."""
+        return [record.data() for record in tx.run(query, **params)]
+
     def get_user_recommendations(
         self, user_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
-        """Get personalized recommendations for a user based on purchase history."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (u:User {id: $user_id})-[:PURCHASED]->(p:Product)<-[:PURCHASED]-(other:User)-[:PURCHASED]->(rec:Product)
-                WHERE NOT (u)-[:PURCHASED]->(rec)
-                WITH rec, count(*) as freq
-                ORDER BY freq DESC
-                LIMIT $limit
-                RETURN rec.id as product_id, rec.name as name, rec.price as price, freq as frequency
-                """,
-                user_id=user_id,
-                limit=limit,
+        """Get personalized recommendations for a user based on purchase history.
+
+        Results are memoized in-process for ``RECOMMENDATIONS_TTL`` seconds and
+        dropped whenever purchases are written.
+        """
+        key = (user_id, limit)
+        recommendations = user_recommendations_cache.get(key)
+        if recommendations is None:
+            recommendations = tuple(
+                self._execute_read(self._user_recs_tx, user_id, limit)
             )
-            return [record.data() for record in result]
+            user_recommendations_cache.set(key, recommendations)
+        return list(recommendations)
+
+    def get_recommendations_bulk(
+        self, user_ids: List[str], limit: int = 5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get purchase-history recommendations for many users in one query."""
+        return self._execute_read(self._user_recs_bulk_tx, user_ids, limit)
+
+    @classmethod
+    def _user_recs_tx(cls, tx, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Run the purchase-history recommendation query for one user."""
+        return cls._user_recs_bulk_tx(tx, [user_id], limit).get(user_id, [])
+
+    @staticmethod
+    def _user_recs_bulk_tx(
+        tx, user_ids: List[str], limit: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Run the purchase-history recommendation query for each user.
 
+        The user's nearest neighbours (most products in common) are found
+        first, and only their purchases are expanded and scored by overlap.
+        """
+        result = tx.run(
+            """
+            UNWIND $user_ids AS uid
+            CALL {
+                WITH uid
+                MATCH (u:User {id: uid})-[:PURCHASED]->(p:Product)
+                WITH u, collect(DISTINCT p) as owned
+                UNWIND owned as p
+                MATCH (p)<-[:PURCHASED]-(other:User)
+                WHERE other <> u
+                WITH owned, other, count(DISTINCT p) as shared
+                ORDER BY shared DESC
+                LIMIT $neighbours
+                MATCH (other)-[:PURCHASED]->(rec:Product)
+                WHERE NOT rec IN owned
+                WITH DISTINCT other, shared, rec
+                WITH rec, sum(shared) as score
+                ORDER BY score DESC
+                LIMIT $limit
+                RETURN collect({product_id: rec.id, name: rec.name, price: rec.price, frequency: score}) as recs
+            }
+            RETURN uid, recs
+            """,
+            user_ids=user_ids,
+            neighbours=SIMILAR_USERS_LIMIT,
+            limit=limit,
+        )
+        return {record["uid"]: record["recs"] for record in result}
+
+    def clear_user_recommendations_cache(self):
+        """Drop memoized user recommendations after new purchases."""
+        user_recommendations_cache.clear()
+
+    @redis_cached(ttl=300)
     def get_frequently_bought_together(
         self, product_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
-        """Get products frequently bought together with the given product."""
-        with self.client.driver.session() as session:
+        """Get products frequently bought together with the given product.
+
+        Reads the CO_PURCHASED edges kept by ``Neo4jClient.refresh_co_purchases``.
+        """
+        return list(self.iter_frequently_bought_together(product_id, limit))
+
+    def iter_frequently_bought_together(
+        self, product_id: str, limit: int = 5
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield products frequently bought together as records arrive.
+
+        This stays an auto-commit query: a managed transaction would buffer
+        every record before the first could be yielded.
+        """
+        with self._read_session() as session:
             result = session.run(
                 """
-                MATCH (p:Product {id: $product_id})<-[:PURCHASED]-(u:User)-[:PURCHASED]->(other:Product)
-                WHERE other.id <> $product_id
-                WITH other, count(*) as freq
-                ORDER BY freq DESC
+                MATCH (p:Product {id: $product_id})-[r:CO_PURCHASED]-(other:Product)
+                RETURN other.id as product_id, other.name as name, other.price as price, r.score as frequency
+                ORDER BY r.score DESC
                 LIMIT $limit
-                RETURN other.id as product_id, other.name as name, other.price as price, freq as frequency
                 """,
                 product_id=product_id,
                 limit=limit,
             )
-            return [record.data() for record in result]
+            for record in result:
+                yield record.data()
 
+    @redis_cached(ttl=300)
     def get_similar_products(
         self, product_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
         """Get products similar to the given product based on SIMILAR_TO relationships."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Product {id: $product_id})-[r:SIMILAR_TO]->(similar:Product)
-                RETURN similar.id as product_id, similar.name as name, similar.price as price, r.score as similarity
-                ORDER BY r.score DESC
-                LIMIT $limit
-                """,
-                product_id=product_id,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        # Neighbours precomputed by the graph loader; query the graph if absent
+        with suppress(Exception):
+            cached = redis_client.get_similar_products(product_id, limit)
+            if cached:
+                return cached
+
+        return self._read(
+            """
+            MATCH (p:Product {id: $product_id})-[r:SIMILAR_TO]->(similar:Product)
+            RETURN similar.id as product_id, similar.name as name, similar.price as price, r.score as similarity
+            ORDER BY r.score DESC
+            LIMIT $limit
+            """,
+            product_id=product_id,
+            limit=limit,
+        )
 
+    @redis_cached(ttl=300)
     def get_category_recommendations(
         self, category_name: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Get popular products in a specific category."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Product)-[:BELONGS_TO]->(c:Category {name: $category_name})
-                OPTIONAL MATCH (p)<-[:PURCHASED]-(u:User)
-                WITH p, count(u) as purchase_count
-                ORDER BY purchase_count DESC
-                LIMIT $limit
-                RETURN p.id as product_id, p.name as name, p.price as price, purchase_count
-                """,
-                category_name=category_name,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        return self._read(
+            """
+            MATCH (p:Product)-[:BELONGS_TO]->(c:Category {name: $category_name})
+            OPTIONAL MATCH (p)<-[:PURCHASED]-(u:User)
+            WITH p, count(u) as purchase_count
+            ORDER BY purchase_count DESC
+            LIMIT $limit
+            RETURN p.id as product_id, p.name as name, p.price as price, purchase_count
+            """,
+            category_name=category_name,
+            limit=limit,
+        )
 
+    @redis_cached(ttl=60)
     def get_trending_products(
         self, days: int = 30, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Get trending products based on recent purchases."""
-        cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        return self._execute_read(self._trending_tx, days, limit)
 
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (u:User)-[r:PURCHASED]->(p:Product)
-                WHERE r.date >= $cutoff_date
-                WITH p, count(*) as recent_purchases
-                ORDER BY recent_purchases DESC
-                LIMIT $limit
-                RETURN p.id as product_id, p.name as name, p.price as price, recent_purchases
-                """,
-                cutoff_date=cutoff_date,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+    @staticmethod
+    def _trending_tx(tx, days: int, limit: int) -> List[Dict[str, Any]]:
+        """Run the recent-purchases trending query on a transaction."""
+        cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        result = tx.run(
+            """
+            MATCH (u:User)-[r:PURCHASED]->(p:Product)
+            WHERE r.date >= $cutoff_date
+            WITH p, count(*) as recent_purchases
+            ORDER BY recent_purchases DESC
+            LIMIT $limit
+            RETURN p.id as product_id, p.name as name, p.price as price, recent_purchases
+            """,
+            cutoff_date=cutoff_date,
+            limit=limit,
+        )
+        return [record.data() for record in result]
 
     def get_user_purchase_history(
         self, user_id: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Get user's purchase history."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (u:User {id: $user_id})-[r:PURCHASED]->(p:Product)
-                RETURN p.id as product_id, p.name as name, p.price as price, r.date as purchase_date, r.quantity
-                ORDER BY r.date DESC
-                LIMIT $limit
-                """,
-                user_id=user_id,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        return self._read(
+            """
+            MATCH (u:User {id: $user_id})-[r:PURCHASED]->(p:Product)
+            RETURN p.id as product_id, p.name as name, p.price as price, r.date as purchase_date, r.quantity
+            ORDER BY r.date DESC
+            LIMIT $limit
+            """,
+            user_id=user_id,
+            limit=limit,
+        )
 
+    @redis_cached(ttl=300)
     def get_also_bought_recommendations(
         self, product_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
         """Get 'users who bought this also bought' recommendations."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Product {id: $product_id})<-[:PURCHASED]-(u:User)-[:PURCHASED]->(other:Product)
-                WHERE other.id <> $product_id
-                WITH other, count(DISTINCT u) as user_count
-                ORDER BY user_count DESC
-                LIMIT $limit
-                RETURN other.id as product_id, other.name as name, other.price as price, user_count
-                """,
-                product_id=product_id,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        return self._read(
+            """
+            MATCH (p:Product {id: $product_id})-[r:CO_PURCHASED]-(other:Product)
+            RETURN other.id as product_id, other.name as name, other.price as price, r.score as user_count
+            ORDER BY r.score DESC
+            LIMIT $limit
+            """,
+            product_id=product_id,
+            limit=limit,
+        )
 
     def get_personalized_category_recommendations(
         self, user_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
         """Get category recommendations based on user's interests and purchase history."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (u:User {id: $user_id})-[:PURCHASED]->(p:Product)-[:BELONGS_TO]->(c:Category)
-                WITH c, count(*) as user_purchases
-                ORDER BY user_purchases DESC
-                LIMIT 3
-                MATCH (c)<-[:BELONGS_TO]-(popular:Product)
-                OPTIONAL MATCH (popular)<-[:PURCHASED]-(buyers:User)
-                WITH popular, count(buyers) as total_purchases
-                ORDER BY total_purchases DESC
-                LIMIT $limit
-                RETURN popular.id as product_id, popular.name as name, popular.price as price, total_purchases
-                """,
-                user_id=user_id,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        return self._execute_read(self._personalized_cat_tx, user_id, limit)
+
+    @staticmethod
+    def _personalized_cat_tx(tx, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Run the favourite-categories recommendation query on a transaction."""
+        result = tx.run(
+            """
+            MATCH (u:User {id: $user_id})-[:PURCHASED]->(p:Product)-[:BELONGS_TO]->(c:Category)
+            WITH c, count(*) as user_purchases
+            ORDER BY user_purchases DESC
+            LIMIT 3
+            MATCH (c)<-[:BELONGS_TO]-(popular:Product)
+            OPTIONAL MATCH (popular)<-[:PURCHASED]-(buyers:User)
+            WITH popular, count(buyers) as total_purchases
+            ORDER BY total_purchases DESC
+            LIMIT $limit
+            RETURN popular.id as product_id, popular.name as name, popular.price as price, total_purchases
+            """,
+            user_id=user_id,
+            limit=limit,
+        )
+        return [record.data() for record in result]
 
     def get_cross_category_recommendations(
         self, user_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
         """Get recommendations across different categories based on user behavior."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (u:User {id: $user_id})-[:PURCHASED]->(p:Product)-[:BELONGS_TO]->(c:Category)
-                WITH c, count(*) as category_purchases
-                ORDER BY category_purchases DESC
-                LIMIT 2
-                MATCH (c)<-[:BELONGS_TO]-(p2:Product)
-                WHERE NOT (u)-[:PURCHASED]->(p2)
-                OPTIONAL MATCH (p2)<-[:PURCHASED]-(other_users:User)
-                WITH p2, count(other_users) as popularity
-                ORDER BY popularity DESC
-                LIMIT $limit
-                RETURN p2.id as product_id, p2.name as name, p2.price as price, popularity
-                """,
-                user_id=user_id,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        return self._read(
+            """
+            MATCH (u:User {id: $user_id})-[:PURCHASED]->(p:Product)-[:BELONGS_TO]->(c:Category)
+            WITH c, count(*) as category_purchases
+            ORDER BY category_purchases DESC
+            LIMIT 2
+            MATCH (c)<-[:BELONGS_TO]-(p2:Product)
+            WHERE NOT (u)-[:PURCHASED]->(p2)
+            OPTIONAL MATCH (p2)<-[:PURCHASED]-(other_users:User)
+            WITH p2, count(other_users) as popularity
+            ORDER BY popularity DESC
+            LIMIT $limit
+            RETURN p2.id as product_id, p2.name as name, p2.price as price, popularity
+            """,
+            user_id=user_id,
+            limit=limit,
+        )
 
+    @redis_cached(ttl=60)
     def get_comprehensive_recommendations(
         self, user_id: str, limit: int = 10
     ) -> Dict[str, List[Dict[str, Any]]]:
-        """Get comprehensive recommendations combining multiple strategies."""
-        return {
-            "personalized": self.get_user_recommendations(user_id, limit // 3),
-            "trending": self.get_trending_products(30, limit // 3),
-            "category_based": self.get_personalized_category_recommendations(
-                user_id, limit // 3
-            ),
-        }
+        """Get comprehensive recommendations combining multiple strategies.
 
-    def add_product_view(self, user_id: str, product_id: str):
-        """Record a product view for future recommendations."""
-        with self.client.driver.session() as session:
-            session.run(
+        The three strategies run as subqueries of one Cypher statement, so the
+        whole result comes back in a single record and round trip.
+        """
+        cutoff_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+
+        def read(tx):
+            result = tx.run(
                 """
-                MATCH (u:User {id: $user_id}), (p:Product {id: $product_id})
-                MERGE (u)-[r:VIEWED]->(p)
-                SET r.timestamp = datetime()
+                OPTIONAL MATCH (u:User {id: $user_id})
+                CALL {
+                    WITH u
+                    MATCH (u)-[:PURCHASED]->(p:Product)
+                    WITH u, collect(DISTINCT p) as owned
+                    UNWIND owned as p
+                    MATCH (p)<-[:PURCHASED]-(other:User)
+                    WHERE other <> u
+                    WITH owned, other, count(DISTINCT p) as shared
+                    ORDER BY shared DESC
+                    LIMIT $neighbours
+                    MATCH (other)-[:PURCHASED]->(rec:Product)
+                    WHERE NOT rec IN owned
+                    WITH DISTINCT other, shared, rec
+                    WITH rec, sum(shared) as score
+                    ORDER BY score DESC
+                    LIMIT $limit
+                    RETURN collect({product_id: rec.id, name: rec.name, price: rec.price, frequency: score}) as personalized
+                }
+                CALL {
+                    MATCH (:User)-[r:PURCHASED]->(p:Product)
+                    WHERE r.date >= $cutoff_date
+                    WITH p, count(*) as recent_purchases
+                    ORDER BY recent_purchases DESC
+                    LIMIT $limit
+                    RETURN collect({product_id: p.id, name: p.name, price: p.price, recent_purchases: recent_purchases}) as trending
+                }
+                CALL {
+                    WITH u
+                    MATCH (u)-[:PURCHASED]->(:Product)-[:BELONGS_TO]->(c:Category)
+                    WITH c, count(*) as user_purchases
+                    ORDER BY user_purchases DESC
+                    LIMIT 3
+                    MATCH (c)<-[:BELONGS_TO]-(popular:Product)
+                    OPTIONAL MATCH (popular)<-[:PURCHASED]-(buyers:User)
+                    WITH popular, count(buyers) as total_purchases
+                    ORDER BY total_purchases DESC
+                    LIMIT $limit
+                    RETURN collect({product_id: popular.id, name: popular.name, price: popular.price, total_purchases: total_purchases}) as category_based
+                }
+                RETURN personalized, trending, category_based
                 """,
                 user_id=user_id,
-                product_id=product_id,
+                cutoff_date=cutoff_date,
+                neighbours=SIMILAR_USERS_LIMIT,
+                limit=limit // 3,
             )
+            return result.single().data()
+
+        return self._execute_read(read)
+
+    def add_product_view(self, user_id: str, product_id: str):
+        """Record a product view for future recommendations."""
+        with self.client.driver.session(database=NEO4J_CONFIG.database) as session:
+            session.execute_write(self._record_view_tx, user_id, product_id)
+
+    @staticmethod
+    def _record_view_tx(tx, user_id: str, product_id: str):
+        """Merge the VIEWED relationship on a write transaction."""
+        tx.run(
+            """
+            MATCH (u:User {id: $user_id}), (p:Product {id: $product_id})
+            MERGE (u)-[r:VIEWED]->(p)
+            SET r.timestamp = datetime()
+            """,
+            user_id=user_id,
+            product_id=product_id,
+        ).consume()
 
     def get_recently_viewed(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get user's recently viewed products."""
-        with self.client.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (u:User {id: $user_id})-[r:VIEWED]->(p:Product)
-                RETURN p.id as product_id, p.name as name, p.price as price, r.timestamp as viewed_at
-                ORDER BY r.timestamp DESC
-                LIMIT $limit
-                """,
-                user_id=user_id,
-                limit=limit,
-            )
-            return [record.data() for record in result]
+        return self._read(
+            """
+            MATCH (u:User {id: $user_id})-[r:VIEWED]->(p:Product)
+            RETURN p.id as product_id, p.name as name, p.price as price, r.timestamp as viewed_at
+            ORDER BY r.timestamp DESC
+            LIMIT $limit
+            """,
+            user_id=user_id,
+            limit=limit,
+        )
 
 
 # Singleton instance
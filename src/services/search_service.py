@@ -1,23 +1,78 @@
+import base64
+import functools
 import hashlib
 import json
+import logging
+import threading
+from collections import OrderedDict
 from contextlib import suppress
 from typing import Any
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from src.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_KWARGS,
+    HNSW_EF_SEARCH,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    SEMANTIC_CACHE_PCA_PATH,
+    SEMANTIC_CACHE_PROJECTED_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+)
 from src.db.postgres_client import db
 from src.db.redis_client import redis_client
 
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_INDEX = "semcache:index"
+# Product columns returned by searches (everything but the fts document)
+PRODUCT_COLUMNS = (
+    "p.id, p.name, p.category_id, p.price, p.seller_id, p.description, "
+    "p.tags, p.stock"
+)
+
 
 class SearchService:
     def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.model = SentenceTransformer(
+            "all-MiniLM-L6-v2",
+            backend=EMBEDDING_BACKEND,
+            model_kwargs=EMBEDDING_MODEL_KWARGS,
+        )
         self.cache_hits = 0
+        self.cache_projection = self._load_cache_projection()
+        # Most recently used query embeddings, so repeats skip the model
+        self._embedding_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._embedding_lock = threading.Lock()
+
+    @staticmethod
+    def _load_cache_projection():
+        """Load the PCA fitted by the vector loader, if it has been run."""
+        if not SEMANTIC_CACHE_PCA_PATH.exists():
+            return None
+        with np.load(SEMANTIC_CACHE_PCA_PATH) as data:
+            return data["mean"], data["components"]
 
     def _cache_key(self, query: str, filters: dict) -> str:
         key = json.dumps({"query": query, "filters": filters}, sort_keys=True)
         return "search:" + hashlib.sha256(key.encode()).hexdigest()
 
+    @property
+    def _semantic_cache_index(self) -> str:
+        """Redis list of recent query embeddings for the current projection.
+
+        Each projection gets its own list, so embeddings written under an
+        earlier fit (or none) are never compared with the current ones.
+        """
+        if self.cache_projection is None:
+            return f"{SEMANTIC_CACHE_INDEX}:full"
+        _, components = self.cache_projection
+        version = hashlib.sha256(components.tobytes()).hexdigest()[:12]
+        return f"{SEMANTIC_CACHE_INDEX}:{version}"
+
     def full_text_search(
         self, query: str, filters: dict = None, limit: int = 10
     ) -> list[dict[str, Any]]:
@@ -31,33 +86,17 @@ class SearchService:
                 self.cache_hits += 1
                 return cached
 
-        # Base SQL query
-        if "category" in filters:
-            # Need to join with categories table to filter by category name
-            sql = """
-                SELECT p.* FROM products p
-                JOIN categories c ON p.category_id = c.id
-                WHERE (p.name ILIKE %s OR p.description ILIKE %s OR p.tags ILIKE %s)
-            """
-            params = [f"%{query}%"] * 3
-            sql += " AND c.name = %s"
-            params.append(filters["category"])
-        else:
-            sql = """
-                SELECT * FROM products
-                WHERE (name ILIKE %s OR description ILIKE %s OR tags ILIKE %s)
-            """
-            params = [f"%{query}%"] * 3
-        if "min_price" in filters:
-            sql += " AND price >= %s"
-            params.append(filters["min_price"])
-        if "max_price" in filters:
-            sql += " AND price <= %s"
-            params.append(filters["max_price"])
-        sql += " LIMIT %s"
-        params.append(limit)
+        # Match against the GIN-indexed tsvector, best ranked first
+        source, where, params = self._text_match(query, filters)
+        sql = f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM {source}
+            WHERE {where}
+            ORDER BY ts_rank(p.fts, query) DESC
+            LIMIT %s
+        """
         with db.get_cursor() as cursor:
-            cursor.execute(sql, params)
+            cursor.execute(sql, [*params, limit])
             results = cursor.fetchall()
 
         # Try to cache results, but don't fail if Redis is not available
@@ -66,68 +105,294 @@ class SearchService:
 
         return results
 
+    @staticmethod
+    def _text_match(query: str, filters: dict) -> tuple[str, str, list]:
+        """Build the FROM and WHERE clauses matching ``query`` and ``filters``.
+
+        Matching products are exposed as ``p`` and the parsed query as
+        ``query``; the returned params fill both clauses in order.
+        """
+        tables = "products p"
+        conditions = ["p.fts @@ query"]
+        params = [query]
+        if "category" in filters:
+            # Need to join with categories table to filter by category name
+            tables += " JOIN categories c ON p.category_id = c.id"
+            conditions.append("c.name = %s")
+            params.append(filters["category"])
+        if "min_price" in filters:
+            conditions.append("p.price >= %s")
+            params.append(filters["min_price"])
+        if "max_price" in filters:
+            conditions.append("p.price <= %s")
+            params.append(filters["max_price"])
+        source = f"{tables}, plainto_tsquery('english', %s) query"
+        return source, " AND ".join(conditions), params
+
+    def _semantic_cache_key(
+        self, query: str, limit: int, filters: dict | None = None
+    ) -> str:
+        normalized = " ".join(query.lower().split())
+        key = {"query": normalized, "limit": limit}
+        if filters is not None:
+            # Combined search results also depend on the text filters
+            key["filters"] = filters
+        key = json.dumps(key, sort_keys=True)
+        return "semcache:" + hashlib.sha256(key.encode()).hexdigest()
+
     def semantic_search(self, query: str, limit: int = 10) -> list[dict[str, Any]]:
         """Search products using semantic similarity."""
+        cache_key = self._semantic_cache_key(query, limit)
+
+        # Exact repeat of a recent query: skip the model entirely
+        with suppress(Exception):
+            cached = redis_client.get_json(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
         # Generate embedding for search query
-        query_embedding = self.model.encode(query)
+        query_embedding = self._embed(query)
+
+        # Near-duplicate of a recent query: reuse its results
+        with suppress(Exception):
+            cached = self._semantic_cache_lookup(query_embedding, limit)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
 
         # Find similar products using pgvector
         with db.get_cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT p.*,
-                       1 - (pe.description_embedding <=> %s::vector) as similarity
-                FROM products p
-                JOIN product_embeddings pe ON p.id = pe.product_id
-                ORDER BY pe.description_embedding <=> %s::vector
-                LIMIT %s;
-                """,
-                (query_embedding.tolist(), query_embedding.tolist(), limit),
+            results = self._vector_search(cursor, query_embedding, limit)
+
+        with suppress(Exception):
+            self._semantic_cache_store(cache_key, query_embedding, limit, results)
+
+        return results
+
+    def _embed(self, query: str) -> np.ndarray:
+        """Encode a query, reusing the embedding of a recent identical query."""
+        with self._embedding_lock:
+            embedding = self._embedding_cache.get(query)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(query)
+                return embedding
+
+        embedding = self.model.encode(query)
+        self._remember_embeddings({query: embedding})
+        return embedding
+
+    def _embed_many(self, queries: list[str]) -> list[np.ndarray]:
+        """Encode queries in order, batching the ones not already cached."""
+        with self._embedding_lock:
+            found = {}
+            for query in queries:
+                if query in self._embedding_cache:
+                    self._embedding_cache.move_to_end(query)
+                    found[query] = self._embedding_cache[query]
+
+        misses = [query for query in dict.fromkeys(queries) if query not in found]
+        if misses:
+            encoded = dict(
+                zip(misses, self.model.encode(misses, batch_size=len(misses)))
             )
-            return cursor.fetchall()
+            self._remember_embeddings(encoded)
+            found.update(encoded)
+
+        return [found[query] for query in queries]
+
+    def _remember_embeddings(self, embeddings: dict[str, np.ndarray]):
+        """Add embeddings to the LRU, evicting the least recently used."""
+        with self._embedding_lock:
+            self._embedding_cache.update(embeddings)
+            while len(self._embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+
+    def _semantic_cache_lookup(
+        self, embedding, limit: int, filters: dict | None = None
+    ):
+        """Return cached results for the closest recent query, if close enough.
+
+        Only queries from the same kind of search are compared: ``filters`` is
+        None for semantic search and the text filters for combined search.
+        """
+        entries = [
+            json.loads(entry)
+            for entry in redis_client.client.lrange(self._semantic_cache_index, 0, -1)
+        ]
+        candidates = [
+            entry
+            for entry in entries
+            if entry["limit"] == limit and entry.get("filters") == filters
+        ]
+        if not candidates:
+            return None
+
+        # Stored embeddings are projected, int8-quantised unit vectors. The
+        # index is per projection, so a size mismatch means a corrupt entry.
+        projected = self._project(embedding)
+        vectors = [
+            np.frombuffer(base64.b64decode(entry["embedding"]), dtype=np.int8)
+            for entry in candidates
+        ]
+        keep = [i for i, vector in enumerate(vectors) if len(vector) == len(projected)]
+        if len(keep) < len(vectors):
+            logger.warning(
+                f"Ignoring {len(vectors) - len(keep)} semantic cache entries "
+                f"not of size {len(projected)}"
+            )
+            if not keep:
+                return None
+            candidates = [candidates[i] for i in keep]
+            vectors = [vectors[i] for i in keep]
+
+        matrix = np.stack(vectors).astype(np.float32)
+        scores = (matrix @ projected) / np.linalg.norm(matrix, axis=1)
+        best = int(np.argmax(scores))
+        threshold = (
+            SEMANTIC_CACHE_THRESHOLD
+            if self.cache_projection is None
+            else SEMANTIC_CACHE_PROJECTED_THRESHOLD
+        )
+        if scores[best] < threshold:
+            return None
+
+        return redis_client.get_json(candidates[best]["key"])
+
+    def _semantic_cache_store(
+        self,
+        cache_key: str,
+        embedding,
+        limit: int,
+        results: list[dict[str, Any]],
+        filters: dict | None = None,
+    ):
+        """Cache results and remember the query embedding for near matches."""
+        redis_client.set_json(cache_key, results, ttl=SEMANTIC_CACHE_TTL)
+
+        entry = {
+            "key": cache_key,
+            "limit": limit,
+            "embedding": base64.b64encode(self._quantize(embedding).tobytes()).decode(),
+        }
+        if filters is not None:
+            entry["filters"] = filters
+        entry = json.dumps(entry)
+        pipe = redis_client.client.pipeline()
+        index = self._semantic_cache_index
+        pipe.lpush(index, entry)
+        pipe.ltrim(index, 0, SEMANTIC_CACHE_SIZE - 1)
+        pipe.expire(index, SEMANTIC_CACHE_TTL)
+        pipe.execute()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _project(self, embedding) -> np.ndarray:
+        """Reduce a query embedding with the cache PCA and normalise it."""
+        if self.cache_projection is None:
+            return self._normalize(embedding)
+        mean, components = self.cache_projection
+        return self._normalize((np.asarray(embedding) - mean) @ components.T)
+
+    def _quantize(self, embedding) -> np.ndarray:
+        """Scale a projected unit vector onto int8, a quarter of the float32 size."""
+        return np.round(self._project(embedding) * 127).astype(np.int8)
+
+    def prefetch_embeddings(self, queries: list[str]):
+        """Encode queries in one batched pass so the searches that follow
+        take their embeddings from the in-process cache instead of the model.
+        """
+        if queries:
+            self._embed_many(queries)
+
+    def _vector_search(self, cursor, embedding, limit: int) -> list[dict[str, Any]]:
+        """Find the products nearest to an embedding using pgvector."""
+        cursor.execute(
+            f"""
+            SET LOCAL hnsw.ef_search = %s;
+            SELECT {PRODUCT_COLUMNS},
+                   1 - (pe.description_embedding <=> %s::halfvec) as similarity
+            FROM products p
+            JOIN product_embeddings pe ON p.id = pe.product_id
+            ORDER BY pe.description_embedding <=> %s::halfvec
+            LIMIT %s;
+            """,
+            (HNSW_EF_SEARCH, embedding, embedding, limit),
+        )
+        return cursor.fetchall()
 
     def combined_search(
         self, query: str, filters: dict = None, limit: int = 10
     ) -> list[dict[str, Any]]:
-        """Combine full-text and semantic search for better results."""
+        """Combine full-text and semantic search for better results.
+
+        Both searches and the weighted merge run as one SQL statement. Text
+        matches (filtered) score 1.0, nearest neighbours add half their
+        similarity, so products found by both rank highest. Each row carries
+        the product columns plus ``similarity`` (None for text-only matches)
+        and ``score``.
+
+        Results go through the same exact and near-duplicate cache as
+        ``semantic_search``, kept apart from it and per set of filters.
+        """
         filters = filters or {}
+        cache_key = self._semantic_cache_key(query, limit, filters)
 
-        # Get results from both search methods
-        text_results = self.full_text_search(query, filters, limit)
-        semantic_results = self.semantic_search(query, limit)
-
-        # Create a combined result set
-        combined_results = {}
-
-        # Add text search results with higher weight
-        for result in text_results:
-            product_id = result["id"]
-            combined_results[product_id] = {
-                "product": result,
-                "score": 1.0,  # High weight for exact matches
-                "source": "text",
-            }
-
-        # Add semantic search results with lower weight
-        for result in semantic_results:
-            product_id = result["id"]
-            if product_id in combined_results:
-                # Boost score if found in both searches
-                combined_results[product_id]["score"] += result["similarity"] * 0.5
-                combined_results[product_id]["source"] = "combined"
-            else:
-                combined_results[product_id] = {
-                    "product": result,
-                    "score": result["similarity"] * 0.5,
-                    "source": "semantic",
-                }
-
-        # Sort by combined score and return top results
-        sorted_results = sorted(
-            combined_results.values(), key=lambda x: x["score"], reverse=True
-        )
+        with suppress(Exception):
+            cached = redis_client.get_json(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
 
-        return [item["product"] for item in sorted_results[:limit]]
+        embedding = self._embed(query)
+
+        # Near-duplicate of a recent combined query with the same filters
+        with suppress(Exception):
+            cached = self._semantic_cache_lookup(embedding, limit, filters)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        source, where, params = self._text_match(query, filters)
+        with db.get_cursor() as cursor:
+            cursor.execute(
+                f"""
+                SET LOCAL hnsw.ef_search = %s;
+                WITH txt AS (
+                    SELECT p.id, ts_rank(p.fts, query) AS rank
+                    FROM {source}
+                    WHERE {where}
+                    ORDER BY rank DESC
+                    LIMIT %s
+                ),
+                sem AS (
+                    SELECT pe.product_id AS id,
+                           1 - (pe.description_embedding <=> %s::halfvec) AS similarity
+                    FROM product_embeddings pe
+                    ORDER BY pe.description_embedding <=> %s::halfvec
+                    LIMIT %s
+                )
+                SELECT {PRODUCT_COLUMNS}, sem.similarity,
+                       CASE WHEN txt.id IS NULL THEN 0 ELSE 1.0 END
+                       + COALESCE(sem.similarity, 0) * 0.5 AS score
+                FROM txt
+                FULL JOIN sem ON sem.id = txt.id
+                JOIN products p ON p.id = COALESCE(txt.id, sem.id)
+                ORDER BY score DESC, txt.rank DESC NULLS LAST
+                LIMIT %s;
+                """,
+                [HNSW_EF_SEARCH, *params, limit, embedding, embedding, limit, limit],
+            )
+            results = cursor.fetchall()
+
+        with suppress(Exception):
+            self._semantic_cache_store(cache_key, embedding, limit, results, filters)
+
+        return results
 
     def natural_language_search(
         self, query: str, limit: int = 10
@@ -176,6 +441,12 @@ class SearchService:
             return self.semantic_search(result["description"], limit)
 
 
+@functools.lru_cache(maxsize=1)
+def get_search_service() -> SearchService:
+    """Return a shared SearchService so the embedding model is loaded once."""
+    return SearchService()
+
+
 if __name__ == "__main__":
     service = SearchService()
     print("Full-text search results:")
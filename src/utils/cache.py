@@ -0,0 +1,94 @@
+"""Memoization helpers, in Redis and in-process."""
+
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Callable, Hashable
+
+from src.config import RECOMMENDATIONS_TTL
+from src.db.redis_client import redis_client
+
+
+def redis_cached(ttl: int = 60, prefix: str = "cache"):
+    """Decorator to cache a service method's result in Redis.
+
+    The key is built from the method name and its arguments; the bound
+    instance is left out, so the method must depend only on its arguments.
+    Results must be JSON-serialisable. If Redis is unavailable the method is
+    simply called.
+
+    Args:
+        ttl: Seconds to keep a cached result
+        prefix: Key namespace in Redis
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            payload = json.dumps([args, kwargs], sort_keys=True, default=str)
+            digest = hashlib.md5(payload.encode()).hexdigest()
+            key = f"{prefix}:{func.__qualname__}:{digest}"
+
+            with suppress(Exception):
+                cached = redis_client.get_json(key)
+                if cached is not None:
+                    return cached
+
+            result = func(self, *args, **kwargs)
+
+            with suppress(Exception):
+                redis_client.set_json(key, result, ttl=ttl)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Args:
+        maxsize: Entries kept before the least recently used is evicted
+        ttl: Seconds an entry stays valid
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Purchase-history recommendations keyed by (user_id, limit). A purchase can
+# change any user's neighbours, so purchase writes clear it wholesale.
+user_recommendations_cache = TTLCache(maxsize=128, ttl=RECOMMENDATIONS_TTL)
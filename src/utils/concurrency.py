@@ -0,0 +1,15 @@
+"""Helpers for running independent I/O-bound steps concurrently."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+def run_concurrently(*steps: Callable[[], object]) -> list:
+    """Run steps on a thread pool and return their results in order.
+
+    Every step runs to completion; the first failure, in argument order, is
+    then re-raised.
+    """
+    with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+        futures = [executor.submit(step) for step in steps]
+    return [future.result() for future in futures]
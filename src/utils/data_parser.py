@@ -55,6 +55,27 @@ class CachedDataParser(DataParser):
             self._cache["products"] = super().parse_products()
         return self._cache["products"]
 
+    @override
+    def parse_users(self) -> pd.DataFrame:
+        """Parse users with caching."""
+        if "users" not in self._cache:
+            self._cache["users"] = super().parse_users()
+        return self._cache["users"]
+
+    @override
+    def parse_categories(self) -> pd.DataFrame:
+        """Parse categories with caching."""
+        if "categories" not in self._cache:
+            self._cache["categories"] = super().parse_categories()
+        return self._cache["categories"]
+
+    @override
+    def parse_sellers(self) -> pd.DataFrame:
+        """Parse sellers with caching."""
+        if "sellers" not in self._cache:
+            self._cache["sellers"] = super().parse_sellers()
+        return self._cache["sellers"]
+
     def get_data(self, data_type: str) -> pd.DataFrame:
         """Get data by type using if-elif statements for Python 3.8 compatibility."""
         if data_type == "products":
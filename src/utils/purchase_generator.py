@@ -84,15 +84,15 @@ class PurchaseGenerator:
                 }
             )
 
-            # Create order items
-            for _, purchase in group.iterrows():
+            # Create order items; itertuples yields native Python scalars
+            for purchase in group.itertuples(index=False):
                 order_items.append(
                     {
                         "order_id": order_id,
-                        "product_id": purchase["product_id"],
-                        "quantity": int(purchase["quantity"]),  # Convert to native Python int
-                        "unit_price": float(purchase["unit_price"]),  # Convert to native Python float
-                        "total_price": float(purchase["total_price"]),  # Convert to native Python float
+                        "product_id": purchase.product_id,
+                        "quantity": int(purchase.quantity),
+                        "unit_price": float(purchase.unit_price),
+                        "total_price": float(purchase.total_price),
                     }
                 )
 
@@ -126,16 +126,17 @@ class PurchaseGenerator:
 
     def load_purchases_to_neo4j(self, purchases: pd.DataFrame):
         """Load purchases into Neo4j as PURCHASED relationships."""
-        for _, purchase in purchases.iterrows():
-            neo4j_client.add_purchase(
-                user_id=purchase["user_id"],
-                product_id=purchase["product_id"],
-                quantity=purchase["quantity"],
-                date=purchase["purchase_date"],
-            )
+        neo4j_client.add_purchases(
+            purchases[["user_id", "product_id", "quantity", "purchase_date"]]
+            .rename(columns={"purchase_date": "date"})
+            .to_dict("records")
+        )
 
         print(f"Loaded {len(purchases)} purchase relationships to Neo4j")
 
+        neo4j_client.refresh_co_purchases()
+        print("Refreshed co-purchase scores in Neo4j")
+
     def generate_and_load_all(self, num_purchases: int = 100):
         """Generate purchases and load into all databases."""
         print(f"Generating {num_purchases} purchases...")
@@ -0,0 +1,105 @@
+"""Tests for the memoization helpers."""
+
+from unittest.mock import Mock, patch
+
+from src.utils.cache import TTLCache, redis_cached
+
+
+class Service:
+    def __init__(self):
+        self.backend = Mock(return_value=[{"product_id": "P001"}])
+
+    @redis_cached(ttl=30)
+    def lookup(self, user_id, limit=5):
+        return self.backend(user_id, limit)
+
+
+class TestRedisCached:
+    @patch("src.utils.cache.redis_client")
+    def test_cache_miss_stores_result(self, mock_redis_client):
+        """Test a miss calls through and stores the result with the TTL."""
+        mock_redis_client.get_json.return_value = None
+        service = Service()
+
+        result = service.lookup("U001", limit=3)
+
+        assert result == [{"product_id": "P001"}]
+        service.backend.assert_called_once_with("U001", 3)
+        key, value = mock_redis_client.set_json.call_args.args
+        assert key.startswith("cache:Service.lookup:")
+        assert value == result
+        assert mock_redis_client.set_json.call_args.kwargs["ttl"] == 30
+
+    @patch("src.utils.cache.redis_client")
+    def test_cache_hit_skips_call(self, mock_redis_client):
+        """Test a hit returns the cached value without calling through."""
+        mock_redis_client.get_json.return_value = [{"product_id": "P002"}]
+        service = Service()
+
+        result = service.lookup("U001")
+
+        assert result == [{"product_id": "P002"}]
+        service.backend.assert_not_called()
+        mock_redis_client.set_json.assert_not_called()
+
+    @patch("src.utils.cache.redis_client")
+    def test_different_arguments_use_different_keys(self, mock_redis_client):
+        """Test the cache key depends on the call arguments."""
+        mock_redis_client.get_json.return_value = None
+        service = Service()
+
+        service.lookup("U001")
+        service.lookup("U002")
+
+        keys = [c.args[0] for c in mock_redis_client.set_json.call_args_list]
+        assert keys[0] != keys[1]
+
+    @patch("src.utils.cache.redis_client")
+    def test_redis_error_falls_through(self, mock_redis_client):
+        """Test Redis failures do not break the wrapped method."""
+        mock_redis_client.get_json.side_effect = Exception("Redis error")
+        mock_redis_client.set_json.side_effect = Exception("Redis error")
+        service = Service()
+
+        assert service.lookup("U001") == [{"product_id": "P001"}]
+
+
+class TestTTLCache:
+    def test_get_returns_stored_value(self):
+        """Test a stored value is returned until it expires."""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set(("U001", 5), ("P001",))
+
+        assert cache.get(("U001", 5)) == ("P001",)
+        assert cache.get(("U001", 3)) is None
+
+    @patch("src.utils.cache.time.monotonic")
+    def test_entries_expire(self, mock_monotonic):
+        """Test entries are dropped once their TTL has passed."""
+        mock_monotonic.return_value = 100.0
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("U001", ("P001",))
+
+        mock_monotonic.return_value = 131.0
+
+        assert cache.get("U001") is None
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the cache keeps at most maxsize entries."""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("U001", 1)
+        cache.set("U002", 2)
+        cache.get("U001")
+        cache.set("U003", 3)
+
+        assert cache.get("U001") == 1
+        assert cache.get("U002") is None
+        assert cache.get("U003") == 3
+
+    def test_clear(self):
+        """Test clear drops every entry."""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("U001", 1)
+        cache.clear()
+
+        assert cache.get("U001") is None
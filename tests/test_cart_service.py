@@ -1,5 +1,7 @@
 """Tests for cart service functionality."""
 
+import json
+
 import pytest
 from unittest.mock import Mock, patch
 
@@ -24,42 +26,77 @@ class TestCartService:
         assert cart == {"P001": 2, "P002": 1}
         mock_redis_client.client.hgetall.assert_called_once_with(f"cart:{self.user_id}")
 
-    @patch("src.services.cart_service.redis_client")
     @patch("src.services.cart_service.db")
-    def test_add_to_cart_success(self, mock_db, mock_redis_client):
+    def test_add_to_cart_success(self, mock_db):
         """Test successfully adding item to cart."""
-        # Mock product verification
-        mock_cursor = Mock()
-        mock_cursor.fetchone.return_value = {"id": "P001", "stock": 10}
-        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        # Stock is mirrored in Redis, so the script checks and adds in one call
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_to_cart_if_in_stock.return_value = 1
 
         result = self.cart_service.add_to_cart(self.user_id, self.product_id, 2)
 
         assert result is True
-        mock_redis_client.client.hincrby.assert_called_once_with(
-            f"cart:{self.user_id}", self.product_id, 2
+        mock_redis_client.add_to_cart_if_in_stock.assert_called_once_with(
+            self.user_id, self.product_id, 2, self.cart_service.cart_ttl
         )
-        mock_redis_client.client.expire.assert_called_once()
+        mock_db.get_cursor.assert_not_called()
 
-    @patch("src.services.cart_service.redis_client")
     @patch("src.services.cart_service.db")
-    def test_add_to_cart_insufficient_stock(self, mock_db, mock_redis_client):
+    def test_add_to_cart_insufficient_stock(self, mock_db):
         """Test adding item to cart with insufficient stock."""
-        # Mock product verification - insufficient stock
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_to_cart_if_in_stock.return_value = 0
         mock_cursor = Mock()
-        mock_cursor.fetchone.return_value = {"id": "P001", "stock": 1}
+        mock_cursor.fetchone.return_value = {"id": "P001", "stock": 3}
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
-        result = self.cart_service.add_to_cart(self.user_id, self.product_id, 5)
+        result = self.cart_service.add_to_cart(self.user_id, "P001", 5)
 
         assert result is False
-        mock_redis_client.client.hincrby.assert_not_called()
+        # The short mirror is confirmed against PostgreSQL and refreshed
+        mock_redis_client.set_product_stock.assert_called_once_with({"P001": 3})
+        mock_redis_client.add_to_cart_if_in_stock.assert_called_once()
+
+    @patch("src.services.cart_service.db")
+    def test_add_to_cart_stale_stock_mirror(self, mock_db):
+        """Test a stale short mirror is refreshed from PostgreSQL."""
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_to_cart_if_in_stock.side_effect = [0, 1]
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = {"id": "P001", "stock": 10}
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        result = self.cart_service.add_to_cart(self.user_id, "P001", 5)
+
+        assert result is True
+        mock_redis_client.set_product_stock.assert_called_once_with({"P001": 10})
+        assert mock_redis_client.add_to_cart_if_in_stock.call_count == 2
 
-    @patch("src.services.cart_service.redis_client")
     @patch("src.services.cart_service.db")
-    def test_add_to_cart_product_not_found(self, mock_db, mock_redis_client):
+    def test_add_to_cart_stock_not_mirrored(self, mock_db):
+        """Test stock is loaded from PostgreSQL when Redis has no copy."""
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_to_cart_if_in_stock.side_effect = [-1, 1]
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = {"id": "P001", "stock": 10}
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        result = self.cart_service.add_to_cart(self.user_id, "P001", 2)
+
+        assert result is True
+        mock_redis_client.set_product_stock.assert_called_once_with({"P001": 10})
+        assert mock_redis_client.add_to_cart_if_in_stock.call_count == 2
+
+    @patch("src.services.cart_service.db")
+    def test_add_to_cart_product_not_found(self, mock_db):
         """Test adding non-existent product to cart."""
-        # Mock product verification - product not found
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_to_cart_if_in_stock.return_value = -1
         mock_cursor = Mock()
         mock_cursor.fetchone.return_value = None
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
@@ -67,8 +104,52 @@ class TestCartService:
         result = self.cart_service.add_to_cart(self.user_id, self.product_id, 1)
 
         assert result is False
+        mock_redis_client.add_to_cart_if_in_stock.assert_called_once()
+
+    @patch("src.services.cart_service.db")
+    def test_add_many_to_cart(self, mock_db):
+        """Test adding several items to cart through the stock-checking script."""
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_items_to_cart_if_in_stock.return_value = [1, 1]
+
+        result = self.cart_service.add_many_to_cart(
+            self.user_id, [("P001", 2), ("P002", 1)]
+        )
+
+        assert result == [True, True]
+        mock_redis_client.add_items_to_cart_if_in_stock.assert_called_once_with(
+            self.user_id, [("P001", 2), ("P002", 1)], self.cart_service.cart_ttl
+        )
+        mock_db.get_cursor.assert_not_called()
         mock_redis_client.client.hincrby.assert_not_called()
 
+    @patch("src.services.cart_service.db")
+    def test_add_many_to_cart_reloads_stock(self, mock_db):
+        """Test unmirrored or short items are rechecked against PostgreSQL."""
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.add_items_to_cart_if_in_stock.side_effect = [
+            [1, -1, 0, -1],
+            [1, 0],
+        ]
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [
+            {"id": "P002", "name": "Product 2", "price": 15.0, "stock": 10},
+            {"id": "P003", "name": "Product 3", "price": 5.0, "stock": 1},
+        ]
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        result = self.cart_service.add_many_to_cart(
+            self.user_id, [("P001", 2), ("P002", 1), ("P003", 5), ("P999", 1)]
+        )
+
+        assert result == [True, True, False, False]
+        mock_redis_client.set_product_stock.assert_called_once()
+        # Only known products are retried, in one more script call
+        retried = mock_redis_client.add_items_to_cart_if_in_stock.call_args.args[1]
+        assert retried == [("P002", 1), ("P003", 5)]
+
     @patch("src.services.cart_service.redis_client")
     def test_remove_from_cart(self, mock_redis_client):
         """Test removing item from cart."""
@@ -111,14 +192,18 @@ class TestCartService:
         result = self.cart_service.clear_cart(self.user_id)
 
         assert result is True
-        mock_redis_client.client.delete.assert_called_once_with(f"cart:{self.user_id}")
+        mock_redis_client.client.delete.assert_called_once_with(
+            f"cart:{self.user_id}", f"cart_total:{self.user_id}"
+        )
 
-    @patch("src.services.cart_service.redis_client")
     @patch("src.services.cart_service.db")
-    def test_get_cart_total_with_items(self, mock_db, mock_redis_client):
+    def test_get_cart_total_with_items(self, mock_db):
         """Test getting cart total with items."""
-        # Mock cart contents
-        mock_redis_client.client.hgetall.return_value = {"P001": "2", "P002": "1"}
+        # Mock cart contents and TTL, read through one pipeline
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_pipe = mock_redis_client.client.pipeline.return_value
+        mock_pipe.execute.return_value = [{"P001": "2", "P002": "1"}, 3600, None]
 
         # Mock product details
         mock_cursor = Mock()
@@ -133,17 +218,64 @@ class TestCartService:
         assert cart_total["total"] == 35.0  # (2 * 10) + (1 * 15)
         assert len(cart_total["items"]) == 2
         assert cart_total["item_count"] == 2
+        assert cart_total["expiry"] == 3600
+        mock_pipe.ttl.assert_called_once_with(f"cart:{self.user_id}")
+        mock_redis_client.client.ttl.assert_not_called()
+        # The priced cart is cached for repeated views
+        key = mock_redis_client.set_json.call_args.args[0]
+        assert key == f"cart_total:{self.user_id}"
 
-    @patch("src.services.cart_service.redis_client")
-    def test_get_cart_total_empty(self, mock_redis_client):
+    @patch("src.services.cart_service.db")
+    def test_get_cart_total_cache_write_failure(self, mock_db):
+        """Test a failed cache write still returns the priced cart."""
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_pipe = mock_redis_client.client.pipeline.return_value
+        mock_pipe.execute.return_value = [{"P001": "2"}, 3600, None]
+        mock_redis_client.set_json.side_effect = Exception("Redis error")
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [
+            {"id": "P001", "name": "Product 1", "price": 10.0},
+        ]
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        cart_total = self.cart_service.get_cart_total(self.user_id)
+
+        assert cart_total["total"] == 20.0
+
+    @patch("src.services.cart_service.db")
+    def test_get_cart_total_cached(self, mock_db):
+        """Test a cached cart total is served without querying products."""
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        cached = {"total": 20.0, "items": [{"product_id": "P001"}], "item_count": 1}
+        mock_redis_client.client.pipeline.return_value.execute.return_value = [
+            {"P001": "2"},
+            1200,
+            json.dumps(cached),
+        ]
+
+        cart_total = self.cart_service.get_cart_total(self.user_id)
+
+        assert cart_total == {**cached, "expiry": 1200}
+        mock_db.get_cursor.assert_not_called()
+
+    def test_get_cart_total_empty(self):
         """Test getting cart total for empty cart."""
-        mock_redis_client.client.hgetall.return_value = {}
+        mock_redis_client = Mock()
+        self.cart_service.redis = mock_redis_client
+        mock_redis_client.client.pipeline.return_value.execute.return_value = [
+            {},
+            -2,
+            None,
+        ]
 
         cart_total = self.cart_service.get_cart_total(self.user_id)
 
         assert cart_total["total"] == 0.0
         assert cart_total["items"] == []
         assert cart_total["item_count"] == 0
+        assert cart_total["expiry"] is None
 
     @patch("src.services.cart_service.redis_client")
     @patch("src.services.cart_service.db")
@@ -164,7 +296,9 @@ class TestCartService:
         order_id = self.cart_service.convert_cart_to_order(self.user_id)
 
         assert order_id == 1
-        mock_redis_client.client.delete.assert_called_once_with(f"cart:{self.user_id}")
+        mock_redis_client.client.delete.assert_called_once_with(
+            f"cart:{self.user_id}", f"cart_total:{self.user_id}"
+        )
 
     @patch("src.services.cart_service.redis_client")
     def test_convert_cart_to_order_empty(self, mock_redis_client):
@@ -252,8 +386,10 @@ class TestCartService:
 
         assert products == {}
 
+    @patch("src.services.cart_service.neo4j_client")
+    @patch("src.services.cart_service.invalidate_order_stats")
     @patch("src.services.cart_service.db")
-    def test_create_order(self, mock_db):
+    def test_create_order(self, mock_db, mock_invalidate, mock_neo4j):
         """Test creating order in PostgreSQL."""
         cart_total = {
             "total": 35.0,
@@ -264,14 +400,36 @@ class TestCartService:
         }
 
         mock_cursor = Mock()
-        mock_cursor.fetchone.return_value = {"id": 1}  # Order ID
+        # Order id and updated stock levels
+        mock_cursor.fetchone.return_value = {
+            "id": 1,
+            "stock": [{"id": "P001", "stock": 8}, {"id": "P002", "stock": 4}],
+        }
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        self.cart_service.redis = Mock()
 
         order_id = self.cart_service._create_order(self.user_id, cart_total)
 
         assert order_id == 1
-        # Should execute multiple SQL statements (order + order items + stock updates)
-        assert mock_cursor.execute.call_count >= 5
+        # Order, items and stock changes are written by one statement
+        mock_cursor.execute.assert_called_once()
+        params = mock_cursor.execute.call_args.args[1]
+        assert params[3:] == (
+            ["P001", "P002"],
+            [2, 1],
+            [10.0, 15.0],
+            [20.0, 15.0],
+        )
+        # Updated stock levels are mirrored for the add-to-cart check
+        self.cart_service.redis.set_product_stock.assert_called_once_with(
+            {"P001": 8, "P002": 4}
+        )
+        # Checkout orders show up in cached order statistics straight away
+        mock_invalidate.assert_called_once_with(self.user_id)
+        # Purchases reach the recommendation graph, like OrderService orders
+        purchases = mock_neo4j.add_purchases.call_args.args[0]
+        assert [p["product_id"] for p in purchases] == ["P001", "P002"]
+        mock_neo4j.refresh_co_purchases.assert_called_once()
 
 
 @pytest.mark.integration
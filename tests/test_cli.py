@@ -1,5 +1,9 @@
 """Tests for CLI functionality."""
 
+import sys
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
 from click.testing import CliRunner
@@ -11,8 +15,14 @@ class TestCLI:
     def setup_method(self):
         """Set up test fixtures."""
         self.runner = CliRunner()
-
-    @patch("src.cli.RelationalLoader")
+        # Search tests patch SearchService, so drop any shared instance. Only
+        # an already imported search module can hold one; importing it here
+        # would pull in sentence_transformers for every CLI test.
+        search_service = sys.modules.get("src.services.search_service")
+        if search_service is not None:
+            search_service.get_search_service.cache_clear()
+
+    @patch("src.loaders.relational_loader.RelationalLoader")
     def test_load_relational(self, mock_loader_class):
         """Test loading relational data command."""
         mock_loader = Mock()
@@ -23,7 +33,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_loader.load_all.assert_called_once()
 
-    @patch("src.cli.DocumentLoader")
+    @patch("src.loaders.document_loader.DocumentLoader")
     def test_load_documents(self, mock_loader_class):
         """Test loading document data command."""
         mock_loader = Mock()
@@ -34,7 +44,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_loader.load_all.assert_called_once()
 
-    @patch("src.cli.GraphLoader")
+    @patch("src.loaders.graph_loader.GraphLoader")
     def test_load_graph(self, mock_loader_class):
         """Test loading graph data command."""
         mock_loader = Mock()
@@ -45,7 +55,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_loader.load_all.assert_called_once()
 
-    @patch("src.cli.VectorLoader")
+    @patch("src.loaders.vector_loader.VectorLoader")
     def test_load_vectors(self, mock_loader_class):
         """Test loading vector embeddings command."""
         mock_loader = Mock()
@@ -56,10 +66,10 @@ class TestCLI:
         assert result.exit_code == 0
         mock_loader.load_all.assert_called_once()
 
-    @patch("src.cli.RelationalLoader")
-    @patch("src.cli.DocumentLoader")
-    @patch("src.cli.GraphLoader")
-    @patch("src.cli.VectorLoader")
+    @patch("src.loaders.relational_loader.RelationalLoader")
+    @patch("src.loaders.document_loader.DocumentLoader")
+    @patch("src.loaders.graph_loader.GraphLoader")
+    @patch("src.loaders.vector_loader.VectorLoader")
     def test_load_all(
         self, mock_vector_class, mock_graph_class, mock_doc_class, mock_rel_class
     ):
@@ -82,7 +92,26 @@ class TestCLI:
         mock_graph_loader.load_all.assert_called_once()
         mock_vector_loader.load_all.assert_called_once()
 
-    @patch("src.cli.PurchaseGenerator")
+    @patch("src.loaders.relational_loader.RelationalLoader")
+    @patch("src.loaders.document_loader.DocumentLoader")
+    @patch("src.loaders.graph_loader.GraphLoader")
+    @patch("src.loaders.vector_loader.VectorLoader")
+    def test_load_all_reports_failure(
+        self, mock_vector_class, mock_graph_class, mock_doc_class, mock_rel_class
+    ):
+        """Test a failing loader is reported without stopping the others."""
+        mock_rel_class.return_value.load_all.side_effect = Exception("pg down")
+
+        result = self.runner.invoke(cli, ["load", "all"])
+
+        assert result.exit_code == 0
+        assert "pg down" in result.output
+        mock_doc_class.return_value.load_all.assert_called_once()
+        mock_graph_class.return_value.load_all.assert_called_once()
+        # Embeddings depend on products, so they are skipped
+        mock_vector_class.return_value.load_all.assert_not_called()
+
+    @patch("src.utils.purchase_generator.PurchaseGenerator")
     def test_generate_purchases(self, mock_generator_class):
         """Test purchase generation command."""
         mock_generator = Mock()
@@ -93,7 +122,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_generator.generate_and_load_all.assert_called_once_with(50)
 
-    @patch("src.cli.SearchService")
+    @patch("src.services.search_service.SearchService")
     def test_search_text(self, mock_service_class):
         """Test text search command."""
         mock_service = Mock()
@@ -107,7 +136,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_service.full_text_search.assert_called_once_with("test", None, 5)
 
-    @patch("src.cli.SearchService")
+    @patch("src.services.search_service.SearchService")
     def test_search_semantic(self, mock_service_class):
         """Test semantic search command."""
         mock_service = Mock()
@@ -121,7 +150,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_service.semantic_search.assert_called_once_with("test", 5)
 
-    @patch("src.cli.SearchService")
+    @patch("src.services.search_service.SearchService")
     def test_search_combined(self, mock_service_class):
         """Test combined search command."""
         mock_service = Mock()
@@ -135,7 +164,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_service.combined_search.assert_called_once_with("test", None, 5)
 
-    @patch("src.cli.cart_service")
+    @patch("src.services.cart_service.cart_service")
     def test_cart_show(self, mock_cart_service):
         """Test showing cart command."""
         mock_cart_service.get_cart_total.return_value = {
@@ -151,7 +180,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_cart_service.get_cart_total.assert_called_once_with("U001")
 
-    @patch("src.cli.cart_service")
+    @patch("src.services.cart_service.cart_service")
     def test_cart_add(self, mock_cart_service):
         """Test adding to cart command."""
         mock_cart_service.add_to_cart.return_value = True
@@ -163,7 +192,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_cart_service.add_to_cart.assert_called_once_with("U001", "P001", 2)
 
-    @patch("src.cli.recommendation_service")
+    @patch("src.services.recommendation_service.recommendation_service")
     def test_recommend_user(self, mock_rec_service):
         """Test user recommendations command."""
         mock_rec_service.get_user_recommendations.return_value = [
@@ -175,7 +204,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_rec_service.get_user_recommendations.assert_called_once_with("U001", 5)
 
-    @patch("src.cli.recommendation_service")
+    @patch("src.services.recommendation_service.recommendation_service")
     def test_recommend_similar(self, mock_rec_service):
         """Test similar products command."""
         mock_rec_service.get_similar_products.return_value = [
@@ -194,7 +223,26 @@ class TestCLI:
         assert result.exit_code == 0
         mock_rec_service.get_similar_products.assert_called_once_with("P001", 5)
 
-    @patch("src.cli.order_service")
+    @patch("src.services.recommendation_service.recommendation_service")
+    def test_recommend_similar_plain_output(self, mock_rec_service):
+        """Test large limits print tab-separated rows instead of a table."""
+        mock_rec_service.get_similar_products.return_value = [
+            {
+                "product_id": "P002",
+                "name": "Similar Product",
+                "price": 30.0,
+                "similarity": 0.8,
+            }
+        ]
+
+        result = self.runner.invoke(
+            cli, ["recommend", "similar", "P001", "--limit", "100"]
+        )
+
+        assert result.exit_code == 0
+        assert "P002\tSimilar Product\t$30.00\t0.800" in result.output
+
+    @patch("src.services.order_service.order_service")
     def test_orders_history(self, mock_order_service):
         """Test order history command."""
         mock_order_service.get_user_orders.return_value = [
@@ -212,7 +260,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.get_user_orders.assert_called_once_with("U001", 5)
 
-    @patch("src.cli.order_service")
+    @patch("src.services.order_service.order_service")
     def test_orders_show(self, mock_order_service):
         """Test show order command."""
         mock_order_service.get_order.return_value = {
@@ -237,7 +285,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.get_order.assert_called_once_with(1)
 
-    @patch("src.cli.order_service")
+    @patch("src.services.order_service.order_service")
     def test_orders_update_status(self, mock_order_service):
         """Test update order status command."""
         mock_order_service.update_order_status.return_value = True
@@ -247,7 +295,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.update_order_status.assert_called_once_with(1, "completed")
 
-    @patch("src.cli.order_service")
+    @patch("src.services.order_service.order_service")
     def test_orders_cancel(self, mock_order_service):
         """Test cancel order command."""
         mock_order_service.cancel_order.return_value = True
@@ -257,7 +305,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.cancel_order.assert_called_once_with(1, "U001")
 
-    @patch("src.cli.order_service")
+    @patch("src.services.order_service.order_service")
     def test_orders_stats(self, mock_order_service):
         """Test order statistics command."""
         mock_order_service.get_order_statistics.return_value = {
@@ -273,7 +321,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.get_order_statistics.assert_called_once_with("U001")
 
-    @patch("src.cli.order_service")
+    @patch("src.services.order_service.order_service")
     def test_orders_recent(self, mock_order_service):
         """Test recent orders command."""
         mock_order_service.get_recent_orders.return_value = [
@@ -290,7 +338,7 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.get_recent_orders.assert_called_once_with(5)
 
-    @patch("src.cli.order_service")
+    @patch("src.services.order_service.order_service")
     def test_orders_analytics(self, mock_order_service):
         """Test order analytics command."""
         mock_order_service.get_order_analytics.return_value = {
@@ -307,10 +355,10 @@ class TestCLI:
         assert result.exit_code == 0
         mock_order_service.get_order_analytics.assert_called_once()
 
-    @patch("src.cli.db")
-    @patch("src.cli.mongo_client")
-    @patch("src.cli.neo4j_client")
-    @patch("src.cli.redis_client")
+    @patch("src.db.postgres_client.db")
+    @patch("src.db.mongodb_client.mongo_client")
+    @patch("src.db.neo4j_client.neo4j_client")
+    @patch("src.db.redis_client.redis_client")
     def test_status(self, mock_redis, mock_neo4j, mock_mongo, mock_db):
         """Test system status command."""
         # Mock database connections
@@ -319,7 +367,7 @@ class TestCLI:
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
         mock_collection = Mock()
-        mock_collection.count_documents.return_value = 25
+        mock_collection.estimated_document_count.return_value = 25
         mock_mongo.get_collection.return_value = mock_collection
 
         mock_session = Mock()
@@ -333,6 +381,28 @@ class TestCLI:
         result = self.runner.invoke(cli, ["status"])
 
         assert result.exit_code == 0
+        assert "PostgreSQL: ~10 products" in result.output
+        assert "MongoDB: ~25 reviews" in result.output
+        assert "Neo4j: 15 product nodes" in result.output
+        assert "Redis: Connected" in result.output
+
+    @patch("src.cli.STATUS_CHECK_TIMEOUT", 0.2)
+    def test_status_check_timeout(self):
+        """Test a hung backend is reported as timed out, not waited on."""
+        hung = threading.Event()
+        checks = {
+            "Fast": lambda: "✅ Fast: Connected",
+            "Slow": lambda: hung.wait(5) and "✅ Slow: Connected",
+        }
+        with patch.dict("src.cli.STATUS_CHECKS", checks, clear=True):
+            start = time.monotonic()
+            result = self.runner.invoke(cli, ["status"])
+        hung.set()
+
+        assert result.exit_code == 0
+        assert time.monotonic() - start < 2
+        assert "Fast: Connected" in result.output
+        assert "Slow: timed out" in result.output
 
     def test_help(self):
         """Test help command."""
@@ -364,7 +434,7 @@ class TestCLI:
         assert result.exit_code == 0
         assert "Recommendation commands" in result.output
 
-    @patch("src.cli.RelationalLoader")
+    @patch("src.loaders.relational_loader.RelationalLoader")
     def test_load_relational_error(self, mock_loader_class):
         """Test loading relational data with error."""
         mock_loader = Mock()
@@ -376,7 +446,7 @@ class TestCLI:
         assert result.exit_code == 0  # Should handle error gracefully
         assert "Error loading relational data" in result.output
 
-    @patch("src.cli.SearchService")
+    @patch("src.services.search_service.SearchService")
     def test_search_no_results(self, mock_service_class):
         """Test search with no results."""
         mock_service = Mock()
@@ -388,7 +458,25 @@ class TestCLI:
         assert result.exit_code == 0
         assert "No results found" in result.output
 
-    @patch("src.cli.cart_service")
+    @patch("src.services.search_service.SearchService")
+    def test_search_empty_query(self, mock_service_class):
+        """Test a blank query is rejected without calling the service."""
+        result = self.runner.invoke(cli, ["search", "text", "   "])
+
+        assert result.exit_code == 0
+        assert "Empty query" in result.output
+        mock_service_class.assert_not_called()
+
+    @patch("src.services.cart_service.cart_service")
+    def test_cart_invalid_user_id(self, mock_cart_service):
+        """Test a malformed user ID is rejected without calling the service."""
+        result = self.runner.invoke(cli, ["cart", "show-cart", "U001; DROP"])
+
+        assert result.exit_code == 0
+        assert "Invalid user ID" in result.output
+        mock_cart_service.get_cart_total.assert_not_called()
+
+    @patch("src.services.cart_service.cart_service")
     def test_cart_empty(self, mock_cart_service):
         """Test showing empty cart."""
         mock_cart_service.get_cart_total.return_value = {"total": 0.0, "items": []}
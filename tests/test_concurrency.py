@@ -0,0 +1,25 @@
+"""Tests for the concurrent step runner."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from src.utils.concurrency import run_concurrently
+
+
+class TestRunConcurrently:
+    def test_results_in_argument_order(self):
+        """Test results come back in the order the steps were given."""
+        assert run_concurrently(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+    def test_failure_is_raised_after_all_steps_run(self):
+        """Test a failing step does not stop the others."""
+        later = Mock(return_value="done")
+
+        def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            run_concurrently(failing, later)
+
+        later.assert_called_once()
@@ -1,7 +1,8 @@
 """Tests for document loader functionality."""
 
+import pandas as pd
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from src.loaders.document_loader import DocumentLoader
 
@@ -13,26 +14,34 @@ class TestDocumentLoader:
         # Mock the parser to avoid file dependencies
         self.loader.parser = Mock()
 
-        # Mock sample data
-        self.mock_products = Mock()
-        self.mock_products.iterrows.return_value = [
-            (0, Mock(ID="P001", CATEGORY="Home & Kitchen", NAME="Test Product")),
-            (1, Mock(ID="P002", CATEGORY="Jewelry", NAME="Test Jewelry")),
-        ]
+        # Sample data
+        self.mock_products = pd.DataFrame(
+            [
+                {"ID": "P001", "CATEGORY": "Home & Kitchen", "NAME": "Test Product"},
+                {"ID": "P002", "CATEGORY": "Jewelry", "NAME": "Test Jewelry"},
+            ]
+        )
 
-        self.mock_users = Mock()
-        self.mock_users.sample.return_value = Mock(
-            iloc=[Mock(ID="U001", INTERESTS=["crafts", "kitchen"])]
+        self.mock_users = pd.DataFrame(
+            [{"ID": "U001", "INTERESTS": ["crafts", "kitchen"]}]
         )
 
         self.loader.parser.parse_products.return_value = self.mock_products
         self.loader.parser.parse_users.return_value = self.mock_users
 
-    def test_load_reviews(self):
+    def _mock_db(self, inserted: int, counts=None) -> Mock:
+        """Mock the MongoDB client for an unacknowledged load of `inserted` docs."""
+        db = Mock()
+        db.bulk_insert.return_value = inserted
+        collection = db.get_collection.return_value
+        collection.estimated_document_count.side_effect = counts or [0, inserted]
+        return db
+
+    @patch("src.loaders.document_loader.random.randint", return_value=1)
+    def test_load_reviews(self, mock_randint):
         """Test loading reviews into MongoDB."""
-        # Mock the MongoDB collection
-        mock_collection = Mock()
-        self.loader.db.get_collection = Mock(return_value=mock_collection)
+        # Mock the MongoDB client
+        self.loader.db = self._mock_db(2)
 
         # Mock the review generation methods
         self.loader._generate_review_content = Mock(
@@ -49,15 +58,16 @@ class TestDocumentLoader:
         # Test the method
         self.loader.load_reviews()
 
-        # Verify collection was called
-        assert mock_collection.insert_one.called
-        # Should be called for each product
-        assert mock_collection.insert_one.call_count == 2
+        # Verify reviews were sent in one bulk insert
+        self.loader.db.bulk_insert.assert_called_once()
+        name, docs = self.loader.db.bulk_insert.call_args[0]
+        assert name == "reviews"
+        # Should be one review per product
+        assert len(docs) == 2
 
     def test_load_product_specs(self):
         """Test loading product specifications."""
-        mock_collection = Mock()
-        self.loader.db.get_collection = Mock(return_value=mock_collection)
+        self.loader.db = self._mock_db(2)
 
         # Mock the specs generation
         self.loader._generate_product_specs = Mock(
@@ -70,54 +80,59 @@ class TestDocumentLoader:
 
         self.loader.load_product_specs()
 
-        assert mock_collection.insert_one.called
-        assert mock_collection.insert_one.call_count == 2
+        self.loader.db.bulk_insert.assert_called_once()
+        assert len(self.loader.db.bulk_insert.call_args[0][1]) == 2
+
+    def test_load_product_specs_count_mismatch(self):
+        """Test a short count after an unacknowledged load is reported."""
+        # Five documents already there, two sent, only one applied
+        self.loader.db = self._mock_db(2, counts=[5, 6])
+        self.loader._generate_product_specs = Mock(return_value={})
+
+        with patch("src.loaders.document_loader.logger") as mock_logger:
+            assert self.loader.load_product_specs() is False
+
+        mock_logger.warning.assert_called_once()
+        assert mock_logger.warning.call_args[0][1:] == ("product_specs", 6, 7)
 
     def test_load_seller_profiles(self):
         """Test loading seller profiles."""
-        mock_collection = Mock()
-        self.loader.db.get_collection = Mock(return_value=mock_collection)
-
-        # Mock sellers data
-        mock_sellers = Mock()
-        mock_sellers.iterrows.return_value = [
-            (
-                0,
-                Mock(
-                    ID="S001",
-                    NAME="Test Seller",
-                    SPECIALTY="Woodworking",
-                    RATING=4.5,
-                    JOINED="2023-01-01",
-                ),
-            )
-        ]
+        self.loader.db = self._mock_db(1)
+
+        # Sellers data
+        mock_sellers = pd.DataFrame(
+            [
+                {
+                    "ID": "S001",
+                    "NAME": "Test Seller",
+                    "SPECIALTY": "Woodworking",
+                    "RATING": 4.5,
+                    "JOINED": "2023-01-01",
+                }
+            ]
+        )
         self.loader.parser.parse_sellers = Mock(return_value=mock_sellers)
 
         self.loader.load_seller_profiles()
 
-        assert mock_collection.insert_one.called
+        self.loader.db.bulk_insert.assert_called_once()
 
     def test_load_user_preferences(self):
         """Test loading user preferences."""
-        mock_collection = Mock()
-        self.loader.db.get_collection = Mock(return_value=mock_collection)
-
-        # Mock users data
-        mock_users = Mock()
-        mock_users.iterrows.return_value = [
-            (0, Mock(ID="U001", INTERESTS=["crafts", "kitchen"]))
-        ]
+        self.loader.db = self._mock_db(1)
+
+        # Users data
+        mock_users = pd.DataFrame([{"ID": "U001", "INTERESTS": ["crafts", "kitchen"]}])
         self.loader.parser.parse_users = Mock(return_value=mock_users)
 
         self.loader.load_user_preferences()
 
-        assert mock_collection.insert_one.called
+        self.loader.db.bulk_insert.assert_called_once()
 
     def test_generate_review_content(self):
         """Test review content generation."""
-        product = Mock(CATEGORY="Home & Kitchen")
-        user = Mock()
+        product = {"CATEGORY": "Home & Kitchen"}
+        user = {"ID": "U001"}
 
         result = self.loader._generate_review_content(product, user)
 
@@ -130,7 +145,7 @@ class TestDocumentLoader:
 
     def test_generate_product_specs(self):
         """Test product specifications generation."""
-        product = Mock(ID="P001", CATEGORY="Home & Kitchen")
+        product = {"ID": "P001", "CATEGORY": "Home & Kitchen"}
 
         result = self.loader._generate_product_specs(product)
 
@@ -1,5 +1,6 @@
 """Tests for graph loader functionality."""
 
+import pandas as pd
 import pytest
 from unittest.mock import Mock, patch
 
@@ -13,58 +14,57 @@ class TestGraphLoader:
         # Mock the parser to avoid file dependencies
         self.loader.parser = Mock()
 
-        # Mock sample data
-        self.mock_categories = Mock()
-        self.mock_categories.iterrows.return_value = [
-            (0, Mock(ID="C001", NAME="Home & Kitchen", DESCRIPTION="Kitchen items")),
-            (1, Mock(ID="C002", NAME="Jewelry", DESCRIPTION="Jewelry items")),
-        ]
+        # Sample data
+        self.mock_categories = pd.DataFrame(
+            [
+                {
+                    "ID": "C001",
+                    "NAME": "Home & Kitchen",
+                    "DESCRIPTION": "Kitchen items",
+                },
+                {"ID": "C002", "NAME": "Jewelry", "DESCRIPTION": "Jewelry items"},
+            ]
+        )
 
-        self.mock_sellers = Mock()
-        self.mock_sellers.iterrows.return_value = [
-            (
-                0,
-                Mock(
-                    ID="S001",
-                    NAME="Test Seller",
-                    SPECIALTY="Woodworking",
-                    RATING=4.5,
-                    JOINED="2023-01-01",
-                ),
-            )
-        ]
+        self.mock_sellers = pd.DataFrame(
+            [
+                {
+                    "ID": "S001",
+                    "NAME": "Test Seller",
+                    "SPECIALTY": "Woodworking",
+                    "RATING": 4.5,
+                    "JOINED": "2023-01-01",
+                }
+            ]
+        )
 
-        self.mock_users = Mock()
-        self.mock_users.iterrows.return_value = [
-            (
-                0,
-                Mock(
-                    ID="U001",
-                    NAME="Test User",
-                    EMAIL="test@example.com",
-                    JOIN_DATE="2023-01-01",
-                    LOCATION="Test City",
-                    INTERESTS=["crafts", "kitchen"],
-                ),
-            )
-        ]
+        self.mock_users = pd.DataFrame(
+            [
+                {
+                    "ID": "U001",
+                    "NAME": "Test User",
+                    "EMAIL": "test@example.com",
+                    "JOIN_DATE": "2023-01-01",
+                    "LOCATION": "Test City",
+                    "INTERESTS": ["crafts", "kitchen"],
+                }
+            ]
+        )
 
-        self.mock_products = Mock()
-        self.mock_products.iterrows.return_value = [
-            (
-                0,
-                Mock(
-                    ID="P001",
-                    NAME="Test Product",
-                    PRICE=29.99,
-                    DESCRIPTION="Test description",
-                    TAGS=["wooden", "handmade"],
-                    STOCK=10,
-                    CATEGORY="Home & Kitchen",
-                    SELLER_ID="S001",
-                ),
-            )
-        ]
+        self.mock_products = pd.DataFrame(
+            [
+                {
+                    "ID": "P001",
+                    "NAME": "Test Product",
+                    "PRICE": 29.99,
+                    "DESCRIPTION": "Test description",
+                    "TAGS": ["wooden", "handmade"],
+                    "STOCK": 10,
+                    "CATEGORY": "Home & Kitchen",
+                    "SELLER_ID": "S001",
+                }
+            ]
+        )
 
         self.loader.parser.parse_categories.return_value = self.mock_categories
         self.loader.parser.parse_sellers.return_value = self.mock_sellers
@@ -87,8 +87,8 @@ class TestGraphLoader:
 
         self.loader.load_categories()
 
-        # Verify session.run was called for each category
-        assert mock_session.run.call_count == 2
+        # All categories are merged in one UNWIND statement
+        assert mock_session.execute_write.call_count == 1
 
     @patch("src.loaders.graph_loader.neo4j_client")
     def test_load_sellers(self, mock_neo4j_client):
@@ -100,8 +100,8 @@ class TestGraphLoader:
 
         self.loader.load_sellers()
 
-        # Verify session.run was called for each seller
-        assert mock_session.run.call_count == 1
+        # All sellers are merged in one UNWIND statement
+        assert mock_session.execute_write.call_count == 1
 
     @patch("src.loaders.graph_loader.neo4j_client")
     def test_load_users(self, mock_neo4j_client):
@@ -113,8 +113,8 @@ class TestGraphLoader:
 
         self.loader.load_users()
 
-        # Verify session.run was called for each user
-        assert mock_session.run.call_count == 1
+        # All users are merged in one UNWIND statement
+        assert mock_session.execute_write.call_count == 1
 
     @patch("src.loaders.graph_loader.neo4j_client")
     def test_load_products(self, mock_neo4j_client):
@@ -126,31 +126,65 @@ class TestGraphLoader:
 
         self.loader.load_products()
 
-        # Should create product node and relationships
-        # 1 product node + 1 BELONGS_TO relationship + 1 SOLD_BY relationship
-        assert mock_session.run.call_count >= 3
+        # Product nodes and their relationships are merged in one statement
+        assert mock_session.execute_write.call_count == 1
+        row = mock_session.execute_write.call_args.args[2][0]
+        assert row["CATEGORY_ID"] == "C001"
+        assert row["TAG_LIST"] == ["wooden", "handmade"]
 
+    @patch("src.loaders.graph_loader.redis_client")
     @patch("src.loaders.graph_loader.neo4j_client")
-    def test_create_similar_product_relationships(self, mock_neo4j_client):
+    def test_create_similar_product_relationships(
+        self, mock_neo4j_client, mock_redis_client
+    ):
         """Test creating similar product relationships."""
         mock_session = Mock()
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
         )
 
-        # Mock products with overlapping tags
-        mock_products = Mock()
-        mock_products.iterrows.return_value = [
-            (0, Mock(ID="P001", TAGS=["wooden", "handmade"])),
-            (1, Mock(ID="P002", TAGS=["wooden", "kitchen"])),
-            (2, Mock(ID="P003", TAGS=["metal", "modern"])),
-        ]
+        # Products with overlapping tags
+        mock_products = pd.DataFrame(
+            [
+                {
+                    "ID": "P001",
+                    "NAME": "Bowl",
+                    "PRICE": 10.0,
+                    "TAGS": ["wooden", "handmade", "kitchen"],
+                },
+                {
+                    "ID": "P002",
+                    "NAME": "Spoon",
+                    "PRICE": 5.0,
+                    "TAGS": ["wooden", "kitchen"],
+                },
+                {
+                    "ID": "P003",
+                    "NAME": "Lamp",
+                    "PRICE": 20.0,
+                    "TAGS": ["metal", "modern"],
+                },
+            ]
+        )
         self.loader.parser.parse_products.return_value = mock_products
+        mock_session.execute_write.return_value = [
+            {"product_id": "P001", "other_id": "P002", "score": 2 / 3},
+            {"product_id": "P002", "other_id": "P001", "score": 2 / 3},
+            # Stale nodes from an earlier load are not mirrored
+            {"product_id": "P999", "other_id": "P001", "score": 1.0},
+            {"product_id": "P001", "other_id": "P999", "score": 1.0},
+        ]
 
         self.loader.create_similar_product_relationships()
 
-        # Should create relationships between products with common tags
-        assert mock_session.run.called
+        # Pairs are scored in one Cypher statement and mirrored to Redis
+        mock_session.execute_write.assert_called_once()
+        neighbours = mock_redis_client.set_similar_products.call_args[0][0]
+        assert neighbours == {
+            "P001": {"P002": 2 / 3},
+            "P002": {"P001": 2 / 3},
+            "P003": {},
+        }
 
     @patch("src.loaders.graph_loader.neo4j_client")
     def test_load_all(self, mock_neo4j_client):
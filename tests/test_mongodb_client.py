@@ -1,4 +1,6 @@
-from src.db.mongodb_client import mongo_client
+from unittest.mock import Mock
+
+from src.db.mongodb_client import MongoDBClient, mongo_client
 
 
 def test_get_collection():
@@ -10,3 +12,23 @@ def test_create_indexes():
     mongo_client.create_indexes()
     # If no exception, indexes are created
     assert True
+
+
+def test_bulk_insert_batches():
+    client = MongoDBClient()
+    client.get_collection = Mock()
+    inserted = client.bulk_insert("reviews", ({"n": i} for i in range(5)), batch_size=2)
+    assert inserted == 5
+    calls = client.get_collection.return_value.insert_many.call_args_list
+    assert [len(call.args[0]) for call in calls] == [2, 2, 1]
+    assert all(call.kwargs["ordered"] is False for call in calls)
+
+
+def test_bulk_insert_unacknowledged():
+    client = MongoDBClient()
+    client.get_collection = Mock()
+    client.bulk_insert("reviews", [{"n": 1}], acknowledged=False)
+    collection = client.get_collection.return_value
+    concern = collection.with_options.call_args.kwargs["write_concern"]
+    assert concern.acknowledged is False
+    collection.with_options.return_value.insert_many.assert_called_once()
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pytest
 
 from src.db.neo4j_client import neo4j_client
@@ -26,3 +28,61 @@ def test_get_recommendations():
         assert isinstance(recs, list)
     except Exception as e:
         pytest.skip(f"Neo4j not available or test data missing: {e}")
+
+
+def test_ping():
+    with patch.object(neo4j_client, "driver") as mock_driver:
+        assert neo4j_client.ping() is True
+        mock_driver.verify_connectivity.side_effect = OSError("refused")
+        assert neo4j_client.ping() is False
+
+
+@patch("src.db.neo4j_client.redis_client")
+def test_get_recommendations_cached(mock_redis_client):
+    mock_redis_client.client.hget.return_value = (
+        '[{"product_id": "P002", "name": "Mug", "freq": 3}]'
+    )
+    with patch.object(neo4j_client, "driver") as mock_driver:
+        recs = neo4j_client.get_recommendations("U001", limit=2)
+    assert recs == [{"product_id": "P002", "name": "Mug", "freq": 3}]
+    mock_redis_client.client.hget.assert_called_once_with("reco:U001", 2)
+    mock_driver.session.assert_not_called()
+
+
+@patch("src.db.neo4j_client.redis_client")
+def test_add_purchases_batched(mock_redis_client):
+    purchases = [
+        {"user_id": "U001", "product_id": "P001", "quantity": 1, "date": "2024-01-01"},
+        {"user_id": "U002", "product_id": "P002", "quantity": 2, "date": "2024-01-01"},
+    ]
+    with patch.object(neo4j_client, "driver") as mock_driver:
+        neo4j_client.add_purchases(purchases)
+    session = mock_driver.session.return_value.__enter__.return_value
+    session.run.assert_called_once()
+    assert session.run.call_args.kwargs["purchases"] == purchases
+    deleted = mock_redis_client.client.delete.call_args.args
+    assert sorted(deleted) == ["reco:U001", "reco:U002"]
+
+
+@patch("src.db.neo4j_client.redis_client")
+@patch("src.db.neo4j_client.user_recommendations_cache")
+def test_add_purchases_clears_memoized_recommendations(mock_cache, mock_redis_client):
+    purchases = [
+        {"user_id": "U001", "product_id": "P001", "quantity": 1, "date": "2024-01-01"}
+    ]
+    with patch.object(neo4j_client, "driver"):
+        neo4j_client.add_purchases(purchases)
+    mock_cache.clear.assert_called_once()
+
+
+def test_refresh_co_purchases():
+    with patch.object(neo4j_client, "driver") as mock_driver:
+        neo4j_client.refresh_co_purchases()
+    session = mock_driver.session.return_value.__enter__.return_value
+    session.run.assert_called_once()
+    query = session.run.call_args.args[0]
+    assert "apoc.periodic.iterate" in query
+    assert "CO_PURCHASED" in query
+    # Repeat purchases on different dates count a buyer once
+    assert "count(DISTINCT u)" in query
+    assert "count(*)" not in query
@@ -23,15 +23,60 @@ class TestOrderService:
     def test_create_order_success(self, mock_neo4j, mock_db):
         """Test successfully creating an order."""
         mock_cursor = Mock()
-        mock_cursor.fetchone.return_value = {"id": 1}
+        mock_cursor.fetchone.return_value = {
+            "id": 1,
+            "stock": [{"id": "P001", "stock": 8}, {"id": "P002", "stock": 4}],
+        }
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
         order_id = self.order_service.create_order(self.user_id, self.items, 35.0)
 
         assert order_id == 1
-        # Should execute multiple SQL statements (order + order items + stock updates)
-        assert mock_cursor.execute.call_count >= 5
-        mock_neo4j.add_purchase.assert_called()
+        # Order, items and stock changes are written by one statement
+        mock_cursor.execute.assert_called_once()
+        # All items become PURCHASED relationships in one Neo4j call
+        mock_neo4j.add_purchases.assert_called_once()
+        assert len(mock_neo4j.add_purchases.call_args.args[0]) == 2
+        # Bought-together scores pick up the new purchases
+        mock_neo4j.refresh_co_purchases.assert_called_once()
+
+    @patch("src.services.order_service.redis_client")
+    @patch("src.services.order_service.db")
+    @patch("src.services.order_service.neo4j_client")
+    def test_create_order_neo4j_failure_keeps_stock_mirror(
+        self, mock_neo4j, mock_db, mock_redis
+    ):
+        """Test stock is not mirrored when the order is rolled back."""
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = {
+            "id": 1,
+            "stock": [{"id": "P001", "stock": 8}, {"id": "P002", "stock": 4}],
+        }
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        mock_neo4j.add_purchases.side_effect = Exception("Neo4j error")
+
+        order_id = self.order_service.create_order(self.user_id, self.items, 35.0)
+
+        assert order_id is None
+        mock_redis.set_product_stock.assert_not_called()
+
+    @patch("src.services.order_service.db")
+    @patch("src.services.order_service.neo4j_client")
+    def test_create_order_insufficient_stock(self, mock_neo4j, mock_db):
+        """Test an order is refused when a product's stock is short."""
+        mock_cursor = Mock()
+        # Only P001 had enough stock to be decremented
+        mock_cursor.fetchone.return_value = {
+            "id": 1,
+            "stock": [{"id": "P001", "stock": 8}],
+        }
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        order_id = self.order_service.create_order(self.user_id, self.items, 35.0)
+
+        assert order_id is None
+        assert "p.stock >= v.quantity" in mock_cursor.execute.call_args.args[0]
+        mock_neo4j.add_purchases.assert_not_called()
 
     @patch("src.services.order_service.db")
     def test_create_order_failure(self, mock_db):
@@ -48,10 +93,13 @@ class TestOrderService:
     def test_get_order_success(self, mock_db):
         """Test getting order details."""
         mock_cursor = Mock()
-        mock_cursor.fetchone.side_effect = [
-            {"id": 1, "user_name": "Test User", "email": "test@example.com"},
-            [{"product_id": "P001", "quantity": 2, "price": 10.0}],
-        ]
+        mock_cursor.fetchone.return_value = {
+            "id": 1,
+            "user_name": "Test User",
+            "email": "test@example.com",
+            "order_date": datetime(2024, 1, 1),
+            "items": [{"product_id": "P001", "quantity": 2, "unit_price": 10.0}],
+        }
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
         order = self.order_service.get_order(self.order_id)
@@ -59,6 +107,8 @@ class TestOrderService:
         assert order["id"] == 1
         assert order["user_name"] == "Test User"
         assert len(order["items"]) == 1
+        # Items are aggregated into the order row by a single query
+        mock_cursor.execute.assert_called_once()
 
     @patch("src.services.order_service.db")
     def test_get_order_not_found(self, mock_db):
@@ -75,9 +125,13 @@ class TestOrderService:
     def test_get_user_orders(self, mock_db):
         """Test getting user order history."""
         mock_cursor = Mock()
-        mock_cursor.fetchall.side_effect = [
-            [{"id": 1, "total_amount": 35.0, "item_count": 2}],
-            [{"product_id": "P001", "quantity": 2, "price": 10.0}],
+        mock_cursor.fetchall.return_value = [
+            {
+                "id": 1,
+                "total_amount": 35.0,
+                "item_count": 2,
+                "items": [{"product_id": "P001", "quantity": 2, "unit_price": 10.0}],
+            }
         ]
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
@@ -86,12 +140,16 @@ class TestOrderService:
         assert len(orders) == 1
         assert orders[0]["id"] == 1
         assert orders[0]["total_amount"] == 35.0
+        assert orders[0]["items"][0]["product_id"] == "P001"
+        # Orders and their items come back from a single query
+        mock_cursor.execute.assert_called_once()
 
     @patch("src.services.order_service.db")
     def test_update_order_status_success(self, mock_db):
         """Test successfully updating order status."""
         mock_cursor = Mock()
         mock_cursor.rowcount = 1
+        mock_cursor.fetchone.return_value = {"user_id": self.user_id}
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
         success = self.order_service.update_order_status(self.order_id, "completed")
@@ -110,9 +168,11 @@ class TestOrderService:
 
         assert success is False
 
+    @patch("src.services.order_service.redis_client")
     @patch("src.services.order_service.db")
-    def test_get_order_statistics(self, mock_db):
+    def test_get_order_statistics(self, mock_db, mock_redis_client):
         """Test getting order statistics for user."""
+        mock_redis_client.get_json.return_value = None
         mock_cursor = Mock()
         mock_cursor.fetchone.return_value = {
             "total_orders": 5,
@@ -130,6 +190,7 @@ class TestOrderService:
         assert stats["total_orders"] == 5
         assert stats["total_spent"] == 150.0
         assert len(stats["top_products"]) == 1
+        mock_redis_client.set_json.assert_called_once()
 
     @patch("src.services.order_service.db")
     def test_get_recent_orders(self, mock_db):
@@ -147,22 +208,22 @@ class TestOrderService:
         assert orders[0]["id"] == 1
         assert orders[1]["id"] == 2
 
+    @patch("src.services.order_service.execute_values")
     @patch("src.services.order_service.db")
-    def test_cancel_order_success(self, mock_db):
+    def test_cancel_order_success(self, mock_db, mock_execute_values):
         """Test successfully cancelling an order."""
         mock_cursor = Mock()
-        mock_cursor.fetchone.side_effect = [
-            {"status": "pending"},  # Order status check
-            [{"product_id": "P001", "quantity": 2}],  # Order items
-        ]
+        mock_cursor.fetchone.return_value = {"status": "pending"}  # Status check
+        mock_cursor.fetchall.return_value = [{"product_id": "P001", "quantity": 2}]
         mock_cursor.rowcount = 1
         mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
 
         success = self.order_service.cancel_order(self.order_id, self.user_id)
 
         assert success is True
-        # Should execute multiple SQL statements (check + restore stock + update status)
-        assert mock_cursor.execute.call_count >= 3
+        # Check, item lookup and status update; stock is restored in one statement
+        assert mock_cursor.execute.call_count == 3
+        mock_execute_values.assert_called_once()
 
     @patch("src.services.order_service.db")
     def test_cancel_order_not_owned(self, mock_db):
@@ -186,9 +247,11 @@ class TestOrderService:
 
         assert success is False
 
+    @patch("src.services.order_service.redis_client")
     @patch("src.services.order_service.db")
-    def test_get_order_analytics(self, mock_db):
+    def test_get_order_analytics(self, mock_db, mock_redis_client):
         """Test getting order analytics."""
+        mock_redis_client.get_json.return_value = None
         mock_cursor = Mock()
         mock_cursor.fetchone.return_value = {
             "total_orders": 100,
@@ -210,6 +273,18 @@ class TestOrderService:
         assert "top_products" in analytics
         assert "daily_trends" in analytics
 
+    @patch("src.services.order_service.redis_client")
+    @patch("src.services.order_service.db")
+    def test_get_order_analytics_cached(self, mock_db, mock_redis_client):
+        """Test cached analytics are served without querying PostgreSQL."""
+        cached = {"total_orders": 100, "status_breakdown": []}
+        mock_redis_client.get_json.return_value = cached
+
+        analytics = self.order_service.get_order_analytics()
+
+        assert analytics == cached
+        mock_db.get_cursor.assert_not_called()
+
     def test_order_service_initialization(self):
         """Test order service initialization."""
         assert self.order_service.db is not None
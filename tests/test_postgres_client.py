@@ -0,0 +1,25 @@
+from unittest.mock import Mock
+
+from src.db.postgres_client import PostgresConnection
+
+
+def test_execute_prepared_prepares_once_per_connection():
+    client = PostgresConnection()
+    cursor = Mock()
+
+    for product_id in ("P001", "P002"):
+        client.execute_prepared(
+            cursor, "verify", "SELECT stock FROM products WHERE id = $1", (product_id,)
+        )
+
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert statements == [
+        "PREPARE verify AS SELECT stock FROM products WHERE id = $1",
+        "EXECUTE verify (%s)",
+        "EXECUTE verify (%s)",
+    ]
+
+    # A different connection has its own prepared statements
+    other = Mock()
+    client.execute_prepared(other, "verify", "SELECT 1", ())
+    assert other.execute.call_args.args[0] == "EXECUTE verify"
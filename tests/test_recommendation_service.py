@@ -1,29 +1,60 @@
 """Tests for recommendation service functionality."""
 
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 from src.services.recommendation_service import RecommendationService
+from src.utils.cache import user_recommendations_cache
+
+
+@pytest.fixture(autouse=True)
+def no_redis_cache():
+    """Bypass the Redis result cache so each test hits the mocked graph."""
+    with patch("src.utils.cache.redis_client") as mock_redis_client:
+        mock_redis_client.get_json.return_value = None
+        with patch("src.services.recommendation_service.redis_client") as mock_sim:
+            mock_sim.get_similar_products.return_value = []
+            yield mock_redis_client
+
+
+def _result(rows):
+    """Mock query result: an iterable of records holding ``rows``."""
+    records = []
+    for row in rows:
+        record = MagicMock()
+        record.data.return_value = row
+        record.__getitem__.side_effect = row.__getitem__
+        records.append(record)
+    return records
+
+
+def _managed_session():
+    """Mock session whose managed transactions run on the session itself."""
+    session = Mock()
+    session.execute_read.side_effect = lambda work, *args: work(session, *args)
+    session.execute_write.side_effect = lambda work, *args: work(session, *args)
+    return session
 
 
 class TestRecommendationService:
     def setup_method(self):
         """Set up test fixtures."""
         self.recommendation_service = RecommendationService()
+        user_recommendations_cache.clear()
         self.user_id = "test_user"
         self.product_id = "test_product"
 
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_user_recommendations(self, mock_neo4j_client):
         """Test getting personalized user recommendations."""
+        self.recommendation_service.client = mock_neo4j_client
         # Mock Neo4j session and results
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
+        mock_session = _managed_session()
+        recs = [
             {"product_id": "P001", "name": "Product 1", "price": 10.0, "frequency": 5},
             {"product_id": "P002", "name": "Product 2", "price": 15.0, "frequency": 3},
         ]
-        mock_session.run.return_value = mock_result
+        mock_session.run.return_value = _result([{"uid": self.user_id, "recs": recs}])
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
         )
@@ -37,15 +68,47 @@ class TestRecommendationService:
         assert results[1]["product_id"] == "P002"
         mock_session.run.assert_called_once()
 
+    def test_get_user_recommendations_memoized(self):
+        """Test repeated user recommendation calls reuse the first result."""
+        mock_session = _managed_session()
+        mock_session.run.return_value = [
+            {"uid": self.user_id, "recs": [{"product_id": "P001", "frequency": 5}]}
+        ]
+        mock_client = MagicMock()
+        mock_client.driver.session.return_value.__enter__.return_value = mock_session
+        self.recommendation_service.client = mock_client
+
+        first = self.recommendation_service.get_user_recommendations(self.user_id, 5)
+        second = self.recommendation_service.get_user_recommendations(self.user_id, 5)
+
+        assert first == second == [{"product_id": "P001", "frequency": 5}]
+        mock_session.run.assert_called_once()
+
+        self.recommendation_service.clear_user_recommendations_cache()
+        self.recommendation_service.get_user_recommendations(self.user_id, 5)
+        assert mock_session.run.call_count == 2
+
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_frequently_bought_together(self, mock_neo4j_client):
         """Test getting frequently bought together products."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {"product_id": "P002", "name": "Product 2", "price": 15.0, "frequency": 8},
-            {"product_id": "P003", "name": "Product 3", "price": 20.0, "frequency": 6},
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "frequency": 8,
+                },
+                {
+                    "product_id": "P003",
+                    "name": "Product 3",
+                    "price": 20.0,
+                    "frequency": 6,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -63,22 +126,24 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_similar_products(self, mock_neo4j_client):
         """Test getting similar products based on SIMILAR_TO relationships."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "similarity": 0.85,
-            },
-            {
-                "product_id": "P003",
-                "name": "Product 3",
-                "price": 20.0,
-                "similarity": 0.72,
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "similarity": 0.85,
+                },
+                {
+                    "product_id": "P003",
+                    "name": "Product 3",
+                    "price": 20.0,
+                    "similarity": 0.72,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -93,25 +158,79 @@ class TestRecommendationService:
         assert results[0]["similarity"] == 0.85
         mock_session.run.assert_called_once()
 
+    def test_iter_frequently_bought_together(self):
+        """Test bought-together records are yielded lazily."""
+        mock_session = _managed_session()
+        mock_session.run.return_value = [
+            Mock(data=Mock(return_value={"product_id": "P002", "frequency": 8})),
+            Mock(data=Mock(return_value={"product_id": "P003", "frequency": 6})),
+        ]
+        mock_client = MagicMock()
+        mock_client.driver.session.return_value.__enter__.return_value = mock_session
+        self.recommendation_service.client = mock_client
+
+        rows = self.recommendation_service.iter_frequently_bought_together(
+            self.product_id, limit=2
+        )
+        mock_session.run.assert_not_called()
+
+        assert next(rows)["product_id"] == "P002"
+        assert [row["product_id"] for row in rows] == ["P003"]
+        mock_session.run.assert_called_once()
+
+    @patch("src.services.recommendation_service.redis_client")
+    def test_get_similar_products_precomputed(self, mock_redis_client):
+        """Test similar products are served from the Redis precompute."""
+        cached = [
+            {"product_id": "P002", "name": "Bowl", "price": 25.0, "similarity": 0.85}
+        ]
+        mock_redis_client.get_similar_products.return_value = cached
+        self.recommendation_service.client = Mock()
+
+        results = self.recommendation_service.get_similar_products(
+            self.product_id, limit=3
+        )
+
+        assert results == cached
+        mock_redis_client.get_similar_products.assert_called_once_with(
+            self.product_id, 3
+        )
+        self.recommendation_service.client.driver.session.assert_not_called()
+
+    def test_get_category_recommendations_cached(self, no_redis_cache):
+        """Test a cached category lookup is served without querying the graph."""
+        cached = [{"product_id": "P001", "name": "Bowl", "purchase_count": 4}]
+        no_redis_cache.get_json.return_value = cached
+        self.recommendation_service.client = MagicMock()
+
+        results = self.recommendation_service.get_category_recommendations(
+            "Home & Kitchen", limit=5
+        )
+
+        assert results == cached
+        self.recommendation_service.client.driver.session.assert_not_called()
+
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_category_recommendations(self, mock_neo4j_client):
         """Test getting popular products in a category."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P001",
-                "name": "Product 1",
-                "price": 10.0,
-                "purchase_count": 25,
-            },
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "purchase_count": 18,
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P001",
+                    "name": "Product 1",
+                    "price": 10.0,
+                    "purchase_count": 25,
+                },
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "purchase_count": 18,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -129,22 +248,24 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_trending_products(self, mock_neo4j_client):
         """Test getting trending products based on recent purchases."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P001",
-                "name": "Product 1",
-                "price": 10.0,
-                "recent_purchases": 15,
-            },
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "recent_purchases": 12,
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P001",
+                    "name": "Product 1",
+                    "price": 10.0,
+                    "recent_purchases": 15,
+                },
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "recent_purchases": 12,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -160,24 +281,26 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_user_purchase_history(self, mock_neo4j_client):
         """Test getting user's purchase history."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P001",
-                "name": "Product 1",
-                "price": 10.0,
-                "purchase_date": "2024-01-01",
-                "quantity": 2,
-            },
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "purchase_date": "2024-01-15",
-                "quantity": 1,
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P001",
+                    "name": "Product 1",
+                    "price": 10.0,
+                    "purchase_date": "2024-01-01",
+                    "quantity": 2,
+                },
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "purchase_date": "2024-01-15",
+                    "quantity": 1,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -195,17 +318,24 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_also_bought_recommendations(self, mock_neo4j_client):
         """Test getting 'users who bought this also bought' recommendations."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "user_count": 12,
-            },
-            {"product_id": "P003", "name": "Product 3", "price": 20.0, "user_count": 8},
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "user_count": 12,
+                },
+                {
+                    "product_id": "P003",
+                    "name": "Product 3",
+                    "price": 20.0,
+                    "user_count": 8,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -223,22 +353,24 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_personalized_category_recommendations(self, mock_neo4j_client):
         """Test getting category recommendations based on user's interests."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P001",
-                "name": "Product 1",
-                "price": 10.0,
-                "total_purchases": 25,
-            },
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "total_purchases": 18,
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P001",
+                    "name": "Product 1",
+                    "price": 10.0,
+                    "total_purchases": 25,
+                },
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "total_purchases": 18,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -256,22 +388,24 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_cross_category_recommendations(self, mock_neo4j_client):
         """Test getting cross-category recommendations."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P003",
-                "name": "Product 3",
-                "price": 20.0,
-                "popularity": 15,
-            },
-            {
-                "product_id": "P004",
-                "name": "Product 4",
-                "price": 25.0,
-                "popularity": 12,
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P003",
+                    "name": "Product 3",
+                    "price": 20.0,
+                    "popularity": 15,
+                },
+                {
+                    "product_id": "P004",
+                    "name": "Product 4",
+                    "price": 25.0,
+                    "popularity": 12,
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -288,16 +422,18 @@ class TestRecommendationService:
 
     def test_get_comprehensive_recommendations(self):
         """Test getting comprehensive recommendations combining multiple strategies."""
-        # Mock the individual recommendation methods
-        self.recommendation_service.get_user_recommendations = Mock(
-            return_value=[{"product_id": "P001", "name": "Product 1", "price": 10.0}]
-        )
-        self.recommendation_service.get_trending_products = Mock(
-            return_value=[{"product_id": "P002", "name": "Product 2", "price": 15.0}]
-        )
-        self.recommendation_service.get_personalized_category_recommendations = Mock(
-            return_value=[{"product_id": "P003", "name": "Product 3", "price": 20.0}]
-        )
+        # All three strategies come back in one record from one statement
+        tx = Mock()
+        tx.run.return_value.single.return_value.data.return_value = {
+            "personalized": [{"product_id": "P001"}],
+            "trending": [{"product_id": "P002"}],
+            "category_based": [{"product_id": "P003"}],
+        }
+        mock_session = _managed_session()
+        mock_session.execute_read.side_effect = lambda work: work(tx)
+        mock_client = MagicMock()
+        mock_client.driver.session.return_value.__enter__.return_value = mock_session
+        self.recommendation_service.client = mock_client
 
         results = self.recommendation_service.get_comprehensive_recommendations(
             self.user_id, limit=6
@@ -309,11 +445,38 @@ class TestRecommendationService:
         assert len(results["personalized"]) == 1
         assert len(results["trending"]) == 1
         assert len(results["category_based"]) == 1
+        assert results["trending"] == [{"product_id": "P002"}]
+        mock_client.driver.session.assert_called_once()
+        mock_session.execute_read.assert_called_once()
+        tx.run.assert_called_once()
+
+    def test_get_recommendations_bulk(self):
+        """Test recommendations for many users are fetched in one query."""
+        mock_session = _managed_session()
+        mock_session.run.return_value = [
+            {"uid": "U001", "recs": [{"product_id": "P001", "frequency": 2}]},
+            {"uid": "U002", "recs": []},
+        ]
+        mock_client = MagicMock()
+        mock_client.driver.session.return_value.__enter__.return_value = mock_session
+        self.recommendation_service.client = mock_client
+
+        results = self.recommendation_service.get_recommendations_bulk(
+            ["U001", "U002"], limit=3
+        )
+
+        assert results == {
+            "U001": [{"product_id": "P001", "frequency": 2}],
+            "U002": [],
+        }
+        mock_session.run.assert_called_once()
+        assert mock_session.run.call_args.kwargs["user_ids"] == ["U001", "U002"]
 
     @patch("src.services.recommendation_service.neo4j_client")
     def test_add_product_view(self, mock_neo4j_client):
         """Test recording a product view."""
-        mock_session = Mock()
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
         )
@@ -325,22 +488,24 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_get_recently_viewed(self, mock_neo4j_client):
         """Test getting user's recently viewed products."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
-            {
-                "product_id": "P001",
-                "name": "Product 1",
-                "price": 10.0,
-                "viewed_at": "2024-01-01T10:00:00",
-            },
-            {
-                "product_id": "P002",
-                "name": "Product 2",
-                "price": 15.0,
-                "viewed_at": "2024-01-01T09:00:00",
-            },
-        ]
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result(
+            [
+                {
+                    "product_id": "P001",
+                    "name": "Product 1",
+                    "price": 10.0,
+                    "viewed_at": "2024-01-01T10:00:00",
+                },
+                {
+                    "product_id": "P002",
+                    "name": "Product 2",
+                    "price": 15.0,
+                    "viewed_at": "2024-01-01T09:00:00",
+                },
+            ]
+        )
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -356,9 +521,9 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_empty_recommendations(self, mock_neo4j_client):
         """Test handling of empty recommendation results."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = []
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        mock_result = _result([])
         mock_session.run.return_value = mock_result
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
@@ -373,18 +538,19 @@ class TestRecommendationService:
     @patch("src.services.recommendation_service.neo4j_client")
     def test_recommendation_limit(self, mock_neo4j_client):
         """Test that recommendations respect the limit parameter."""
-        mock_session = Mock()
-        mock_result = Mock()
-        mock_result.data.return_value = [
+        self.recommendation_service.client = mock_neo4j_client
+        mock_session = _managed_session()
+        # The query applies the limit, so the graph returns at most 3
+        recs = [
             {
                 "product_id": f"P{i}",
                 "name": f"Product {i}",
                 "price": 10.0,
                 "frequency": 5,
             }
-            for i in range(1, 11)  # 10 products
+            for i in range(1, 4)
         ]
-        mock_session.run.return_value = mock_result
+        mock_session.run.return_value = _result([{"uid": self.user_id, "recs": recs}])
         mock_neo4j_client.driver.session.return_value.__enter__.return_value = (
             mock_session
         )
@@ -393,6 +559,7 @@ class TestRecommendationService:
             self.user_id, limit=3
         )
 
+        assert mock_session.run.call_args.kwargs["limit"] == 3
         assert len(results) == 3  # Should respect the limit
         assert results[0]["product_id"] == "P1"
         assert results[2]["product_id"] == "P3"
@@ -1,3 +1,4 @@
+from src.config import PRODUCT_STOCK_TTL
 from src.db.redis_client import redis_client
 
 
@@ -27,3 +28,62 @@ def test_rate_limit_check():
         redis_client.rate_limit_check(user_id, endpoint)
     assert not redis_client.rate_limit_check(user_id, endpoint)
     redis_client.client.delete(key)
+
+
+def test_similar_products():
+    redis_client.set_similar_products(
+        {"TP001": {"TP002": 0.5, "TP003": 0.8}, "TP002": {}},
+        {
+            "TP002": {"name": "Test Bowl", "price": 10.0},
+            "TP003": {"name": "Test Cup", "price": 5.0},
+        },
+        ttl=60,
+    )
+    similar = redis_client.get_similar_products("TP001", 1)
+    assert similar == [
+        {"product_id": "TP003", "name": "Test Cup", "price": 5.0, "similarity": 0.8}
+    ]
+    assert redis_client.get_similar_products("TP002", 5) == []
+    redis_client.client.delete("sim:TP001", "sim:TP002", "sim:products")
+
+
+def test_bulk_writes():
+    user_id = "testuser"
+    redis_client.client.delete(f"cart:{user_id}")
+    redis_client.add_items_to_cart(user_id, [("TP001", 2), ("TP002", 1)])
+    cart = redis_client.client.hgetall(f"cart:{user_id}")
+    assert cart == {"TP001": "2", "TP002": "1"}
+    redis_client.bulk_set_json({"test:a": [1], "test:b": {"x": 2}}, ttl=60)
+    assert redis_client.get_json("test:a") == [1]
+    assert redis_client.get_json("test:b") == {"x": 2}
+    redis_client.client.delete(f"cart:{user_id}", "test:a", "test:b")
+
+
+def test_add_to_cart_if_in_stock():
+    user_id = "testuser"
+    redis_client.client.delete(f"cart:{user_id}", "stock:TP001")
+    assert redis_client.add_to_cart_if_in_stock(user_id, "TP001", 2, 60) == -1
+    redis_client.set_product_stock({"TP001": 3})
+    assert 0 < redis_client.client.ttl("stock:TP001") <= PRODUCT_STOCK_TTL
+    assert redis_client.add_to_cart_if_in_stock(user_id, "TP001", 5, 60) == 0
+    assert redis_client.client.hgetall(f"cart:{user_id}") == {}
+    assert redis_client.add_to_cart_if_in_stock(user_id, "TP001", 2, 60) == 1
+    # What is already in the cart counts against the stock
+    assert redis_client.add_to_cart_if_in_stock(user_id, "TP001", 2, 60) == 0
+    assert redis_client.add_to_cart_if_in_stock(user_id, "TP001", 1, 60) == 1
+    assert redis_client.client.hgetall(f"cart:{user_id}") == {"TP001": "3"}
+    redis_client.client.delete(f"cart:{user_id}", "stock:TP001")
+
+
+def test_add_items_to_cart_if_in_stock():
+    user_id = "testuser"
+    redis_client.client.delete(f"cart:{user_id}", "stock:TP001", "stock:TP002")
+    redis_client.set_product_stock({"TP001": 3})
+    results = redis_client.add_items_to_cart_if_in_stock(
+        user_id, [("TP001", 2), ("TP001", 2), ("TP002", 1)], 60
+    )
+    assert results == [1, 0, -1]
+    assert redis_client.client.hgetall(f"cart:{user_id}") == {"TP001": "2"}
+    redis_client.clear_product_stock()
+    assert not redis_client.client.exists("stock:TP001")
+    redis_client.client.delete(f"cart:{user_id}")
@@ -1,5 +1,9 @@
 """Tests for search service functionality."""
 
+import base64
+import json
+
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch
 
@@ -47,6 +51,24 @@ class TestSearchService:
         # Verify cache was set
         mock_redis_client.set_json.assert_called_once()
 
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_full_text_search_uses_tsquery(self, mock_db, mock_redis_client):
+        """Test text search matches the indexed tsvector, not ILIKE scans."""
+        mock_redis_client.get_json.return_value = None
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = []
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        self.search_service.full_text_search(
+            "wooden bowl", {"category": "Home & Kitchen", "max_price": 30}, limit=5
+        )
+
+        sql, params = mock_cursor.execute.call_args.args
+        assert "plainto_tsquery" in sql
+        assert "ILIKE" not in sql
+        assert params == ["wooden bowl", "Home & Kitchen", 30, 5]
+
     @patch("src.services.search_service.redis_client")
     def test_full_text_search_cache_hit(self, mock_redis_client):
         """Test full-text search with cache hit."""
@@ -80,9 +102,12 @@ class TestSearchService:
         )
         assert len(results) == 1
 
+    @patch("src.services.search_service.redis_client")
     @patch("src.services.search_service.db")
-    def test_semantic_search(self, mock_db):
+    def test_semantic_search(self, mock_db, mock_redis_client):
         """Test semantic search functionality."""
+        mock_redis_client.get_json.return_value = None
+        mock_redis_client.client.lrange.return_value = []
         mock_cursor = Mock()
         mock_cursor.fetchall.return_value = [
             {
@@ -106,29 +131,221 @@ class TestSearchService:
         assert results[0]["similarity"] == 0.85
         assert results[1]["similarity"] == 0.72
 
+        # Results and the query embedding are cached for later lookups
+        mock_redis_client.set_json.assert_called_once()
+        mock_redis_client.client.pipeline.return_value.lpush.assert_called_once()
+
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_semantic_search_reuses_query_embedding(self, mock_db, mock_redis_client):
+        """Test a repeated query is encoded only once."""
+        mock_redis_client.get_json.return_value = None
+        mock_redis_client.client.lrange.return_value = []
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [{"id": "P001", "similarity": 0.85}]
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        self.search_service.model = Mock()
+        self.search_service.model.encode.return_value = np.array([0.6, 0.8, 0.0])
+
+        self.search_service.semantic_search("wooden bowl")
+        self.search_service.semantic_search("wooden bowl")
+        self.search_service.combined_search("wooden bowl")
+
+        self.search_service.model.encode.assert_called_once_with("wooden bowl")
+        assert mock_cursor.execute.call_count == 3
+
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_semantic_search_exact_cache_hit(self, mock_db, mock_redis_client):
+        """Test a repeated query is served from cache without encoding."""
+        cached_results = [{"id": "P001", "name": "Eco Bowl", "similarity": 0.85}]
+        mock_redis_client.get_json.return_value = cached_results
+        self.search_service.model = Mock()
+
+        results = self.search_service.semantic_search("Eco-friendly  kitchenware")
+
+        assert results == cached_results
+        assert self.search_service.cache_hits == 1
+        self.search_service.model.encode.assert_not_called()
+        mock_db.get_cursor.assert_not_called()
+
+    @patch("src.services.search_service.redis_client")
     @patch("src.services.search_service.db")
-    def test_combined_search(self, mock_db):
-        """Test combined search (text + semantic)."""
-        # Mock both search methods
-        self.search_service.full_text_search = Mock(
-            return_value=[{"id": "P001", "name": "Wooden Bowl", "price": 29.99}]
+    def test_semantic_search_near_duplicate_hit(self, mock_db, mock_redis_client):
+        """Test a query close to a cached one reuses its results."""
+        cached_results = [{"id": "P001", "name": "Eco Bowl", "similarity": 0.85}]
+        stored = np.array([127, 0, 0], dtype=np.int8)
+        mock_redis_client.client.lrange.return_value = [
+            json.dumps(
+                {
+                    "key": "semcache:previous",
+                    "limit": 10,
+                    "embedding": base64.b64encode(stored.tobytes()).decode(),
+                }
+            )
+        ]
+        mock_redis_client.get_json.side_effect = lambda key: (
+            cached_results if key == "semcache:previous" else None
         )
-        self.search_service.semantic_search = Mock(
-            return_value=[
+        self.search_service.model = Mock()
+        self.search_service.model.encode.return_value = np.array([0.99, 0.05, 0.0])
+        self.search_service.cache_projection = None
+
+        results = self.search_service.semantic_search("eco friendly kitchen ware")
+
+        assert results == cached_results
+        mock_db.get_cursor.assert_not_called()
+
+    def test_semantic_cache_index_per_projection(self):
+        """Test each projection keeps its own list of cached embeddings."""
+        self.search_service.cache_projection = None
+        full = self.search_service._semantic_cache_index
+        self.search_service.cache_projection = (np.zeros(4), np.eye(2, 4))
+        first = self.search_service._semantic_cache_index
+        self.search_service.cache_projection = (np.zeros(4), np.eye(3, 4))
+        second = self.search_service._semantic_cache_index
+
+        assert len({full, first, second}) == 3
+        assert full == "semcache:index:full"
+
+    @patch("src.services.search_service.redis_client")
+    def test_semantic_cache_projected_threshold(self, mock_redis_client):
+        """Test projected embeddings need the stricter similarity to hit."""
+        stored = np.array([127, 0, 0], dtype=np.int8)
+        mock_redis_client.client.lrange.return_value = [
+            json.dumps(
                 {
-                    "id": "P002",
-                    "name": "Eco-friendly Bowl",
-                    "price": 25.99,
-                    "similarity": 0.8,
+                    "key": "semcache:previous",
+                    "limit": 10,
+                    "embedding": base64.b64encode(stored.tobytes()).decode(),
                 }
-            ]
+            )
+        ]
+        mock_redis_client.get_json.return_value = [{"id": "P001"}]
+        query = np.array([0.96, 0.28, 0.0])
+
+        self.search_service.cache_projection = None
+        assert self.search_service._semantic_cache_lookup(query, 10) is not None
+        self.search_service.cache_projection = (np.zeros(3), np.eye(3))
+        assert self.search_service._semantic_cache_lookup(query, 10) is None
+
+    @patch("src.services.search_service.redis_client")
+    def test_semantic_cache_ignores_mismatched_entries(self, mock_redis_client):
+        """Test entries of another size are skipped rather than failing."""
+        stored = np.array([127, 0], dtype=np.int8)
+        mock_redis_client.client.lrange.return_value = [
+            json.dumps(
+                {
+                    "key": "semcache:previous",
+                    "limit": 10,
+                    "embedding": base64.b64encode(stored.tobytes()).decode(),
+                }
+            )
+        ]
+        self.search_service.cache_projection = None
+
+        result = self.search_service._semantic_cache_lookup(
+            np.array([1.0, 0.0, 0.0]), 10
         )
 
-        results = self.search_service.combined_search("bowl")
+        assert result is None
+        mock_redis_client.get_json.assert_not_called()
 
-        assert len(results) == 2
-        # Text search results should come first (higher weight)
-        assert results[0]["id"] == "P001"
+    def test_semantic_cache_projection(self):
+        """Test cached query embeddings are reduced with the fitted PCA."""
+        mean = np.zeros(4, dtype=np.float32)
+        components = np.eye(2, 4, dtype=np.float32)
+        self.search_service.cache_projection = (mean, components)
+
+        projected = self.search_service._project(np.array([3.0, 4.0, 9.0, 9.0]))
+
+        assert projected.shape == (2,)
+        np.testing.assert_allclose(projected, [0.6, 0.8], rtol=1e-6)
+        assert self.search_service._quantize([3.0, 4.0, 9.0, 9.0]).tolist() == [76, 102]
+
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_prefetch_embeddings(self, mock_db, mock_redis_client):
+        """Test prefetched queries are encoded in one call and reused."""
+        mock_redis_client.get_json.return_value = None
+        mock_redis_client.client.lrange.return_value = []
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = []
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        self.search_service.model = Mock()
+        self.search_service.model.encode.return_value = [
+            np.array([0.6, 0.8, 0.0]),
+            np.array([0.0, 0.6, 0.8]),
+        ]
+
+        self.search_service.prefetch_embeddings(
+            ["eco-friendly kitchenware", "handmade jewelry"]
+        )
+        self.search_service.semantic_search("eco-friendly kitchenware", limit=3)
+        self.search_service.combined_search("handmade jewelry", limit=3)
+
+        self.search_service.model.encode.assert_called_once()
+        assert mock_cursor.execute.call_count == 2
+
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_combined_search(self, mock_db, mock_redis_client):
+        """Test combined search (text + semantic) runs as one fused query."""
+        mock_redis_client.get_json.return_value = None
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [
+            {"id": "P001", "name": "Wooden Bowl", "similarity": None, "score": 1.0},
+            {"id": "P002", "name": "Eco Bowl", "similarity": 0.8, "score": 0.4},
+        ]
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        self.search_service.model = Mock()
+        self.search_service.model.encode.return_value = np.array([0.6, 0.8, 0.0])
+
+        results = self.search_service.combined_search("bowl", {"max_price": 50})
+
+        assert [r["id"] for r in results] == ["P001", "P002"]
+        mock_cursor.execute.assert_called_once()
+        sql, params = mock_cursor.execute.call_args.args
+        assert "FULL JOIN" in sql
+        assert params[1:4] == ["bowl", 50, 10]
+        # Results and the query embedding are cached for later lookups
+        mock_redis_client.set_json.assert_called_once()
+        entry = json.loads(
+            mock_redis_client.client.pipeline.return_value.lpush.call_args.args[1]
+        )
+        assert entry["filters"] == {"max_price": 50}
+
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_combined_search_near_duplicate_hit(self, mock_db, mock_redis_client):
+        """Test combined search reuses results of a close query with same filters."""
+        cached_results = [{"id": "P001", "similarity": 0.85, "score": 1.4}]
+        stored = base64.b64encode(np.array([127, 0, 0], dtype=np.int8).tobytes())
+        mock_redis_client.client.lrange.return_value = [
+            # A semantic search entry is never reused for combined search
+            json.dumps(
+                {"key": "semcache:semantic", "limit": 10, "embedding": stored.decode()}
+            ),
+            json.dumps(
+                {
+                    "key": "semcache:combined",
+                    "limit": 10,
+                    "filters": {},
+                    "embedding": stored.decode(),
+                }
+            ),
+        ]
+        mock_redis_client.get_json.side_effect = lambda key: (
+            cached_results if key == "semcache:combined" else None
+        )
+        self.search_service.model = Mock()
+        self.search_service.model.encode.return_value = np.array([0.99, 0.05, 0.0])
+        self.search_service.cache_projection = None
+
+        results = self.search_service.combined_search("handmade jewellery")
+
+        assert results == cached_results
+        mock_db.get_cursor.assert_not_called()
 
     @patch("src.services.search_service.db")
     def test_natural_language_search(self, mock_db):
@@ -212,18 +429,24 @@ class TestSearchService:
         results = self.search_service.full_text_search("product")
         assert len(results) == 1
 
-    def test_search_limit(self):
+    @patch("src.services.search_service.redis_client")
+    @patch("src.services.search_service.db")
+    def test_search_limit(self, mock_db, mock_redis_client):
         """Test that search respects the limit parameter."""
-        # Mock the search methods
-        self.search_service.full_text_search = Mock(
-            return_value=[
-                {"id": f"P{i}", "name": f"Product {i}", "price": 25.0}
-                for i in range(1, 11)  # 10 products
-            ]
-        )
+        mock_redis_client.get_json.return_value = None
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [
+            {"id": f"P{i}", "name": f"Product {i}", "price": 25.0} for i in range(3)
+        ]
+        mock_db.get_cursor.return_value.__enter__.return_value = mock_cursor
+        self.search_service.model = Mock()
 
         results = self.search_service.combined_search("product", limit=3)
+
         assert len(results) == 3
+        # Each side and the fused result are capped at the limit
+        params = mock_cursor.execute.call_args.args[1]
+        assert params[2] == params[5] == params[6] == 3
 
 
 @pytest.mark.integration
@@ -1,4 +1,7 @@
+import numpy as np
+
 from src.db.postgres_client import db
+from src.loaders import vector_loader
 from src.loaders.vector_loader import VectorLoader
 
 
@@ -11,6 +14,22 @@ def test_create_vector_extension():
         assert cursor.fetchone()["exists"] == "product_embeddings"
 
 
+def test_embeddings_stored_as_halfvec():
+    loader = VectorLoader()
+    loader.create_vector_extension()
+    # Tables created before the switch are converted in place
+    with db.get_cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT format_type(atttypid, atttypmod) AS type
+            FROM pg_attribute
+            WHERE attrelid = 'product_embeddings'::regclass
+              AND attname = 'description_embedding'
+            """
+        )
+        assert cursor.fetchone()["type"] == "halfvec(384)"
+
+
 def test_generate_embeddings():
     loader = VectorLoader()
     loader.create_vector_extension()
@@ -19,3 +38,20 @@ def test_generate_embeddings():
     with db.get_cursor() as cursor:
         cursor.execute("SELECT COUNT(*) AS cnt FROM product_embeddings;")
         assert cursor.fetchone()["cnt"] > 0
+
+
+def test_fit_cache_projection(tmp_path, monkeypatch):
+    path = tmp_path / "pca.npz"
+    monkeypatch.setattr(vector_loader, "SEMANTIC_CACHE_PCA_PATH", path)
+    monkeypatch.setattr(vector_loader, "SEMANTIC_CACHE_PCA_DIM", 4)
+    monkeypatch.setattr(vector_loader, "SEMANTIC_CACHE_PCA_MIN_SAMPLES", 20)
+    loader = VectorLoader.__new__(VectorLoader)
+    rng = np.random.default_rng(0)
+
+    loader.fit_cache_projection(rng.normal(size=(30, 8)))
+    with np.load(path) as data:
+        assert data["components"].shape == (4, 8)
+
+    # Too small a corpus: the projection is dropped, not refit
+    loader.fit_cache_projection(rng.normal(size=(10, 8)))
+    assert not path.exists()